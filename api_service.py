@@ -1,143 +1,86 @@
 # api_service.py
 """API service functions for interacting with Perplexity API"""
 
-import requests
+import logging
+import sqlite3
 import streamlit as st
-from config import PERPLEXITY_API_URL, PERPLEXITY_MODEL, TRUSTED_MEDICAL_SOURCES
+from perplexity_client import PerplexityClient, PerplexityAPIError, canonicalize_drug_list
+from rate_limit import PRIORITY_INTERACTIVE
+from history_store import get_history_store
+from utils import get_user_id
 
-class PerplexityService:
-    """Service class for Perplexity API interactions"""
-    
-    def __init__(self, api_key):
-        self.api_key = api_key
-        self.headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
+logger = logging.getLogger(__name__)
+
+# Internal sub-queries of a pairwise check or chunked translation; the wrapping call is counted instead
+SUB_QUERY_KINDS = ("drug_pair", "document_chunk")
+
+def _count_session_query():
+    """Count one user-level query in session state"""
+    if 'queries_made' not in st.session_state:
+        st.session_state.queries_made = 0
+    st.session_state.queries_made += 1
+
+def _track_session_query(event):
+    """Update session state for query tracking"""
+    if event["event"] == "query_complete" and event["kind"] not in SUB_QUERY_KINDS:
+        _count_session_query()
+
+def _remember_query(kind, inputs, result):
+    """Save an answered query to the user's persistent history"""
+    try:
+        get_history_store().record(get_user_id(), kind, inputs, result)
+    except (sqlite3.Error, OSError) as e:
+        # History is best-effort (e.g. a read-only home directory); never fail the query over it
+        logger.warning("Query not saved to history: %s", e)
+
+def _on_query_event(event):
+    """Count completed queries and record user-facing ones in history"""
+    _track_session_query(event)
+    if event["event"] == "query_complete" and event.get("inputs") is not None and event.get("result"):
+        _remember_query(event["kind"], event["inputs"], event["result"])
+
+def _show_api_error(error):
+    """Report a failed API request on the page"""
+    st.error(f"API request failed: {str(error)}")
+
+class PerplexityService(PerplexityClient):
+    """Streamlit adapter: session query tracking, per-user history and on-page errors instead of exceptions"""
     
-    def _create_enhanced_prompt(self, prompt, sources_filter=""):
-        """Create enhanced prompt with medical source filtering"""
-        sources_text = "\n- ".join(TRUSTED_MEDICAL_SOURCES)
-        
-        enhanced_prompt = f"""
-        {prompt}
-        
-        Please provide information from trusted medical sources only, including:
-        - {sources_text}
-        
-        {sources_filter}
-        
-        Always include source citations and emphasize that this is for educational purposes only.
-        """
-        return enhanced_prompt
+    def __init__(self, api_key, priority=PRIORITY_INTERACTIVE):
+        super().__init__(api_key, priority=priority, on_event=_on_query_event)
     
-    def query(self, prompt, sources_filter="", temperature=0.2, max_tokens=1500):
-        """Query Perplexity API with medical source filtering"""
-        enhanced_prompt = self._create_enhanced_prompt(prompt, sources_filter)
-        
-        data = {
-            "model": PERPLEXITY_MODEL,
-            "messages": [
-                {
-                    "role": "system",
-                    "content": "You are a medical information assistant that provides accurate, evidence-based health information from trusted sources. Always include disclaimers about consulting healthcare professionals and cite your sources."
-                },
-                {
-                    "role": "user",
-                    "content": enhanced_prompt
-                }
-            ],
-            "temperature": temperature,
-            "max_tokens": max_tokens
-        }
-        
+    def query(self, prompt, sources_filter="", temperature=0.2, max_tokens=None, kind="query", inputs=None):
+        """Query Perplexity API with medical source filtering; returns None on failure"""
         try:
-            response = requests.post(PERPLEXITY_API_URL, headers=self.headers, json=data)
-            response.raise_for_status()
-            
-            # Update session state for query tracking
-            if 'queries_made' not in st.session_state:
-                st.session_state.queries_made = 0
-            st.session_state.queries_made += 1
-            
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            st.error(f"API request failed: {str(e)}")
+            return super().query(prompt, sources_filter, temperature, max_tokens, kind=kind, inputs=inputs)
+        except PerplexityAPIError as e:
+            _show_api_error(e)
             return None
     
-    def query_symptom(self, symptom, age_group="All ages", severity="All levels", duration="Any duration"):
-        """Query for symptom information"""
-        prompt = f"""
-        Provide comprehensive information about the symptom: {symptom}
-        
-        Please include:
-        1. Medical definition and description
-        2. Common causes (most frequent reasons)
-        3. Serious causes that require immediate medical attention
-        4. When to seek emergency care
-        5. Typical diagnostic approaches
-        6. General management principles
-        7. Red flags and warning signs
-        
-        Consider: Age group: {age_group}, Severity: {severity}, Duration: {duration}
-        
-        Format the response clearly with headers and bullet points.
-        """
-        return self.query(prompt)
-    
-    def query_drug_interactions(self, drugs):
-        """Query for drug interaction information"""
-        drugs_list = ', '.join(drugs)
-        prompt = f"""
-        Check for drug interactions between these medications: {drugs_list}
-        
-        Please provide:
-        1. Major interactions (clinically significant)
-        2. Moderate interactions (monitor closely)
-        3. Minor interactions (minimal clinical significance)
-        4. Mechanism of interaction
-        5. Clinical management recommendations
-        6. Monitoring parameters
-        7. Alternative medications if interactions are severe
-        
-        Include severity ratings and clinical significance.
-        """
-        return self.query(prompt)
+    def stream_query(self, prompt, sources_filter="", temperature=0.2, max_tokens=None, kind="query", inputs=None):
+        """Query Perplexity API, returning a ResponseStream that reports failures on the page"""
+        stream = super().stream_query(prompt, sources_filter, temperature, max_tokens, kind=kind, inputs=inputs)
+        stream.on_error = _show_api_error
+        return stream
     
-    def query_medical_translation(self, medical_term):
-        """Query for medical term translation"""
-        prompt = f"""
-        Explain the medical term: {medical_term}
-        
-        Please provide:
-        1. Simple, easy-to-understand definition
-        2. Common name or lay term
-        3. Pronunciation guide
-        4. What causes this condition
-        5. Common symptoms
-        6. How it's diagnosed
-        7. Treatment options
-        8. Prognosis and outlook
-        9. Related terms
-        
-        Use simple language that a patient would understand.
-        """
-        return self.query(prompt)
+    def query_drug_interactions_pairwise(self, drugs):
+        """Check every drug pair concurrently; returns None if every pair failed"""
+        try:
+            result = super().query_drug_interactions_pairwise(drugs)
+        except PerplexityAPIError as e:
+            _show_api_error(e)
+            return None
+        _count_session_query()
+        _remember_query("drug_interactions", {"drugs": canonicalize_drug_list(drugs), "pairwise": True}, result)
+        return result
     
-    def query_document_translation(self, medical_text):
-        """Query for medical document translation"""
-        prompt = f"""
-        Translate this medical text into simple, patient-friendly language:
-        
-        {medical_text}
-        
-        Please:
-        1. Replace medical jargon with simple terms
-        2. Explain what each finding means
-        3. Highlight important information
-        4. Maintain accuracy while improving readability
-        5. Add context where helpful
-        
-        Keep the same structure but make it understandable for patients.
-        """
-        return self.query(prompt)
\ No newline at end of file
+    def query_document_translation_chunked(self, medical_text):
+        """Translate a long document in parallel chunks; returns None if every chunk failed"""
+        try:
+            result = super().query_document_translation_chunked(medical_text)
+        except PerplexityAPIError as e:
+            _show_api_error(e)
+            return None
+        _count_session_query()
+        _remember_query("document_translation", {"medical_text": medical_text}, result)
+        return result
@@ -1,9 +1,5 @@
 import streamlit as st
 import requests
-import json
-import time
-from datetime import datetime
-import pandas as pd
 
 # Configure page
 st.set_page_config(
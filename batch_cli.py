@@ -0,0 +1,190 @@
+# batch_cli.py
+"""Command-line batch runner for bulk Perplexity queries with resumable JSONL output"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from cache import configure_response_cache
+from config import RATE_LIMIT_REQUESTS_PER_MINUTE, RATE_LIMIT_BURST, RESPONSE_CACHE_DB_PATH
+from perplexity_client import PerplexityClient, PerplexityAPIError
+from rate_limit import PRIORITY_BACKGROUND, get_rate_limiter
+
+# Batch kind -> (required input field, optional input fields)
+BATCH_KINDS = {
+    "symptom": ("symptom", ("age_group", "severity", "duration")),
+    "medical_translation": ("medical_term", ()),
+    "drug_interactions": ("drugs", ()),
+    "document_translation": ("medical_text", ())
+}
+
+# Shorter column names accepted in input files
+_FIELD_ALIASES = {"term": "medical_term", "text": "medical_text"}
+
+def _split_drugs(value):
+    """Accept a drug list as a JSON array or a ';'/'|'-separated string"""
+    if isinstance(value, list):
+        return [str(drug).strip() for drug in value if str(drug).strip()]
+    return [drug.strip() for drug in str(value).replace("|", ";").split(";") if drug.strip()]
+
+def _parse_jsonl(f):
+    """Yield each non-blank line's object, or the ValueError for a line that isn't one"""
+    for line in f:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"invalid JSON: {e}")
+            continue
+        yield row if isinstance(row, dict) else ValueError("record is not a JSON object")
+
+def read_records(path, kind):
+    """Yield (record id, query inputs, error) from a JSONL or CSV file; inputs is None for a bad record"""
+    required, optional = BATCH_KINDS[kind]
+    with open(path, encoding="utf-8", newline="") as f:
+        rows = csv.DictReader(f) if path.lower().endswith(".csv") else _parse_jsonl(f)
+        for number, row in enumerate(rows, start=1):
+            if isinstance(row, ValueError):
+                yield str(number), None, str(row)
+                continue
+            row = {_FIELD_ALIASES.get(key, key): value for key, value in row.items() if value not in (None, "")}
+            record_id = str(row.get("id", number))
+            if required not in row:
+                yield record_id, None, f"missing '{required}'"
+                continue
+            inputs = {field: row[field] for field in (required,) + optional if field in row}
+            if kind == "drug_interactions":
+                inputs["drugs"] = _split_drugs(inputs["drugs"])
+            yield record_id, inputs, None
+
+def load_checkpoint(path):
+    """Return the ids already answered successfully in an existing output file"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by an interrupted run
+            if record.get("ok"):
+                done.add(record["id"])
+    return done
+
+def run_record(api_key, kind, record_id, inputs):
+    """Run one query and return its output record"""
+    events = []
+    client = PerplexityClient(api_key, priority=PRIORITY_BACKGROUND, on_event=events.append)
+    started = time.perf_counter()
+    record = {"id": record_id, "kind": kind, "input": inputs}
+    try:
+        result = client.query(client.prompt_for(kind, **inputs), kind=kind)
+        record.update(
+            ok=True,
+            source=events[-1].get("source") if events else None,
+            content=result['choices'][0]['message']['content'],
+            citations=result.get('citations', [])
+        )
+    except PerplexityAPIError as e:
+        record.update(ok=False, error=str(e), status_code=e.status_code, retryable=e.retryable)
+    except Exception as e:  # e.g. bad inputs or a sqlite error: record it, don't abort the batch
+        record.update(ok=False, error=f"{type(e).__name__}: {e}", status_code=None, retryable=False)
+    record["elapsed"] = round(time.perf_counter() - started, 3)
+    return record
+
+def _is_cached(client, kind, inputs):
+    """Check whether a record's answer is already in the response cache"""
+    try:
+        return client.is_cached(client.prompt_for(kind, **inputs), kind=kind)
+    except Exception:
+        return False  # let run_record report whatever is wrong with the record
+
+def _run_windowed(pool, api_key, kind, pending, window):
+    """Run records on the pool with at most `window` submitted at a time; yield each as it completes"""
+    queue = iter(pending)
+    in_flight = set()
+    while True:
+        for record_id, inputs in itertools.islice(queue, window - len(in_flight)):
+            in_flight.add(pool.submit(run_record, api_key, kind, record_id, inputs))
+        if not in_flight:
+            return
+        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield future.result()
+
+def build_parser():
+    """Return the command-line argument parser"""
+    parser = argparse.ArgumentParser(description="Run bulk Dr. Home queries and write the answers to JSONL.")
+    parser.add_argument("input", help="JSONL or CSV file with one query per record")
+    parser.add_argument("--kind", required=True, choices=sorted(BATCH_KINDS), help="query type for every record")
+    parser.add_argument("--output", required=True, help="JSONL results file, also used as the resume checkpoint")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent requests (default: 4)")
+    parser.add_argument("--rate-per-minute", type=float, default=RATE_LIMIT_REQUESTS_PER_MINUTE,
+                        help=f"upstream request budget (default: {RATE_LIMIT_REQUESTS_PER_MINUTE})")
+    parser.add_argument("--resume", action="store_true", help="skip ids already answered in the output file")
+    parser.add_argument("--skip-cached", action="store_true",
+                        help="write records whose answer is already cached straight from the cache, without queuing them")
+    parser.add_argument("--cache-db", default=RESPONSE_CACHE_DB_PATH,
+                        help="SQLite file for the response cache so results persist between runs")
+    parser.add_argument("--api-key", default=os.environ.get("PERPLEXITY_API_KEY"),
+                        help="Perplexity API key (default: $PERPLEXITY_API_KEY)")
+    return parser
+
+def main(argv=None):
+    """Entry point; returns the process exit code"""
+    args = build_parser().parse_args(argv)
+    if not args.api_key:
+        print("error: no API key; pass --api-key or set PERPLEXITY_API_KEY", file=sys.stderr)
+        return 2
+
+    if args.cache_db:
+        configure_response_cache(db_path=args.cache_db)
+    get_rate_limiter().set_rate(args.rate_per_minute, burst=min(RATE_LIMIT_BURST, max(1, int(args.rate_per_minute))))
+
+    done = load_checkpoint(args.output) if args.resume else set()
+    probe = PerplexityClient(args.api_key)
+    pending = []
+    immediate = []   # records written without queuing: bad rows and, with --skip-cached, cached answers
+    skipped = 0
+    for record_id, inputs, error in read_records(args.input, args.kind):
+        if record_id in done:
+            skipped += 1
+        elif inputs is None:
+            immediate.append({"id": record_id, "kind": args.kind, "input": None, "ok": False,
+                              "error": f"invalid record: {error}", "status_code": None, "retryable": False})
+        elif args.skip_cached and _is_cached(probe, args.kind, inputs):
+            immediate.append(run_record(args.api_key, args.kind, record_id, inputs))
+        else:
+            pending.append((record_id, inputs))
+
+    print(f"{len(pending)} to run, {len(immediate)} written immediately, {skipped} skipped", file=sys.stderr)
+    failed = 0
+    total = len(pending) + len(immediate)
+    pool = ThreadPoolExecutor(max_workers=args.workers)
+    try:
+        with open(args.output, "a" if args.resume else "w", encoding="utf-8") as out:
+            records = itertools.chain(immediate, _run_windowed(pool, args.api_key, args.kind, pending, args.workers * 2))
+            for completed, record in enumerate(records, start=1):
+                failed += not record["ok"]
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                print(f"[{completed}/{total}] {record['id']}: "
+                      f"{record.get('source') or 'failed'} in {record.get('elapsed', 0)}s", file=sys.stderr)
+    except KeyboardInterrupt:
+        # Drop queued records rather than spend quota on answers nothing will write
+        pool.shutdown(wait=False, cancel_futures=True)
+        print("interrupted; rerun with --resume to continue", file=sys.stderr)
+        return 130
+    pool.shutdown()
+
+    print(f"done: {total - failed} ok, {failed} failed", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
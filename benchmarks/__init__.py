@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+"""Performance benchmarks; run from the repository root with python -m benchmarks.<name>"""
@@ -0,0 +1,40 @@
+# benchmarks/calculators.py
+"""Roster screening throughput benchmark for the vectorized health calculators"""
+
+import argparse
+import sys
+import time
+import numpy as np
+from health_calculators import screen_roster
+
+def make_roster(rows, seed=0):
+    """Return a synthetic roster with realistic value ranges"""
+    rng = np.random.default_rng(seed)
+    return {
+        "age": rng.integers(18, 90, rows),
+        "sex": rng.choice(["Male", "Female"], rows),
+        "height_in": rng.uniform(58, 78, rows),
+        "weight_lbs": rng.uniform(100, 300, rows),
+        "activity": rng.choice(["sedentary", "light", "moderate", "active", "very active"], rows)
+    }
+
+def main(argv=None):
+    """Entry point"""
+    parser = argparse.ArgumentParser(description="Measure screen_roster throughput.")
+    parser.add_argument("--rows", type=int, default=500_000, help="roster size (default: 500000)")
+    parser.add_argument("--runs", type=int, default=5, help="timed runs (default: 5)")
+    args = parser.parse_args(argv)
+
+    roster = make_roster(args.rows)
+    screen_roster(roster)  # warm-up
+    timings = []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        screen_roster(roster)
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    print(f"{args.rows:,} rows: best {best * 1000:.0f} ms, {args.rows / best:,.0f} rows/s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
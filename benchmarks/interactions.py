@@ -0,0 +1,37 @@
+# benchmarks/interactions.py
+"""Regimen lookup latency for the offline drug-interaction table"""
+
+import argparse
+import sys
+import time
+import numpy as np
+from interaction_kb import get_interaction_kb
+from perplexity_client import drug_pairs
+
+def make_regimen(size, seed=0):
+    """Return `size` distinct drugs drawn from the ones the table knows about"""
+    rng = np.random.default_rng(seed)
+    names = get_interaction_kb().drugs
+    return [str(name) for name in rng.choice(names, size=min(size, len(names)), replace=False)]
+
+def main(argv=None):
+    """Entry point"""
+    parser = argparse.ArgumentParser(description="Measure offline interaction lookups for one regimen.")
+    parser.add_argument("--drugs", type=int, default=15, help="regimen size (default: 15, i.e. 105 pairs)")
+    parser.add_argument("--runs", type=int, default=1000, help="timed lookups (default: 1000)")
+    args = parser.parse_args(argv)
+
+    kb = get_interaction_kb()
+    pairs = drug_pairs(make_regimen(args.drugs))
+    found = kb.lookup_pairs(pairs)  # warm-up
+    started = time.perf_counter()
+    for _ in range(args.runs):
+        kb.lookup_pairs(pairs)
+    per_lookup = (time.perf_counter() - started) / args.runs
+    known = sum(record is not None for record in found)
+    print(f"{len(pairs)} pairs ({known} known): {per_lookup * 1e6:.1f} µs per regimen lookup, "
+          f"{len(pairs) - known} left for the API")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
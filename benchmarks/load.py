@@ -0,0 +1,240 @@
+# benchmarks/load.py
+"""Offline load benchmark: PerplexityService and the pages against the local mock API"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from benchmarks.mock_server import MockPerplexityServer, add_settings_arguments, settings_from_args
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _submit_symptom(app, i):
+    app.text_input[0].input(f"benchmark symptom {i}")
+    app.button[0].click()
+
+def _submit_drugs(app, i):
+    app.text_area[0].input(f"warfarin\nbenchmark drug {i}").run()  # the button enables once drugs are entered
+    next(button for button in app.button if "Check" in button.label).click()
+
+def _submit_term(app, i):
+    app.text_input[0].input(f"benchmark term {i}")
+    next(button for button in app.button if "Translate" in button.label).click()
+
+# Page scenario -> (sidebar option, function that fills in the page for input i and clicks submit)
+PAGE_SCENARIOS = {
+    "symptom_explorer": ("🔍 Symptom Explorer", _submit_symptom),
+    "drug_interaction": ("💊 Drug Interactions", _submit_drugs),
+    "medical_translator": ("🏥 Medical Translator", _submit_term)
+}
+
+# Report field -> True when larger is better (used for baseline comparison)
+COMPARED_FIELDS = {
+    "throughput_rps": True, "p50_ms": False, "p95_ms": False, "p99_ms": False,
+    "ttft_p95_ms": False, "peak_alloc_kb": False
+}
+
+def latency_summary(latencies):
+    """Return p50/p95/p99 of a list of seconds, in milliseconds"""
+    if not latencies:
+        return {}
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+    return {"p50_ms": round(float(p50), 1), "p95_ms": round(float(p95), 1), "p99_ms": round(float(p99), 1)}
+
+def workload(requests, unique, seed=0):
+    """Request indices where about 1 - unique/requests of the requests repeat an earlier one"""
+    rng = random.Random(seed)
+    return [rng.randrange(unique) for _ in range(requests)]
+
+def reset_shared_state():
+    """Empty the response cache so every measurement starts cold"""
+    from cache import get_response_cache
+    get_response_cache().clear()
+
+def run_service_level(server, stream, concurrency, indices, trace_memory):
+    """Drive PerplexityService.query_symptom from `concurrency` threads and summarize the run"""
+    from api_service import PerplexityService
+    sources = []
+    service = PerplexityService("benchmark")
+    service.on_event = lambda event: sources.append(event.get("source", "error"))
+
+    def one(i):
+        started = time.perf_counter()
+        first_chunk = None
+        if stream:
+            for _ in service.query_symptom(f"benchmark symptom {i}", stream=True):
+                if first_chunk is None:
+                    first_chunk = time.perf_counter() - started
+            ok = True
+        else:
+            ok = service.query_symptom(f"benchmark symptom {i}") is not None
+        return time.perf_counter() - started, first_chunk, ok
+
+    reset_shared_state()
+    before = dict(server.stats)
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, indices))
+    wall = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    if trace_memory:
+        tracemalloc.stop()
+
+    latencies = [latency for latency, _, _ in results]
+    report = {
+        "requests": len(results),
+        "errors": sum(1 for _, _, ok in results if not ok),
+        "throughput_rps": round(len(results) / wall, 1),
+        **latency_summary(latencies),
+        "cache_hit_ratio": round(sum(1 for source in sources if source in ("cache", "semantic", "coalesced")) / max(len(sources), 1), 3),
+        "api_calls": server.stats["requests"] - before["requests"],
+        "rate_limited": server.stats["rate_limited"] - before["rate_limited"]
+    }
+    if stream:
+        report["ttft_p95_ms"] = round(float(np.percentile([t for _, t, _ in results if t is not None] or [0], 95)) * 1000, 1)
+    if peak is not None:
+        report["peak_alloc_kb"] = round(peak / 1024)
+    return report
+
+def run_page_scenario(name, runs):
+    """Render a page headlessly and time the rerun that submits it, cold (new input) and warm (cached)"""
+    from streamlit.testing.v1 import AppTest
+    option, submit = PAGE_SCENARIOS[name]
+    reset_shared_state()
+    report = {}
+    for phase in ("cold", "warm"):
+        timings = []
+        for i in range(runs):
+            app = AppTest.from_file(os.path.join(REPO_ROOT, "main.py"), default_timeout=60)
+            app.session_state["perplexity_api_key"] = "benchmark"
+            app.run()
+            app.sidebar.selectbox[0].select(option).run()
+            submit(app, i)
+            started = time.perf_counter()
+            app.run()
+            timings.append(time.perf_counter() - started)
+            if app.exception:
+                report["exception"] = app.exception[0].value
+        report[phase] = latency_summary(timings)
+    return report
+
+def flatten(report, prefix=""):
+    """Flatten nested report dicts into {"a.b.field": value}"""
+    flat = {}
+    for key, value in report.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+def compare(report, baseline, threshold):
+    """Return (lines, regressions) comparing the compared fields with a saved baseline"""
+    current, previous = flatten(report["results"]), flatten(baseline["results"])
+    lines, regressions = [], []
+    for key in sorted(current):
+        field = key.rsplit(".", 1)[-1]
+        if field not in COMPARED_FIELDS or not previous.get(key):
+            continue
+        change = (current[key] - previous[key]) / previous[key] * 100
+        worse = -change if COMPARED_FIELDS[field] else change
+        flag = ""
+        if worse > threshold:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        lines.append(f"{key:<48} {previous[key]:>10} -> {current[key]:>10}  {change:+6.1f}%{flag}")
+    return lines, regressions
+
+def print_report(report):
+    """Print the results as aligned text"""
+    for mode, levels in report["results"].get("service", {}).items():
+        for level, stats in levels.items():
+            print(f"service {mode:<9} {level:>4}  " + "  ".join(f"{key} {value}" for key, value in stats.items()))
+    for page, phases in report["results"].get("pages", {}).items():
+        for phase, stats in phases.items():
+            if isinstance(stats, dict):
+                print(f"page {page:<20} {phase:<5} " + "  ".join(f"{key} {value}" for key, value in stats.items()))
+            else:
+                print(f"page {page:<20} {phase}: {stats}")
+    print(f"max RSS {report['max_rss_mb']} MB")
+
+def main(argv=None):
+    """Entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark the API service and pages against a local mock API.")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated thread counts (default: 1,4,16)")
+    parser.add_argument("--requests", type=int, default=200, help="requests per concurrency level (default: 200)")
+    parser.add_argument("--unique", type=int, default=100, help="distinct queries among them (default: 100)")
+    parser.add_argument("--mode", choices=["blocking", "stream", "both"], default="both")
+    parser.add_argument("--page-runs", type=int, default=3, help="renders per page and phase; 0 skips pages (default: 3)")
+    parser.add_argument("--rate-per-minute", type=float, default=0,
+                        help="client rate limit during the run; 0 = effectively unlimited (default: 0)")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="skip allocation tracking (lower overhead)")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write the results as a baseline JSON file")
+    parser.add_argument("--baseline", metavar="PATH", help="compare the results with a saved baseline")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="percent change counted as a regression (default: 10)")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    add_settings_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = MockPerplexityServer(settings_from_args(args)).start()
+    # Must be set before the app modules are imported: they read these at import time
+    os.environ["DR_HOME_API_URL"] = server.url
+    os.environ["DR_HOME_PREFETCH"] = "0"
+    os.environ["DR_HOME_HISTORY_DB"] = os.path.join(tempfile.mkdtemp(prefix="dr_home_bench_"), "history.sqlite3")
+    from rate_limit import get_rate_limiter
+    logging.disable(logging.WARNING)  # Streamlit's bare-mode and widget warnings would swamp the report
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    get_rate_limiter().set_rate(args.rate_per_minute or 1_000_000, burst=max(levels))
+    modes = ["blocking", "stream"] if args.mode == "both" else [args.mode]
+    indices = workload(args.requests, args.unique)
+
+    results = {"service": {}}
+    for mode in modes:
+        results["service"][mode] = {
+            f"c{level}": run_service_level(server, mode == "stream", level, indices, not args.no_tracemalloc)
+            for level in levels
+        }
+    if args.page_runs:
+        results["pages"] = {name: run_page_scenario(name, args.page_runs) for name in PAGE_SCENARIOS}
+    server.stop()
+
+    report = {
+        "settings": {key: value for key, value in vars(args).items() if key not in ("baseline", "save_baseline", "json")},
+        "results": results,
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        lines, regressions = compare(report, baseline, args.threshold)
+        print("\nCompared with baseline:")
+        changed = sorted(key for key, value in report["settings"].items() if baseline["settings"].get(key) != value)
+        if changed:
+            print(f"note: settings differ from the baseline ({', '.join(changed)})")
+        print("\n".join(lines))
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold}%")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
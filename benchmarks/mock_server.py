@@ -0,0 +1,182 @@
+# benchmarks/mock_server.py
+"""Local stand-in for the Perplexity chat completions API with configurable latency and faults"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ("rest", "fluids", "symptoms", "consult", "doctor", "dose", "risk", "common", "relief", "care")
+
+class MockSettings:
+    """Behaviour of the mock API; may be changed while the server runs"""
+
+    def __init__(self, latency=0.2, jitter=0.05, chunk_delay=0.005, chunk_words=4,
+                 answer_words=300, error_rate=0.0, retry_after=0.05, seed=0):
+        self.latency = latency            # seconds before response headers (time to first byte)
+        self.jitter = jitter              # +/- uniform jitter on latency
+        self.chunk_delay = chunk_delay    # seconds between streamed SSE events
+        self.chunk_words = chunk_words    # words per streamed event
+        self.answer_words = answer_words  # answer length, i.e. payload size
+        self.error_rate = error_rate      # fraction of requests answered with 429
+        self.retry_after = retry_after    # Retry-After sent with each 429, in seconds
+        self.random = random.Random(seed)
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    """Threaded server that ignores clients hanging up mid-response (e.g. abandoned streams)"""
+
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+class MockPerplexityServer:
+    """Threaded HTTP/1.1 keep-alive server that answers POST /chat/completions like the real API"""
+
+    def __init__(self, settings=None, host="127.0.0.1", port=0):
+        self.settings = settings or MockSettings()
+        self.stats = {"requests": 0, "streamed": 0, "rate_limited": 0, "bytes_sent": 0}
+        self._stats_lock = threading.Lock()
+        self._server = _QuietHTTPServer((host, port), _make_handler(self))
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/chat/completions"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-perplexity", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def count(self, field, amount=1):
+        with self._stats_lock:
+            self.stats[field] += amount
+
+    def answer_for(self, body):
+        """Deterministic answer text for a request, so repeated prompts get identical answers"""
+        prompt = body["messages"][-1]["content"]
+        rng = random.Random(prompt)
+        words = [rng.choice(WORDS) for _ in range(self.settings.answer_words)]
+        return "Severity: Moderate\n" + " ".join(words)
+
+    def delay(self):
+        settings = self.settings
+        with self._stats_lock:
+            jitter = settings.random.uniform(-settings.jitter, settings.jitter)
+            rate_limited = settings.random.random() < settings.error_rate
+        time.sleep(max(0.0, settings.latency + jitter))
+        return rate_limited
+
+def _make_handler(server):
+    """Build a request handler class bound to a MockPerplexityServer"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            server.count("requests")
+            if server.delay():
+                server.count("rate_limited")
+                self.send_response(429)
+                self.send_header("Retry-After", str(server.settings.retry_after))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            answer = server.answer_for(body)
+            usage = {"prompt_tokens": len(json.dumps(body["messages"])) // 4,
+                     "completion_tokens": len(answer) // 4}
+            if body.get("stream"):
+                server.count("streamed")
+                self._stream(answer, usage)
+            else:
+                self._send_json({
+                    "id": "mock", "model": body.get("model"), "citations": ["https://medlineplus.gov"],
+                    "usage": usage,
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": answer}}]
+                })
+
+        def _send_json(self, payload):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            server.count("bytes_sent", len(data))
+
+        def _write_chunk(self, data):
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+            server.count("bytes_sent", len(data))
+
+        def _stream(self, answer, usage):
+            """Send the answer as SSE events over chunked transfer encoding"""
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            words = answer.split(" ")
+            size = server.settings.chunk_words
+            for i in range(0, len(words), size):
+                last = i + size >= len(words)
+                event = {"id": "mock", "citations": ["https://medlineplus.gov"],
+                         "choices": [{"index": 0, "delta": {"content": " ".join(words[i:i + size]) + ("" if last else " ")},
+                                      "finish_reason": "stop" if last else None}]}
+                if last:
+                    event["usage"] = usage
+                self._write_chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                if server.settings.chunk_delay and not last:
+                    time.sleep(server.settings.chunk_delay)
+            self._write_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+
+    return Handler
+
+def add_settings_arguments(parser):
+    """Add the MockSettings command-line options to an argparse parser"""
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds to first byte (default: 0.2)")
+    parser.add_argument("--jitter", type=float, default=0.05, help="+/- latency jitter in seconds (default: 0.05)")
+    parser.add_argument("--chunk-delay", type=float, default=0.005, help="seconds between streamed events (default: 0.005)")
+    parser.add_argument("--answer-words", type=int, default=300, help="answer length in words (default: 300)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests rejected with 429 (default: 0)")
+    parser.add_argument("--retry-after", type=float, default=0.05, help="Retry-After seconds sent with 429s (default: 0.05)")
+
+def settings_from_args(args):
+    """Build MockSettings from parsed add_settings_arguments options"""
+    return MockSettings(latency=args.latency, jitter=args.jitter, chunk_delay=args.chunk_delay,
+                        answer_words=args.answer_words, error_rate=args.error_rate, retry_after=args.retry_after)
+
+def main(argv=None):
+    """Run the mock API in the foreground (point the app at it with DR_HOME_API_URL)"""
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the Perplexity API.")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on (default: 8765)")
+    add_settings_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = MockPerplexityServer(settings_from_args(args), port=args.port).start()
+    print(f"Mock Perplexity API at {server.url}")
+    print(f"  DR_HOME_API_URL={server.url} streamlit run main.py")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+# benchmarks/processes.py
+"""Multi-process benchmark: upstream calls made by several app processes, with and without shared state"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.load import latency_summary, workload
+from benchmarks.mock_server import MockPerplexityServer, add_settings_arguments, settings_from_args
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _child(settings):
+    """Run one app process's share of the workload, starting at the agreed time; print its results"""
+    from perplexity_client import PerplexityClient
+    from rate_limit import get_rate_limiter
+    sources = []
+    client = PerplexityClient("benchmark", on_event=lambda event: sources.append(event.get("source", "error")))
+    get_rate_limiter().set_rate(settings["rate_per_minute"], burst=settings["burst"])
+
+    def one(i):
+        started = time.perf_counter()
+        client.query_symptom(f"benchmark symptom {i}")
+        return time.perf_counter() - started
+
+    time.sleep(max(0.0, settings["start_at"] - time.time()))
+    with ThreadPoolExecutor(max_workers=settings["threads"]) as pool:
+        latencies = list(pool.map(one, settings["indices"]))
+    return {"latencies": latencies, "sources": sources}
+
+def run(server, processes, shared_path, settings):
+    """Start `processes` app processes on the same workload and summarize them together"""
+    env = dict(os.environ, DR_HOME_API_URL=server.url, DR_HOME_PREFETCH="0")
+    env.pop("DR_HOME_CACHE_DB", None)
+    env.pop("DR_HOME_SHARED_STATE", None)
+    if shared_path:
+        env["DR_HOME_SHARED_STATE"] = shared_path
+    settings = dict(settings, start_at=time.time() + 2.0)  # leave time for every child to import the app
+    before = dict(server.stats)
+    children = [
+        subprocess.Popen([sys.executable, "-m", "benchmarks.processes", "--child", json.dumps(settings)],
+                         cwd=REPO_ROOT, env=env, stdout=subprocess.PIPE, text=True)
+        for _ in range(processes)
+    ]
+    results = [json.loads(child.communicate()[0].strip().splitlines()[-1]) for child in children]
+    sources = [source for result in results for source in result["sources"]]
+    return {
+        "requests": len(sources),
+        "api_calls": server.stats["requests"] - before["requests"],
+        "rate_limited": server.stats["rate_limited"] - before["rate_limited"],
+        "answered_from": {source: sources.count(source) for source in sorted(set(sources))},
+        **latency_summary([latency for result in results for latency in result["latencies"]])
+    }
+
+def main(argv=None):
+    """Entry point"""
+    parser = argparse.ArgumentParser(description="Compare per-process and shared state across app processes.")
+    parser.add_argument("--processes", type=int, default=4, help="app processes (default: 4)")
+    parser.add_argument("--threads", type=int, default=4, help="concurrent sessions per process (default: 4)")
+    parser.add_argument("--requests", type=int, default=50, help="requests per process (default: 50)")
+    parser.add_argument("--unique", type=int, default=25, help="distinct queries among them (default: 25)")
+    parser.add_argument("--rate-per-minute", type=float, default=600,
+                        help="client rate limit of each process (default: 600)")
+    parser.add_argument("--burst", type=int, default=10, help="rate-limit burst (default: 10)")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    add_settings_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(_child(json.loads(args.child))))
+        return 0
+
+    server = MockPerplexityServer(settings_from_args(args)).start()
+    settings = {"threads": args.threads, "indices": workload(args.requests, args.unique),
+                "rate_per_minute": args.rate_per_minute, "burst": args.burst}
+    shared_path = os.path.join(tempfile.mkdtemp(prefix="dr_home_shared_"), "shared.sqlite3")
+    report = {
+        "per_process": run(server, args.processes, None, settings),
+        "shared": run(server, args.processes, shared_path, settings)
+    }
+    server.stop()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    for mode, stats in report.items():
+        print(f"{mode:<12} " + "  ".join(f"{key} {value}" for key, value in stats.items()))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+# benchmarks/semantic_cache.py
+"""Offline hit-rate evaluation and lookup timing for the semantic cache"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+import numpy as np
+from config import SEMANTIC_CACHE_THRESHOLD
+from semantic_cache import SemanticCache, VectorIndex, embed
+
+# Each group: the query that was answered first, then paraphrases that should reuse its answer
+PARAPHRASE_GROUPS = [
+    ["severe headache", "bad headache", "headache, severe", "really bad headache", "terrible headache", "I have a severe headache"],
+    ["chest pain", "pain in my chest", "chest pains", "Chest Pain"],
+    ["sore throat", "throat is sore", "my throat is sore", "sore throats"],
+    ["shortness of breath", "short of breath", "feeling short of breath", "breath shortness"],
+    ["dizziness", "feeling dizzy", "dizzy", "I feel dizzy"],
+    ["stomach ache", "stomach aches", "ache in my stomach", "stomachache"],
+    ["nausea and vomiting", "vomiting and nausea", "nausea, vomiting"],
+    ["lower back pain", "pain in lower back", "lower back pains", "back pain, lower"],
+    ["joint pain", "joint pains", "pain in joints", "painful joints"],
+    ["fatigue", "feeling fatigued", "tiredness"],
+    ["runny nose", "nose is runny", "runny noses"],
+    ["blurred vision", "blurry vision", "vision blurred"],
+    ["heart palpitations", "palpitations", "heart palpitation"],
+    ["ankle swelling", "swollen ankles", "swelling in ankles"],
+    ["frequent urination", "urinating frequently", "urination frequent"],
+    ["skin rash", "rash on skin", "rash"],
+    ["knee pain", "pain in knee", "knee pains", "painful knee"],
+    ["cough with phlegm", "coughing up phlegm", "phlegm cough"],
+    ["numbness in hands", "hand numbness", "numb hands"],
+    ["high fever", "fever, high", "very high fever"]
+]
+
+# Related queries that must NOT be served another group's answer
+DISTRACTORS = [
+    "mild headache", "headache", "back pain", "upper back pain", "chest tightness", "neck pain",
+    "sore eyes", "throat swelling", "shortness of temper", "stomach cramps", "nausea", "vomiting blood",
+    "hip pain", "joint swelling", "muscle fatigue", "bloody nose", "double vision", "heart murmur",
+    "ankle pain", "painful urination", "skin itching", "knee swelling", "cough with blood",
+    "dry cough", "numbness in feet", "low fever", "fever in children"
+]
+
+# (answered query, its negation): neither may be served the other's answer, in either order
+NEGATED_PAIRS = [
+    ("headache vomiting", "headache no vomiting"),
+    ("abdominal pain diarrhea", "abdominal pain no diarrhea"),
+    ("chest pain shortness of breath", "chest pain without shortness of breath"),
+    ("fever with rash", "fever without rash"),
+    ("cough blood", "cough, not blood"),
+    ("patient has chest pain", "patient denies chest pain"),
+    ("dizziness when standing", "never dizzy when standing")
+]
+
+# (answered query, one that differs in side, count or character): must miss in either order
+QUALIFIER_PAIRS = [
+    ("pain in lower right abdomen", "pain in lower left abdomen"),
+    ("chest pain radiating to left arm", "chest pain radiating to right arm"),
+    ("dry cough", "wet cough"),
+    ("swelling in one leg", "swelling in both legs"),
+    ("sudden headache", "gradual headache"),
+    ("upper back pain", "lower back pain")
+]
+
+THRESHOLDS = (0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95)
+
+def evaluate(threshold):
+    """Return (paraphrase hit rate, wrong hits, probes) for a threshold on the labelled set"""
+    cache = SemanticCache(threshold=threshold)
+    for group_id, group in enumerate(PARAPHRASE_GROUPS):
+        cache.add("symptom", {"symptom": group[0]}, group_id)
+    hits = wrong = 0
+    paraphrases = 0
+    for group_id, group in enumerate(PARAPHRASE_GROUPS):
+        for query in group[1:]:
+            paraphrases += 1
+            match = cache.find("symptom", {"symptom": query})
+            if match is not None:
+                hits += match[0] == group_id
+                wrong += match[0] != group_id
+    for query in DISTRACTORS:
+        wrong += cache.find("symptom", {"symptom": query}) is not None
+    for pair in NEGATED_PAIRS + QUALIFIER_PAIRS:
+        for answered, query in (pair, pair[::-1]):
+            pair_cache = SemanticCache(threshold=threshold)
+            pair_cache.add("symptom", {"symptom": answered}, answered)
+            wrong += pair_cache.find("symptom", {"symptom": query}) is not None
+    return hits / paraphrases, wrong, paraphrases + len(DISTRACTORS) + 2 * len(NEGATED_PAIRS + QUALIFIER_PAIRS)
+
+def replay_history(db_path, threshold):
+    """Replay logged symptom queries in order: how many exact and near-duplicate repeats were there?"""
+    db = sqlite3.connect(db_path)
+    rows = db.execute("SELECT inputs FROM history WHERE kind = 'symptom' ORDER BY created_at").fetchall()
+    cache = SemanticCache(threshold=threshold)
+    seen = set()
+    exact = semantic = 0
+    samples = []
+    for (encoded,) in rows:
+        inputs = json.loads(encoded)
+        key = json.dumps(inputs, sort_keys=True)
+        if key in seen:
+            exact += 1
+            continue
+        match = cache.find("symptom", inputs)
+        if match is not None:
+            semantic += 1
+            samples.append((inputs["symptom"], match[0], match[1]))
+        else:
+            cache.add("symptom", inputs, inputs["symptom"])
+        seen.add(key)
+    return len(rows), exact, semantic, samples
+
+def time_lookups(size, ivf_min, runs=200, seed=0):
+    """Mean search time (µs) over an index of `size` synthetic queries"""
+    rng = np.random.default_rng(seed)
+    words = sorted({word for group in PARAPHRASE_GROUPS for query in group for word in query.lower().replace(",", "").split()})
+    queries = [" ".join(rng.choice(words, size=3)) for _ in range(size)]
+    index = VectorIndex(max_entries=size + 1, ivf_min=ivf_min)
+    for i, query in enumerate(queries):
+        index.add(embed(query), i)
+    probes = [embed(queries[i]) for i in rng.integers(0, size, runs)]
+    started = time.perf_counter()
+    for vector in probes:
+        index.search(vector)
+    return (time.perf_counter() - started) / runs * 1e6
+
+def main(argv=None):
+    """Entry point"""
+    parser = argparse.ArgumentParser(description="Evaluate semantic cache thresholds offline.")
+    parser.add_argument("--history", help="query history database to replay (see history_store.py)")
+    parser.add_argument("--threshold", type=float, help="threshold for the history replay (default: SEMANTIC_CACHE_THRESHOLD)")
+    parser.add_argument("--timing", type=int, default=20000, help="index size for lookup timing (default: 20000, 0 = skip)")
+    args = parser.parse_args(argv)
+
+    print(f"{'threshold':>9}  {'hit rate':>8}  {'wrong hits':>10}")
+    best = None
+    for threshold in THRESHOLDS:
+        hit_rate, wrong, probes = evaluate(threshold)
+        print(f"{threshold:>9.2f}  {hit_rate:>8.0%}  {wrong:>6}/{probes}")
+        if wrong == 0 and best is None:
+            best = threshold
+    print(f"lowest threshold without wrong hits: {best}")
+
+    if args.history:
+        threshold = args.threshold or SEMANTIC_CACHE_THRESHOLD
+        total, exact, semantic, samples = replay_history(args.history, threshold)
+        print(f"\n{total} logged symptom queries: {exact} exact repeats, {semantic} near-duplicates at {threshold}")
+        for query, matched, similarity in samples[:20]:
+            print(f"  {query!r} -> {matched!r} ({similarity:.2f})")
+
+    if args.timing:
+        exact_us = time_lookups(args.timing, ivf_min=args.timing + 1)
+        ivf_us = time_lookups(args.timing, ivf_min=1)
+        print(f"\nsearch over {args.timing:,} queries: exact {exact_us:.0f} µs, IVF {ivf_us:.0f} µs")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
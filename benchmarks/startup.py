@@ -0,0 +1,111 @@
+# benchmarks/startup.py
+"""Cold-start benchmark: module import time and first render of each page in fresh processes"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules whose presence after a render shows whether heavy or unused code was loaded
+WATCHED_MODULES = ["pandas", "numpy", "plotly", "requests", "perplexity_client", "prefetch",
+                   "pages.symptom_explorer", "pages.drug_interaction",
+                   "pages.medical_translator", "pages.health_resources"]
+
+# Scenario -> sidebar page to open after the first render (None = stay on the landing view)
+SCENARIOS = {
+    "import": None,
+    "welcome": None,
+    "Symptom Explorer": "🔍 Symptom Explorer",
+    "Drug Interaction Checker": "💊 Drug Interactions",
+    "Medical Translator": "🏥 Medical Translator",
+    "Health Resources": "📚 Health Resources"
+}
+
+def _measure(scenario):
+    """Run one scenario in this (fresh) process and return its timings"""
+    started = time.perf_counter()
+    if scenario == "import":
+        import main  # noqa: F401
+        timings = {"import_ms": (time.perf_counter() - started) * 1000}
+    else:
+        from streamlit.testing.v1 import AppTest
+        app = AppTest.from_file(os.path.join(REPO_ROOT, "main.py"), default_timeout=60)
+        if scenario != "welcome":
+            app.session_state["perplexity_api_key"] = "benchmark"
+        app.run()
+        timings = {"first_render_ms": (time.perf_counter() - started) * 1000}
+        page = SCENARIOS[scenario]
+        if page and page != SCENARIOS["Symptom Explorer"]:
+            started = time.perf_counter()
+            app.sidebar.selectbox[0].select(page).run()
+            timings["page_render_ms"] = (time.perf_counter() - started) * 1000
+        if app.exception:
+            timings["exception"] = app.exception[0].value
+    timings["loaded"] = [name for name in WATCHED_MODULES if name in sys.modules]
+    return timings
+
+def run_scenario(scenario, runs):
+    """Run a scenario in `runs` fresh interpreters and return the per-run timings"""
+    env = dict(os.environ, DR_HOME_PREFETCH="0")  # no background API traffic while timing
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.startup", "--child", scenario],
+            cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return samples
+
+def summarize(samples, field):
+    """Return median/min/max of a timing field across runs"""
+    values = [sample[field] for sample in samples if field in sample]
+    if not values:
+        return None
+    return {"median": statistics.median(values), "min": min(values), "max": max(values)}
+
+def main(argv=None):
+    """Entry point"""
+    parser = argparse.ArgumentParser(description="Measure cold import and first-render time of the app.")
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per scenario (default: 5)")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS),
+                        help="scenario to run (repeatable; default: all)")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(_measure(args.child)))
+        return 0
+
+    report = {}
+    for scenario in args.scenario or list(SCENARIOS):
+        samples = run_scenario(scenario, args.runs)
+        report[scenario] = {
+            field: summarize(samples, field) for field in ("import_ms", "first_render_ms", "page_render_ms")
+            if summarize(samples, field)
+        }
+        report[scenario]["loaded"] = samples[-1]["loaded"]
+        if "exception" in samples[-1]:
+            report[scenario]["exception"] = samples[-1]["exception"]
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    for scenario, result in report.items():
+        timings = ", ".join(
+            f"{field} {stats['median']:.0f} (min {stats['min']:.0f}, max {stats['max']:.0f})"
+            for field, stats in result.items() if isinstance(stats, dict)
+        )
+        print(f"{scenario:<26} {timings}")
+        print(f"{'':<26} loaded: {', '.join(result['loaded']) or '-'}")
+        if "exception" in result:
+            print(f"{'':<26} exception: {result['exception']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+# cache.py
+"""Response cache for Perplexity API results"""
+
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from config import (
+    RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_DB_PATH,
+    RESPONSE_CACHE_DB_MAX_ROWS, RESPONSE_CACHE_PRUNE_INTERVAL
+)
+from shared_state import connect
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def _normalize(value):
+    """Collapse whitespace in strings so indentation changes don't alter keys"""
+    if isinstance(value, str):
+        return _WHITESPACE_RE.sub(" ", value).strip()
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+def make_cache_key(payload):
+    """Return a content hash of the normalized request payload"""
+    canonical = json.dumps(_normalize(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """Two-tier (memory + optional SQLite) TTL cache with byte-size LRU eviction
+
+    The disk tier is best effort: when SQLite fails (e.g. another process holds the lock past
+    the busy timeout) a read counts as a miss and a write is logged and skipped.
+    """
+
+    def __init__(self, max_bytes=RESPONSE_CACHE_MAX_BYTES, ttl=RESPONSE_CACHE_TTL, db_path=None,
+                 max_rows=RESPONSE_CACHE_DB_MAX_ROWS, prune_interval=RESPONSE_CACHE_PRUNE_INTERVAL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.db_path = db_path
+        self.max_rows = max_rows
+        self.prune_interval = prune_interval
+        self._next_prune = time.time() + prune_interval
+        self._entries = OrderedDict()  # key -> (expires_at, encoded value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self._db = None
+        if db_path:
+            # WAL + busy timeout so several app processes can share one disk tier
+            self._db = connect(db_path)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at)")
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, encoded = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(encoded)
+                self._remove(key)
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row and row[1] <= now:
+                        self._db.execute("DELETE FROM responses WHERE key = ? AND expires_at <= ?", (key, now))
+                except sqlite3.Error as e:
+                    logger.warning("Response cache read failed: %s", e)
+                    row = None
+                if row and row[1] > now:
+                    encoded = bytes(row[0])
+                    self._store(key, encoded, row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return json.loads(encoded)
+
+            self.misses += 1
+            return None
+
+    def set(self, key, value, ttl=None):
+        """Store a JSON-serializable value under key"""
+        encoded = json.dumps(value, separators=(",", ":")).encode("utf-8")
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._store(key, encoded, expires_at)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                        (key, encoded, expires_at)
+                    )
+                    if time.time() >= self._next_prune:
+                        self._prune()
+                except sqlite3.Error as e:
+                    logger.warning("Response cache write skipped: %s", e)
+
+    def __contains__(self, key):
+        """Check for a live entry without touching hit/miss counters or LRU order"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                return True
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT 1 FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    logger.warning("Response cache read failed: %s", e)
+                    return False
+                return row is not None
+            return False
+
+    def clear(self):
+        """Drop every entry from both tiers"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+
+    def stats(self):
+        """Return hit/miss counters and current memory usage"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes
+            }
+
+    def _prune(self):
+        """Delete expired disk rows, then the soonest-expiring ones beyond max_rows"""
+        now = time.time()
+        self._next_prune = now + self.prune_interval
+        self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        excess = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_rows
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY expires_at LIMIT ?)",
+                (excess,)
+            )
+
+    def _store(self, key, encoded, expires_at):
+        """Insert into the memory tier and evict LRU entries over the byte budget"""
+        if key in self._entries:
+            self._remove(key)
+        if len(encoded) > self.max_bytes:
+            return
+        self._entries[key] = (expires_at, encoded)
+        self._bytes += len(encoded)
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key):
+        """Remove a key from the memory tier"""
+        _, encoded = self._entries.pop(key)
+        self._bytes -= len(encoded)
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+def configure_response_cache(db_path=RESPONSE_CACHE_DB_PATH, max_bytes=RESPONSE_CACHE_MAX_BYTES, ttl=RESPONSE_CACHE_TTL):
+    """Replace the process-wide response cache, e.g. to point a batch job at a disk tier"""
+    global _response_cache
+    with _response_cache_lock:
+        _response_cache = ResponseCache(max_bytes=max_bytes, ttl=ttl, db_path=db_path)
+    return _response_cache
+
+def get_response_cache():
+    """Return the process-wide response cache shared by all sessions"""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache(db_path=RESPONSE_CACHE_DB_PATH)
+    return _response_cache
@@ -1,10 +1,121 @@
 # config.py
 """Configuration settings for Dr. Home application"""
 
+import os
+
 # Perplexity API Configuration
-PERPLEXITY_API_URL = "https://api.perplexity.ai/chat/completions"
+PERPLEXITY_API_URL = os.environ.get(
+    "DR_HOME_API_URL", "https://api.perplexity.ai/chat/completions"
+)   # override to point at a local stand-in (see benchmarks/mock_server.py)
 PERPLEXITY_MODEL = "llama-3.1-sonar-large-128k-online"
 
+# HTTP Connection Pool (shared by all PerplexityService instances in the process)
+HTTP_POOL_SIZE = 20          # max keep-alive connections kept open to the API host
+HTTP_CONNECT_TIMEOUT = 5     # seconds to establish a connection
+HTTP_READ_TIMEOUT = 60       # seconds to wait for response data
+ASYNC_MAX_CONCURRENCY = 8    # in-flight requests per AsyncPerplexityClient fan-out
+
+# Shared State (app processes on one host share the cache, single-flight leases and rate limit)
+SHARED_STATE_DB_PATH = os.environ.get("DR_HOME_SHARED_STATE")  # e.g. "/var/lib/dr_home/shared.sqlite3"; unset = per-process
+SHARED_STATE_BUSY_TIMEOUT = 5   # seconds a process waits for another's write lock
+SHARED_LEASE_TTL = 120          # seconds before a leader's lease lapses and another process may call the API
+SHARED_POLL_INTERVAL = 0.05     # seconds between checks while another process fetches the same answer
+
+# Document Translation
+DOC_CHUNK_TOKENS = 600       # input budget per chunk; longer documents are split and translated in parallel
+
+# Output Token Budgets (max_tokens per query kind, adapted to observed answer lengths)
+OUTPUT_BUDGET_DEFAULTS = {           # used until OUTPUT_BUDGET_MIN_SAMPLES answers of a kind are seen
+    "query": 1536,
+    "symptom": 1536,
+    "drug_interactions": 1536,
+    "drug_pair": 768,
+    "medical_translation": 1536,
+    "document_translation": 2.0,     # scaled kinds: output/prompt token ratio
+    "document_chunk": 2.0
+}
+OUTPUT_BUDGET_SCALED_KINDS = ("document_translation", "document_chunk")   # answer length follows input length
+OUTPUT_BUDGET_STEPS = (256, 384, 512, 768, 1024, 1536, 2048, 3072, 4096)  # budgets snap up to these; last is the cap
+OUTPUT_BUDGET_PERCENTILE = 95        # of recent completion lengths (or ratios)
+OUTPUT_BUDGET_HEADROOM = 1.25        # multiplier on that percentile
+OUTPUT_BUDGET_MIN_SAMPLES = 20
+OUTPUT_BUDGET_WINDOW = 200           # recent answers remembered per kind
+
+# Client-side Rate Limiting and Retries (process-wide, shared by every session)
+RATE_LIMIT_REQUESTS_PER_MINUTE = 50   # sustained token-bucket refill rate
+RATE_LIMIT_BURST = 10                 # bucket capacity (requests allowed back-to-back)
+RATE_LIMIT_MAX_WAIT = 30              # seconds a request may queue for a token before failing
+RETRY_MAX_ATTEMPTS = 3                # retries after the first attempt
+RETRY_BASE_DELAY = 0.5                # seconds; doubled each attempt with full jitter
+RETRY_MAX_DELAY = 20                  # cap for backoff and Retry-After waits
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Response Cache (in-memory tier shared across sessions, optional SQLite tier on disk)
+RESPONSE_CACHE_TTL = 24 * 60 * 60               # seconds before a cached answer expires
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024     # memory budget for the LRU tier
+RESPONSE_CACHE_DB_PATH = (
+    os.environ.get("DR_HOME_CACHE_DB") or SHARED_STATE_DB_PATH
+)   # e.g. "cache.sqlite3"; unset = memory only (the shared-state file doubles as the disk tier)
+RESPONSE_CACHE_DB_MAX_ROWS = 100000             # disk tier cap; the soonest-expiring rows go first
+RESPONSE_CACHE_PRUNE_INTERVAL = 5 * 60          # seconds between sweeps of expired disk rows
+
+# Semantic Cache (paraphrased queries served from a cached near-duplicate; off unless enabled)
+SEMANTIC_CACHE_ENABLED = os.environ.get("DR_HOME_SEMANTIC_CACHE") == "1"
+SEMANTIC_CACHE_KINDS = {"symptom": "symptom"}    # query kind -> free-text input compared by similarity
+SEMANTIC_CACHE_THRESHOLD = float(os.environ.get("DR_HOME_SEMANTIC_THRESHOLD", "0.85"))  # cosine; see benchmarks.semantic_cache
+SEMANTIC_CACHE_DIM = 512                 # hashed n-gram vector width
+SEMANTIC_CACHE_MAX_ENTRIES = 20000       # per filter combination; the oldest half is dropped beyond this
+SEMANTIC_IVF_MIN_ENTRIES = 4096          # exact search below this size, clustered (IVF) search above
+SEMANTIC_IVF_PROBES = 4                  # clusters scanned per IVF search
+
+# Cache Warming (quick-pick inputs prefetched in the background at background priority)
+PREFETCH_ENABLED = os.environ.get("DR_HOME_PREFETCH", "1") != "0"   # set DR_HOME_PREFETCH=0 to disable
+PREFETCH_REFRESH_INTERVAL = 6 * 60 * 60   # seconds between re-warms; keep below RESPONSE_CACHE_TTL
+PREFETCH_WORKERS = 2                      # background threads issuing warm-up queries
+PREFETCH_MIN_PREFIX = 3                   # typed characters before a quick-pick term is prefetched
+PREFETCH_MIN_SPARE_TOKENS = 3             # speculative prefetches are dropped below this many rate-limit tokens
+
+# Most-clicked inputs, shown as quick picks on the pages and warmed by the prefetcher
+COMMON_MEDICAL_TERMS = ["Myocardial Infarction", "Pneumonia", "Hypertension", "Diabetes Mellitus", "Osteoarthritis"]
+
+EXAMPLE_DRUG_COMBINATIONS = [
+    {"drugs": ["Warfarin", "Aspirin"], "risk": "🔴 High", "effect": "Increased bleeding risk"},
+    {"drugs": ["ACE Inhibitors", "NSAIDs"], "risk": "🟡 Moderate", "effect": "Reduced kidney function"},
+    {"drugs": ["Statins", "Grapefruit"], "risk": "🟡 Moderate", "effect": "Increased statin levels"},
+    {"drugs": ["Calcium", "Iron"], "risk": "🟢 Minor", "effect": "Reduced iron absorption"}
+]
+
+# Bundled Reference Data
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DRUG_SYNONYMS_PATH = os.path.join(DATA_DIR, "drug_synonyms.json")
+DRUG_FUZZY_MIN_SIMILARITY = 0.4  # trigram Jaccard for a near-miss spelling to be offered as "Did you mean"
+DRUG_INTERACTIONS_PATH = os.path.join(DATA_DIR, "drug_interactions.csv")  # known pairs answered offline
+MEDICAL_GLOSSARY_PATH = os.path.join(DATA_DIR, "medical_glossary.json")   # lay definitions shown before any API call
+GLOSSARY_FUZZY_MIN_SIMILARITY = 0.5  # near misses are only suggested: a wrong definition is worse than asking the API
+
+# Query History (per-user, persistent, full-text searchable)
+HISTORY_DB_PATH = os.environ.get(
+    "DR_HOME_HISTORY_DB", os.path.join(os.path.expanduser("~"), ".dr_home", "history.sqlite3")
+)
+HISTORY_MAX_ENTRIES = 500   # per user; the oldest entries are pruned beyond this
+HISTORY_PAGE_SIZE = 20      # entries listed per search
+HISTORY_COOKIE_NAME = "dr_home_uid"          # browser cookie holding the visitor's history id
+HISTORY_COOKIE_MAX_AGE = 365 * 24 * 60 * 60  # seconds
+
+# Session State
+SESSION_RESULTS_MAX = 10   # answers kept per session so reruns redraw them without re-querying
+
+# Static Assets (Streamlit serves ./static at app/static when server.enableStaticServing is on)
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+STATIC_CSS_SERVING = os.environ.get("DR_HOME_STATIC_CSS") == "1"  # link the CSS file instead of inlining it
+
+# Metrics (Prometheus text format; both exporters are off unless configured)
+METRICS_PORT = int(os.environ.get("DR_HOME_METRICS_PORT", "0"))   # serve /metrics on 127.0.0.1:<port>; 0 = off
+METRICS_FILE = os.environ.get("DR_HOME_METRICS_FILE")               # e.g. a node_exporter textfile path; "{pid}" = process id
+METRICS_FILE_INTERVAL = 15                                          # seconds between metrics file rewrites
+METRICS_ADMIN_PANEL = os.environ.get("DR_HOME_ADMIN") == "1"        # show the 📈 Metrics page in the sidebar
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)   # histogram bounds, seconds
+
 # Streamlit Configuration
 PAGE_CONFIG = {
     "page_title": "Dr. Home - Health Information Platform",
@@ -0,0 +1,112 @@
+# document_pipeline.py
+"""Token-budgeted splitting and reassembly for long medical document translation"""
+
+import re
+import zlib
+from config import DOC_CHUNK_TOKENS
+from prompt_builder import estimate_tokens
+
+_BLANK_LINE_RE = re.compile(r"\n\s*\n")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+# Progressively finer (pattern, joiner) boundaries for text that is still over budget
+_SPLITTERS = ((_SENTENCE_END_RE, " "), (re.compile(r"\n"), "\n"), (re.compile(r"\s+"), " "))
+_HEADER_RE = re.compile(r"^\s*([A-Z][A-Z /&()-]{2,}|[A-Za-z][\w /&()-]{0,40}):\s*$")
+
+def _split_blocks(text):
+    """Split text into paragraph blocks, keeping standalone section headers with what follows"""
+    blocks = []
+    pending_header = None
+    for block in _BLANK_LINE_RE.split(text.strip()):
+        block = block.strip()
+        if not block:
+            continue
+        if pending_header:
+            block = f"{pending_header}\n{block}"
+            pending_header = None
+        if _HEADER_RE.match(block):
+            pending_header = block
+            continue
+        blocks.append(block)
+    if pending_header:
+        blocks.append(pending_header)
+    return blocks
+
+def _split_oversized(block, max_tokens, level=0):
+    """Break a block that exceeds the budget at sentence ends, then line breaks, then spaces"""
+    if level == len(_SPLITTERS):
+        size = max_tokens * 4  # a single over-long token: cut by characters
+        return [block[i:i + size] for i in range(0, len(block), size)]
+    pattern, joiner = _SPLITTERS[level]
+    pieces = []
+    current = ""
+    for part in pattern.split(block):
+        if not part:
+            continue
+        if estimate_tokens(part) > max_tokens:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.extend(_split_oversized(part, max_tokens, level + 1))
+            continue
+        candidate = f"{current}{joiner}{part}" if current else part
+        if current and estimate_tokens(candidate) > max_tokens:
+            pieces.append(current)
+            current = part
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+def _is_cut_point(piece):
+    """Content-defined boundary test, stable across processes and document edits"""
+    return zlib.crc32(piece.encode("utf-8")) % 2 == 0
+
+def split_document(text, max_tokens=DOC_CHUNK_TOKENS):
+    """Split a document into ordered chunks of whole sections/paragraphs within a token budget
+    
+    Once a chunk is half full it ends at a paragraph chosen by content hash rather than by
+    position, so an edit early in a report only shifts the chunks around it and the rest
+    keep their cache keys.
+    """
+    chunks = []
+    current = []
+    for block in _split_blocks(text):
+        pieces = [block] if estimate_tokens(block) <= max_tokens else _split_oversized(block, max_tokens)
+        for piece in pieces:
+            if current and estimate_tokens("\n\n".join(current + [piece])) > max_tokens:
+                chunks.append("\n\n".join(current))
+                current = []
+            current.append(piece)
+            current_tokens = estimate_tokens("\n\n".join(current))
+            if current_tokens >= max_tokens // 2 and _is_cut_point(piece):
+                chunks.append("\n\n".join(current))
+                current = []
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+def merge_chunk_results(results):
+    """Reassemble per-chunk responses (or per-chunk exceptions) in order into one response dict"""
+    errors = [result for result in results if isinstance(result, Exception)]
+    if results and len(errors) == len(results):
+        raise errors[0]
+    sections = []
+    citations = []
+    for result in results:
+        if isinstance(result, dict) and result.get('choices'):
+            sections.append(result['choices'][0]['message']['content'].strip())
+            for citation in result.get('citations', []):
+                if citation not in citations:
+                    citations.append(citation)
+        else:
+            sections.append("_This section could not be translated. Please try again._")
+    return {
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": "\n\n".join(sections)}
+        }],
+        "citations": citations,
+        "chunks": len(results),
+        "errors": [str(error) for error in errors]
+    }
@@ -0,0 +1,64 @@
+# drug_index.py
+"""Local brand/synonym to generic drug-name index with typo suggestions"""
+
+import json
+import threading
+from functools import lru_cache
+from text_index import PrefixIndex, TrigramIndex, normalize_term
+from config import DRUG_SYNONYMS_PATH, DRUG_FUZZY_MIN_SIMILARITY
+
+class DrugIndex:
+    """Resolves drug names to canonical generic names without any network access"""
+
+    def __init__(self, synonyms):
+        pairs = []
+        for generic, aliases in synonyms.items():
+            pairs.append((generic, generic))
+            pairs.extend((alias, generic) for alias in aliases)
+        self._names = PrefixIndex(pairs)
+        self._fuzzy = TrigramIndex(self._names.keys)
+        # Inputs repeat heavily (same meds across sessions), so memoize resolution
+        self.lookup = lru_cache(maxsize=4096)(self._lookup)
+
+    @classmethod
+    def from_file(cls, path=DRUG_SYNONYMS_PATH):
+        """Load the index from a JSON {generic: [aliases]} file"""
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def __len__(self):
+        return len(self._names)
+
+    def _lookup(self, name):
+        """Return the generic name for an exact generic, brand or synonym, or None if unknown
+
+        Near-miss spellings are never resolved here: look-alikes such as fluvastatin/lovastatin
+        are different drugs, so they are only offered by suggest() for the user to confirm.
+        """
+        return self._names.get(name)
+
+    def canonicalize(self, name):
+        """Return the generic name for a drug, falling back to the normalized input"""
+        return self.lookup(name) or normalize_term(name)
+
+    def suggest(self, prefix, limit=8):
+        """Return (matched name, generic name) pairs: autocompletions of a typed prefix, then near-miss spellings"""
+        suggestions = self._names.prefix(prefix, limit=limit)
+        for name, _ in self._fuzzy.nearest(prefix, limit=limit, min_similarity=DRUG_FUZZY_MIN_SIMILARITY):
+            if len(suggestions) >= limit:
+                break
+            if all(name != seen for seen, _ in suggestions):
+                suggestions.append((name, self._names.get(name)))
+        return suggestions
+
+_drug_index = None
+_drug_index_lock = threading.Lock()
+
+def get_drug_index():
+    """Return the process-wide drug index, loading the bundled dataset on first use"""
+    global _drug_index
+    if _drug_index is None:
+        with _drug_index_lock:
+            if _drug_index is None:
+                _drug_index = DrugIndex.from_file()
+    return _drug_index
@@ -0,0 +1,65 @@
+# glossary.py
+"""Local medical glossary with instant lay definitions and autocomplete"""
+
+import json
+import threading
+from collections import namedtuple
+from functools import lru_cache
+from text_index import PrefixIndex, TrigramIndex
+from config import MEDICAL_GLOSSARY_PATH, GLOSSARY_FUZZY_MIN_SIMILARITY
+
+GlossaryEntry = namedtuple("GlossaryEntry", ["term", "lay_term", "definition"])
+
+class Glossary:
+    """Resolves medical terms, abbreviations and common names to short lay definitions offline"""
+
+    def __init__(self, entries):
+        self._entries = {}
+        pairs = []
+        for term, entry in entries.items():
+            self._entries[term] = GlossaryEntry(term, entry["lay_term"], entry["definition"])
+            pairs.append((term, term))
+            pairs.extend((alias, term) for alias in entry.get("aliases", ()))
+        self._names = PrefixIndex(pairs)
+        self._fuzzy = TrigramIndex(self._names.keys)
+        self.lookup = lru_cache(maxsize=4096)(self._lookup)
+
+    @classmethod
+    def from_file(cls, path=MEDICAL_GLOSSARY_PATH):
+        """Load the glossary from a JSON {term: {lay_term, definition, aliases}} file"""
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _lookup(self, name):
+        """Return the entry for an exact term or alias, or None if unknown
+
+        Near misses are different terms as often as typos ("dysphasia" is not "dysphagia"),
+        so they are only offered by suggest().
+        """
+        return self._entries.get(self._names.get(name))
+
+    def suggest(self, prefix, limit=6):
+        """Return (matched name, entry) pairs for a typed prefix, then near-miss spellings, one per term"""
+        suggestions = {}
+        matches = self._names.prefix(prefix, limit=limit * 3) + [
+            (name, self._names.get(name))
+            for name, _ in self._fuzzy.nearest(prefix, limit=limit, min_similarity=GLOSSARY_FUZZY_MIN_SIMILARITY)
+        ]
+        for name, term in matches:
+            suggestions.setdefault(term, (name, self._entries[term]))
+        return list(suggestions.values())[:limit]
+
+_glossary = None
+_glossary_lock = threading.Lock()
+
+def get_glossary():
+    """Return the process-wide glossary, loading the bundled dataset on first use"""
+    global _glossary
+    if _glossary is None:
+        with _glossary_lock:
+            if _glossary is None:
+                _glossary = Glossary.from_file()
+    return _glossary
@@ -0,0 +1,160 @@
+# health_calculators.py
+"""NumPy-vectorized health calculators for single patients and whole rosters"""
+
+import csv
+import io
+import numpy as np
+
+# BMI bands: values below BMI_BAND_EDGES[0] fall in band 0, and so on
+BMI_BAND_EDGES = np.array([18.5, 25.0, 30.0])
+BMI_CATEGORIES = np.array(["Underweight", "Normal weight", "Overweight", "Obese"])
+BMI_EMOJIS = np.array(["📉", "✅", "⚠️", "🚨"])
+BMI_ALERT_LEVELS = np.array(["info", "success", "warning", "error"])  # st.info/success/... per band
+
+# Heart rate training zones as percentages of maximum heart rate
+HEART_RATE_ZONES = [
+    {"name": "Zone 1: Active Recovery", "range": (50, 60), "color": "#4caf50", "description": "Light activity, warm-up"},
+    {"name": "Zone 2: Base Endurance", "range": (60, 70), "color": "#2196f3", "description": "Aerobic base building"},
+    {"name": "Zone 3: Aerobic", "range": (70, 80), "color": "#ff9800", "description": "Moderate intensity"},
+    {"name": "Zone 4: Threshold", "range": (80, 90), "color": "#f44336", "description": "Hard intensity"},
+    {"name": "Zone 5: Neuromuscular", "range": (90, 95), "color": "#9c27b0", "description": "Maximum effort"}
+]
+_ZONE_PERCENTS = np.array([zone["range"] for zone in HEART_RATE_ZONES], dtype=float)
+
+# Activity levels shared by the calorie and hydration calculators, with their multipliers
+ACTIVITY_LEVELS = np.array(["sedentary", "light", "moderate", "active", "very active"])
+CALORIE_MULTIPLIERS = np.array([1.2, 1.375, 1.55, 1.725, 1.9])
+HYDRATION_MULTIPLIERS = np.array([1.0, 1.2, 1.4, 1.6, 1.6])
+_ACTIVITY_ALIASES = {"lightly active": "light", "moderately active": "moderate"}
+
+# Mifflin-St Jeor sex constant
+_SEX_OFFSETS = {"male": 5.0, "m": 5.0, "female": -161.0, "f": -161.0}
+
+LBS_TO_KG = 0.453592
+IN_TO_CM = 2.54
+OZ_TO_LITERS = 0.0295735
+
+ROSTER_COLUMNS = ("age", "sex", "height_in", "weight_lbs")
+
+def _labels_to_index(values, normalize, table, kind):
+    """Map an array of labels to table indices, normalizing each distinct label once"""
+    labels, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    index = {name: i for i, name in enumerate(table)}
+    try:
+        codes = np.array([index[normalize(label)] for label in labels], dtype=np.intp)
+    except KeyError as e:
+        raise ValueError(f"Unknown {kind}: {e.args[0]!r}") from None
+    return codes[inverse].reshape(np.shape(values))
+
+def _normalize_activity(label):
+    """'Sedentary (little/no exercise)' / 'Lightly Active' -> 'sedentary' / 'light'"""
+    label = label.split("(")[0].strip().lower()
+    return _ACTIVITY_ALIASES.get(label, label)
+
+def activity_index(levels):
+    """Return the ACTIVITY_LEVELS index for each activity label"""
+    return _labels_to_index(levels, _normalize_activity, list(ACTIVITY_LEVELS), "activity level")
+
+def bmi(height_in, weight_lbs):
+    """Body mass index from height in inches and weight in pounds"""
+    height_in = np.asarray(height_in, dtype=float)
+    return 703.0 * np.asarray(weight_lbs, dtype=float) / (height_in * height_in)
+
+def bmi_band(bmi_values):
+    """Return the BMI_CATEGORIES index for each BMI (bands are closed on the left)"""
+    return np.digitize(bmi_values, BMI_BAND_EDGES)
+
+def max_heart_rate(age):
+    """Age-predicted maximum heart rate (220 - age)"""
+    return 220 - np.asarray(age, dtype=float)
+
+def heart_rate_zones(max_hr):
+    """Return whole-bpm (lower, upper) bounds per zone, shaped (..., zones, 2)"""
+    max_hr = np.asarray(max_hr, dtype=float)[..., None, None]
+    return np.trunc(max_hr * _ZONE_PERCENTS / 100).astype(int)
+
+def water_needs_oz(weight_lbs, activity):
+    """Daily water intake in ounces: half the body weight, scaled by activity level"""
+    return np.asarray(weight_lbs, dtype=float) / 2 * HYDRATION_MULTIPLIERS[activity_index(activity)]
+
+def bmr_mifflin_st_jeor(sex, age, weight_lbs, height_in):
+    """Basal metabolic rate in kcal/day by the Mifflin-St Jeor equation"""
+    offsets = np.array(list(_SEX_OFFSETS.values()))
+    offset = offsets[_labels_to_index(sex, lambda label: label.strip().lower(), list(_SEX_OFFSETS), "sex")]
+    weight_kg = np.asarray(weight_lbs, dtype=float) * LBS_TO_KG
+    height_cm = np.asarray(height_in, dtype=float) * IN_TO_CM
+    return 10 * weight_kg + 6.25 * height_cm - 5 * np.asarray(age, dtype=float) + offset
+
+def daily_calories(bmr, activity):
+    """Total daily energy expenditure from BMR and activity level"""
+    return np.asarray(bmr, dtype=float) * CALORIE_MULTIPLIERS[activity_index(activity)]
+
+def screen_roster(roster):
+    """Compute every calculator for a roster in one pass
+
+    `roster` is anything indexable by column name (a DataFrame, a dict of arrays or the output
+    of read_roster_csv) with ROSTER_COLUMNS and an optional `activity` column (default
+    sedentary). Returns a dict of result columns.
+    """
+    missing = [column for column in ROSTER_COLUMNS if column not in roster]
+    if missing:
+        raise ValueError(f"Roster is missing columns: {', '.join(missing)}")
+    age = np.asarray(roster["age"], dtype=float)
+    height_in = np.asarray(roster["height_in"], dtype=float)
+    weight_lbs = np.asarray(roster["weight_lbs"], dtype=float)
+    activity = roster["activity"] if "activity" in roster else np.full(len(age), "sedentary")
+
+    bmi_values = bmi(height_in, weight_lbs)
+    max_hr = max_heart_rate(age)
+    bmr = bmr_mifflin_st_jeor(roster["sex"], age, weight_lbs, height_in)
+    results = {"id": np.asarray(roster["id"]) if "id" in roster else np.arange(1, len(age) + 1)}
+    results.update({
+        "bmi": np.round(bmi_values, 1),
+        "bmi_category": BMI_CATEGORIES[bmi_band(bmi_values)],
+        "max_heart_rate": max_hr.astype(int),
+        "water_oz": np.round(water_needs_oz(weight_lbs, activity)),
+        "bmr": np.round(bmr),
+        "daily_calories": np.round(daily_calories(bmr, activity))
+    })
+    return results
+
+def read_roster_csv(source):
+    """Read a roster CSV (path, text or binary file) into a dict of column arrays"""
+    if isinstance(source, str):
+        with open(source, encoding="utf-8", newline="") as f:
+            return read_roster_csv(f)
+    data = source.read()
+    if isinstance(data, bytes):  # e.g. a Streamlit UploadedFile
+        data = data.decode("utf-8-sig")
+    reader = csv.reader(io.StringIO(data))
+    header = next(reader, None)
+    if not header:
+        raise ValueError("empty roster")
+    header = [name.strip().lower() for name in header]
+    rows = []
+    for row in reader:
+        if not row:
+            continue
+        if len(row) != len(header):
+            raise ValueError(f"row {reader.line_num} has {len(row)} fields, expected {len(header)}")
+        rows.append(row)
+    if not rows:
+        raise ValueError("roster has no patient rows")
+    columns = {}
+    for i, name in enumerate(header):
+        column = np.array([row[i] for row in rows])
+        if name != "id":
+            try:
+                column = column.astype(float)
+            except ValueError:
+                pass
+        columns[name] = column
+    return columns
+
+def roster_to_csv(results):
+    """Serialize screen_roster output as CSV text"""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(results.keys())
+    writer.writerows(zip(*(column.tolist() for column in results.values())))
+    return out.getvalue()
@@ -0,0 +1,160 @@
+# history_store.py
+"""Persistent per-user query history with SQLite FTS5 full-text search"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from cache import make_cache_key
+from config import HISTORY_DB_PATH, HISTORY_MAX_ENTRIES, HISTORY_PAGE_SIZE
+
+_SEARCH_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+def history_key(kind, inputs):
+    """Normalized key for a query, so repeating it updates one history entry"""
+    return make_cache_key({"kind": kind, "inputs": inputs})
+
+def summarize_inputs(kind, inputs):
+    """One-line label for a history entry"""
+    if "drugs" in inputs:
+        return " + ".join(inputs["drugs"])
+    if "symptom" in inputs:
+        filters = [inputs.get(field) for field in ("age_group", "severity", "duration")]
+        filters = [value for value in filters if value and not value.startswith(("All", "Any"))]
+        return f"{inputs['symptom']} ({', '.join(filters)})" if filters else inputs["symptom"]
+    if "medical_term" in inputs:
+        return inputs["medical_term"]
+    text = " ".join(str(value) for value in inputs.values())
+    return text if len(text) <= 80 else text[:77] + "..."
+
+def _match_expression(text):
+    """Turn free text into an FTS5 query of quoted prefix terms (no operator injection)"""
+    return " ".join(f'"{token}"*' for token in _SEARCH_TOKEN_RE.findall(text))
+
+class HistoryStore:
+    """Query history in a local SQLite database, searchable by inputs and answer text"""
+
+    def __init__(self, db_path=HISTORY_DB_PATH, max_entries=HISTORY_MAX_ENTRIES):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS history ("
+            "id INTEGER PRIMARY KEY, user_id TEXT NOT NULL, kind TEXT NOT NULL, "
+            "query_key TEXT NOT NULL, inputs TEXT NOT NULL, response TEXT NOT NULL, "
+            "created_at REAL NOT NULL, UNIQUE (user_id, query_key));"
+            "CREATE INDEX IF NOT EXISTS history_user_time ON history (user_id, created_at);"
+            "CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5("
+            "summary, answer, tokenize = 'porter unicode61');"
+        )
+        self._db.commit()
+
+    def record(self, user_id, kind, inputs, response):
+        """Add a query and its response, or refresh the existing entry for the same query"""
+        key = history_key(kind, inputs)
+        answer = response['choices'][0]['message']['content'] if response.get('choices') else ""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id FROM history WHERE user_id = ? AND query_key = ?", (user_id, key)
+            ).fetchone()
+            if row:
+                entry_id = row[0]
+                self._db.execute(
+                    "UPDATE history SET response = ?, created_at = ? WHERE id = ?",
+                    (json.dumps(response), now, entry_id)
+                )
+                self._db.execute("DELETE FROM history_fts WHERE rowid = ?", (entry_id,))
+            else:
+                entry_id = self._db.execute(
+                    "INSERT INTO history (user_id, kind, query_key, inputs, response, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (user_id, kind, key, json.dumps(inputs), json.dumps(response), now)
+                ).lastrowid
+            self._db.execute(
+                "INSERT INTO history_fts (rowid, summary, answer) VALUES (?, ?, ?)",
+                (entry_id, summarize_inputs(kind, inputs), answer)
+            )
+            self._prune(user_id)
+            self._db.commit()
+        return entry_id
+
+    def _prune(self, user_id):
+        """Drop a user's oldest entries beyond max_entries"""
+        stale = [row[0] for row in self._db.execute(
+            "SELECT id FROM history WHERE user_id = ? ORDER BY created_at DESC LIMIT -1 OFFSET ?",
+            (user_id, self.max_entries)
+        )]
+        for entry_id in stale:
+            self._db.execute("DELETE FROM history WHERE id = ?", (entry_id,))
+            self._db.execute("DELETE FROM history_fts WHERE rowid = ?", (entry_id,))
+
+    def search(self, user_id, text="", kind=None, limit=HISTORY_PAGE_SIZE):
+        """Return a user's entries matching text (best match first), or the most recent ones"""
+        expression = _match_expression(text)
+        kind_filter = " AND h.kind = ?" if kind else ""
+        params = [user_id] + ([kind] if kind else [])
+        with self._lock:
+            if expression:
+                rows = self._db.execute(
+                    "SELECT h.id, h.kind, h.inputs, h.created_at, "
+                    "snippet(history_fts, 1, '**', '**', '…', 16) "
+                    "FROM history_fts JOIN history h ON h.id = history_fts.rowid "
+                    f"WHERE history_fts MATCH ? AND h.user_id = ?{kind_filter} "
+                    "ORDER BY rank LIMIT ?",
+                    [expression] + params + [limit]
+                ).fetchall()
+            else:
+                rows = self._db.execute(
+                    "SELECT h.id, h.kind, h.inputs, h.created_at, NULL FROM history h "
+                    f"WHERE h.user_id = ?{kind_filter} ORDER BY h.created_at DESC LIMIT ?",
+                    params + [limit]
+                ).fetchall()
+        return [
+            {"id": entry_id, "kind": entry_kind, "inputs": json.loads(inputs),
+             "created_at": created_at, "snippet": snippet}
+            for entry_id, entry_kind, inputs, created_at, snippet in rows
+        ]
+
+    def get(self, user_id, entry_id):
+        """Return one of a user's entries with its stored response, or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT kind, inputs, response, created_at FROM history WHERE id = ? AND user_id = ?",
+                (entry_id, user_id)
+            ).fetchone()
+        if row is None:
+            return None
+        kind, inputs, response, created_at = row
+        return {"id": entry_id, "kind": kind, "inputs": json.loads(inputs),
+                "response": json.loads(response), "created_at": created_at}
+
+    def clear(self, user_id):
+        """Delete all of a user's history"""
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM history_fts WHERE rowid IN (SELECT id FROM history WHERE user_id = ?)", (user_id,)
+            )
+            self._db.execute("DELETE FROM history WHERE user_id = ?", (user_id,))
+            self._db.commit()
+
+    def count(self, user_id):
+        """Return the number of entries a user has"""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM history WHERE user_id = ?", (user_id,)).fetchone()[0]
+
+_history_store = None
+_history_store_lock = threading.Lock()
+
+def get_history_store():
+    """Return the process-wide history store, creating its database on first use"""
+    global _history_store
+    if _history_store is None:
+        with _history_store_lock:
+            if _history_store is None:
+                os.makedirs(os.path.dirname(os.path.abspath(HISTORY_DB_PATH)), exist_ok=True)
+                _history_store = HistoryStore()
+    return _history_store
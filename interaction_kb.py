@@ -0,0 +1,99 @@
+# interaction_kb.py
+"""Offline drug-interaction table with a pair-indexed fast path for known combinations"""
+
+import csv
+import threading
+from collections import namedtuple
+import numpy as np
+from config import DRUG_INTERACTIONS_PATH
+
+KnownInteraction = namedtuple("KnownInteraction", ["drugs", "severity", "effect", "mechanism", "management"])
+
+KB_SEVERITIES = ("Major", "Moderate", "Minor")
+
+class InteractionKB:
+    """Known interactions keyed by canonical drug pair, looked up by binary search
+
+    Each drug gets a small integer id; a pair becomes one uint64 key (lower id in the
+    high 32 bits), so a whole regimen resolves with a single vectorized searchsorted
+    over the sorted key array instead of one API call per pair.
+    """
+
+    def __init__(self, rows):
+        names = sorted({name for row in rows for name in row[:2]})
+        self._ids = {name: drug_id for drug_id, name in enumerate(names)}
+        records = {}
+        for drug_a, drug_b, severity, effect, mechanism, management in rows:
+            if severity not in KB_SEVERITIES:
+                raise ValueError(f"Unknown severity {severity!r} for {drug_a} + {drug_b}")
+            drugs = tuple(sorted((drug_a, drug_b)))
+            records[self._key(*drugs)] = KnownInteraction(drugs, severity, effect, mechanism, management)
+        self._keys = np.array(sorted(records), dtype=np.uint64)
+        self._records = [records[int(key)] for key in self._keys]
+
+    @classmethod
+    def from_file(cls, path=DRUG_INTERACTIONS_PATH):
+        """Load the table from a CSV with drug_a, drug_b, severity, effect, mechanism, management columns"""
+        with open(path, encoding="utf-8", newline="") as f:
+            return cls([
+                (row["drug_a"], row["drug_b"], row["severity"], row["effect"], row["mechanism"], row["management"])
+                for row in csv.DictReader(f)
+            ])
+
+    def __len__(self):
+        return len(self._records)
+
+    @property
+    def drugs(self):
+        """Canonical names of every drug in the table, sorted"""
+        return sorted(self._ids)
+
+    def _key(self, drug_a, drug_b):
+        """Pair key for two canonical names, or None when either drug isn't in the table"""
+        id_a, id_b = self._ids.get(drug_a), self._ids.get(drug_b)
+        if id_a is None or id_b is None or id_a == id_b:
+            return None
+        low, high = sorted((id_a, id_b))
+        return (low << 32) | high
+
+    def lookup(self, drug_a, drug_b):
+        """The known interaction for a pair of canonical names, or None"""
+        return self.lookup_pairs([(drug_a, drug_b)])[0]
+
+    def lookup_pairs(self, pairs):
+        """Known interactions for canonical name pairs, aligned with the input (None = not in the table)"""
+        found = [None] * len(pairs)
+        if not pairs or not len(self._keys):
+            return found
+        ids = np.fromiter((self._ids.get(drug, -1) for pair in pairs for drug in pair), dtype=np.int64, count=2 * len(pairs))
+        ids = ids.reshape(-1, 2)
+        low, high = ids.min(axis=1), ids.max(axis=1)
+        known = np.flatnonzero((low >= 0) & (low != high))
+        keys = (low[known].astype(np.uint64) << np.uint64(32)) | high[known].astype(np.uint64)
+        slots = np.minimum(np.searchsorted(self._keys, keys), len(self._keys) - 1)
+        hits = self._keys[slots] == keys
+        for position, slot in zip(known[hits].tolist(), slots[hits].tolist()):
+            found[position] = self._records[slot]
+        return found
+
+def interaction_answer(record):
+    """A known interaction as a pairwise answer (same "Severity:" first line as the API is asked for)"""
+    return (
+        f"Severity: {record.severity}\n\n"
+        f"**Clinical effects**: {record.effect}\n\n"
+        f"**Mechanism**: {record.mechanism}\n\n"
+        f"**Management**: {record.management}\n\n"
+        f"_From Dr. Home's offline interaction table._"
+    )
+
+_interaction_kb = None
+_interaction_kb_lock = threading.Lock()
+
+def get_interaction_kb():
+    """Return the process-wide interaction table, loading the bundled dataset on first use"""
+    global _interaction_kb
+    if _interaction_kb is None:
+        with _interaction_kb_lock:
+            if _interaction_kb is None:
+                _interaction_kb = InteractionKB.from_file()
+    return _interaction_kb
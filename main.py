@@ -2,13 +2,24 @@
 """Enhanced Dr. Home application entry point"""
 
 import streamlit as st
-from config import PAGE_CONFIG
-from styles import get_custom_css
+from config import PAGE_CONFIG, PREFETCH_ENABLED, METRICS_ADMIN_PANEL
+from metrics import get_metrics, start_exporters
+from static_assets import css_tag, html_fragment
 from utils import (
     show_disclaimer, setup_api_key, show_api_key_warning, 
-    show_session_stats, create_feature_showcase, show_quick_stats
+    show_session_stats, create_feature_showcase, show_quick_stats, get_user_id
 )
-from pages import symptom_explorer, drug_interaction_checker, medical_translator, health_resources
+import pages
+
+# Sidebar page name -> page function in the pages package (imported on first visit)
+PAGE_ROUTES = {
+    "Symptom Explorer": "symptom_explorer",
+    "Drug Interaction Checker": "drug_interaction_checker",
+    "Medical Translator": "medical_translator",
+    "Health Resources": "health_resources",
+    "Query History": "query_history",
+    "Metrics": "metrics_dashboard"
+}
 
 def setup_page_config():
     """Configure Streamlit page settings"""
@@ -16,13 +27,13 @@ def setup_page_config():
 
 def render_header():
     """Render the enhanced main application header"""
-    st.markdown("""
+    st.markdown(html_fragment("""
     <div class="main-header fade-in">
         <h1>🏥 Dr. Home</h1>
         <p>Your AI-Powered Health Information Platform</p>
         <p><small>✨ Powered by Perplexity AI • 🔬 Evidence-based • 🏆 Trusted Sources</small></p>
     </div>
-    """, unsafe_allow_html=True)
+    """), unsafe_allow_html=True)
 
 def setup_sidebar():
     """Setup enhanced sidebar navigation and configuration"""
@@ -30,20 +41,23 @@ def setup_sidebar():
     api_key = setup_api_key()
     
     # Navigation with enhanced styling
-    st.sidebar.markdown("""
+    st.sidebar.markdown(html_fragment("""
     <div style="background: linear-gradient(135deg, #28a745 0%, #20c997 100%); 
                 padding: 1rem; border-radius: 12px; margin: 1rem 0; color: white; text-align: center;">
         <h3 style="margin: 0; color: white;">🧭 Navigation</h3>
     </div>
-    """, unsafe_allow_html=True)
+    """), unsafe_allow_html=True)
     
     # Enhanced page selection with icons
     page_options = {
         "🔍 Symptom Explorer": "Symptom Explorer",
         "💊 Drug Interactions": "Drug Interaction Checker", 
         "🏥 Medical Translator": "Medical Translator",
-        "📚 Health Resources": "Health Resources"
+        "📚 Health Resources": "Health Resources",
+        "🕘 Query History": "Query History"
     }
+    if METRICS_ADMIN_PANEL:
+        page_options["📈 Metrics"] = "Metrics"
     
     selected_page = st.sidebar.selectbox(
         "Choose a feature:",
@@ -58,7 +72,7 @@ def setup_sidebar():
     
     # Additional sidebar enhancements
     st.sidebar.markdown("---")
-    st.sidebar.markdown("""
+    st.sidebar.markdown(html_fragment("""
     <div style="background: linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%); 
                 padding: 1rem; border-radius: 12px; text-align: center;">
         <h4 style="margin: 0; color: #495057;">💡 Quick Tip</h4>
@@ -66,20 +80,22 @@ def setup_sidebar():
             Always consult healthcare professionals for medical advice. This platform is for educational purposes only.
         </p>
     </div>
-    """, unsafe_allow_html=True)
+    """), unsafe_allow_html=True)
     
     return api_key, page
 
 def route_to_page(page):
-    """Route to the appropriate page based on selection"""
-    if page == "Symptom Explorer":
-        symptom_explorer()
-    elif page == "Drug Interaction Checker":
-        drug_interaction_checker()
-    elif page == "Medical Translator":
-        medical_translator()
-    elif page == "Health Resources":
-        health_resources()
+    """Route to the appropriate page based on selection, importing only that page"""
+    if page in PAGE_ROUTES:
+        with get_metrics().timer("page_render_seconds", page=PAGE_ROUTES[page]):
+            getattr(pages, PAGE_ROUTES[page])()
+
+def start_prefetch():
+    """Start background cache warming with the server's key; imported here so it stays off the first-render path"""
+    if not PREFETCH_ENABLED:
+        return
+    from prefetch import get_prefetcher
+    get_prefetcher().start()
 
 def show_welcome_content():
     """Show enhanced welcome content when no API key is configured"""
@@ -94,7 +110,7 @@ def show_welcome_content():
     st.markdown("<br>", unsafe_allow_html=True)
     
     # Enhanced call-to-action
-    st.markdown("""
+    st.markdown(html_fragment("""
     <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
                 padding: 2rem; border-radius: 20px; text-align: center; color: white; margin: 2rem 0;">
         <h2 style="margin: 0 0 1rem 0; color: white;">🚀 Ready to Get Started?</h2>
@@ -102,15 +118,18 @@ def show_welcome_content():
             Configure your API key in the sidebar and unlock the full power of Dr. Home!
         </p>
     </div>
-    """, unsafe_allow_html=True)
+    """), unsafe_allow_html=True)
 
 def main():
     """Enhanced main application function"""
     # Setup page configuration
     setup_page_config()
     
-    # Apply custom CSS
-    st.markdown(get_custom_css(), unsafe_allow_html=True)
+    # Identify the visitor for their query history
+    get_user_id()
+    
+    # Apply custom CSS (minified once per process; a cached static file when static serving is on)
+    st.markdown(css_tag(), unsafe_allow_html=True)
     
     # Render header
     render_header()
@@ -125,13 +144,18 @@ def main():
     if not api_key:
         show_api_key_warning()
         show_welcome_content()
-        return
-    
-    # Add a success message for configured API
-    st.success("🎉 **Dr. Home is ready!** Your API key is configured and all features are unlocked.")
-    
-    # Route to appropriate page
-    route_to_page(page)
+    else:
+        # Add a success message for configured API
+        st.success("🎉 **Dr. Home is ready!** Your API key is configured and all features are unlocked.")
+        
+        # Route to appropriate page
+        route_to_page(page)
+    
+    # Warm the quick-pick cache once the page is drawn (server's PERPLEXITY_API_KEY only)
+    start_prefetch()
+    
+    # Serve /metrics and/or write the metrics file when configured (once per process)
+    start_exporters()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
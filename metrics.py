@@ -0,0 +1,253 @@
+# metrics.py
+"""In-process metrics (counters, gauges, histograms) with Prometheus text export"""
+
+import bisect
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config import LATENCY_BUCKETS, METRICS_PORT, METRICS_FILE, METRICS_FILE_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# Metric name -> (type, help text); only metrics listed here are exported
+METRICS = {
+    "perplexity_connect_seconds": ("histogram", "Time to open a new connection to the API, TLS included"),
+    "perplexity_connections_opened_total": ("counter", "New connections opened to the API"),
+    "perplexity_ttfb_seconds": ("histogram", "Time from sending a request to receiving response headers"),
+    "perplexity_query_seconds": ("histogram", "End-to-end query latency by kind and answer source"),
+    "perplexity_queries_total": ("counter", "Completed queries by kind and answer source"),
+    "perplexity_query_errors_total": ("counter", "Failed queries by kind and HTTP status"),
+    "perplexity_retries_total": ("counter", "Retried API attempts by kind and reason"),
+    "perplexity_tokens_total": ("counter", "Tokens reported in API usage, by kind and token type"),
+    "interaction_kb_pairs_total": ("counter", "Drug pairs looked up in the offline interaction table, by hit or miss"),
+    "page_render_seconds": ("histogram", "Time to render a page"),
+    "response_cache_hit_ratio": ("gauge", "Response cache hits / lookups"),
+    "response_cache_entries": ("gauge", "Entries in the in-memory response cache"),
+    "response_cache_bytes": ("gauge", "Bytes held by the in-memory response cache"),
+    "response_cache_evictions_total": ("counter", "Entries evicted from the in-memory response cache"),
+    "single_flight_coalesced_total": ("counter", "Requests served by an identical in-flight call"),
+    "shared_flight_coalesced_total": ("counter", "Requests answered by another app process's identical call"),
+    "semantic_cache_entries": ("gauge", "Queries indexed for near-duplicate lookups"),
+    "rate_limiter_tokens": ("gauge", "Tokens currently available in the shared rate limiter")
+}
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimate a quantile by linear interpolation inside the containing bucket"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+def _label_text(labels):
+    """Render a sorted label tuple as {a="x",b="y"}"""
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+def _series_key(name, labels):
+    """(name, sorted label tuple) with every label value a string, so series always sort"""
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+class MetricsRegistry:
+    """Thread-safe store of labelled counters, gauges and histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}       # (name, labels) -> float for counters and gauges
+        self._histograms = {}   # (name, labels) -> Histogram
+        self._collectors = []
+
+    def inc(self, name, amount=1, **labels):
+        key = _series_key(name, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._values[_series_key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        key = _series_key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the duration of a with-block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def register_collector(self, collector):
+        """Add a callable(registry) that refreshes gauges just before each export"""
+        self._collectors.append(collector)
+
+    def collect(self):
+        """Run collectors and return (values, histograms) copies"""
+        for collector in self._collectors:
+            collector(self)
+        with self._lock:
+            histograms = {}
+            for key, histogram in self._histograms.items():
+                copy = Histogram(histogram.buckets)
+                copy.counts, copy.sum, copy.count = list(histogram.counts), histogram.sum, histogram.count
+                histograms[key] = copy
+            return dict(self._values), histograms
+
+    def render_prometheus(self):
+        """Return all metrics in the Prometheus text exposition format"""
+        values, histograms = self.collect()
+        lines = []
+        for name, (metric_type, help_text) in METRICS.items():
+            series = sorted((labels, value) for (metric, labels), value in values.items() if metric == name)
+            hists = sorted((labels, h) for (metric, labels), h in histograms.items() if metric == name)
+            if not series and not hists:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in series:
+                lines.append(f"{name}{_label_text(labels)} {value}")
+            for labels, histogram in hists:
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_label_text(labels + (('le', bound),))} {cumulative}")
+                lines.append(f"{name}_sum{_label_text(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{_label_text(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def record_query_event(self, event):
+        """Fold a client on_event payload into the query metrics"""
+        kind = event["kind"]
+        if event["event"] == "query_complete":
+            source = event.get("source", "api")
+            self.observe("perplexity_query_seconds", event["elapsed"], kind=kind, source=source)
+            self.inc("perplexity_queries_total", kind=kind, source=source)
+            usage = (event.get("result") or {}).get("usage") or {}
+            if source == "api":
+                for token_type in ("prompt_tokens", "completion_tokens"):
+                    if usage.get(token_type):
+                        self.inc("perplexity_tokens_total", usage[token_type], kind=kind, type=token_type)
+        else:
+            status = getattr(event.get("error"), "status_code", None)
+            self.inc("perplexity_query_errors_total", kind=kind, status=str(status) if status else "none")
+
+def _collect_shared_state(registry):
+    """Refresh gauges from the shared cache, single-flight registry and rate limiter"""
+    from cache import get_response_cache
+    from rate_limit import get_rate_limiter
+    from semantic_cache import get_semantic_cache
+    from singleflight import get_single_flight, get_shared_leases
+    cache_stats = get_response_cache().stats()
+    registry.set("response_cache_hit_ratio", round(cache_stats["hit_ratio"], 4))
+    registry.set("response_cache_entries", cache_stats["entries"])
+    registry.set("response_cache_bytes", cache_stats["bytes"])
+    registry.set("response_cache_evictions_total", cache_stats["evictions"])
+    registry.set("single_flight_coalesced_total", get_single_flight().stats()["coalesced"])
+    leases = get_shared_leases()
+    if leases is not None:
+        registry.set("shared_flight_coalesced_total", leases.coalesced)
+    semantic = get_semantic_cache()
+    if semantic is not None:
+        registry.set("semantic_cache_entries", semantic.stats()["entries"])
+    try:
+        registry.set("rate_limiter_tokens", round(get_rate_limiter().stats()["tokens"], 2))
+    except sqlite3.Error:
+        pass  # shared limiter busy; keep the last exported value
+
+_metrics = MetricsRegistry()
+_metrics.register_collector(_collect_shared_state)
+
+def get_metrics():
+    """Return the process-wide metrics registry"""
+    return _metrics
+
+def write_prometheus_file(path):
+    """Atomically write the current metrics to a file (e.g. for node_exporter's textfile collector)"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(get_metrics().render_prometheus())
+    os.replace(temp_path, path)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Serves GET /metrics"""
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = get_metrics().render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+def start_exporters(port=METRICS_PORT, path=METRICS_FILE, interval=METRICS_FILE_INTERVAL):
+    """Start the configured /metrics endpoint and/or file writer once per process
+
+    With several app processes, give each its own port, or put "{pid}" in the file path
+    (e.g. dr_home_{pid}.prom); a port another process already serves is skipped with a warning.
+    """
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+    if port:
+        try:
+            server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+        except OSError as e:
+            logger.warning("Metrics endpoint not started on port %s: %s", port, e)
+        else:
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    if path:
+        path = path.replace("{pid}", str(os.getpid()))
+        def write_periodically():
+            while True:
+                try:
+                    write_prometheus_file(path)
+                except Exception:
+                    logger.exception("Metrics file %s not written", path)
+                time.sleep(interval)
+        threading.Thread(target=write_periodically, name="metrics-file", daemon=True).start()
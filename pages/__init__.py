@@ -1,15 +1,24 @@
-import sys
-import os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from .symptom_explorer import symptom_explorer
-from .drug_interaction import drug_interaction_checker
-from .medical_translator import medical_translator
-from .health_resources import health_resources
-
-__all__ = [
-    'symptom_explorer',
-    'drug_interaction_checker',
-    'medical_translator',
-    'health_resources'
-]
\ No newline at end of file
+# pages/__init__.py
+"""Page modules, imported on first access so startup only pays for the page being shown"""
+
+import importlib
+
+# Page function -> submodule that defines it
+_PAGE_MODULES = {
+    'symptom_explorer': '.symptom_explorer',
+    'drug_interaction_checker': '.drug_interaction',
+    'medical_translator': '.medical_translator',
+    'health_resources': '.health_resources',
+    'query_history': '.query_history',
+    'metrics_dashboard': '.metrics_dashboard'
+}
+
+__all__ = list(_PAGE_MODULES)
+
+def __getattr__(name):
+    """Import a page's module the first time its function is requested (PEP 562)"""
+    if name not in _PAGE_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    page = getattr(importlib.import_module(_PAGE_MODULES[name], __name__), name)
+    globals()[name] = page
+    return page
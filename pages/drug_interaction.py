@@ -4,6 +4,12 @@
 import streamlit as st
 from api_service import PerplexityService
 from utils import show_loading_message, format_drug_list
+from drug_index import get_drug_index
+from text_index import normalize_term
+from config import EXAMPLE_DRUG_COMBINATIONS
+from prefetch import get_prefetcher
+from perplexity_client import SEVERITY_ICONS, canonicalize_drug_list
+from response_parser import parse_response, to_markdown
 
 def drug_interaction_checker():
     """Enhanced Drug Interaction Checker page"""
@@ -30,12 +36,14 @@ def drug_interaction_checker():
                 placeholder="e.g., warfarin, aspirin, metformin",
                 help="Enter the generic or brand name"
             )
+            _render_drug_name_hint(drug1)
         with col2:
             drug2 = st.text_input(
                 "Second medication:",
                 placeholder="e.g., ibuprofen, lisinopril, atorvastatin",
                 help="Enter the generic or brand name"
             )
+            _render_drug_name_hint(drug2)
         
         drugs_to_check = [drug1, drug2] if drug1 and drug2 else []
     
@@ -49,8 +57,20 @@ def drug_interaction_checker():
         
         if drug_list:
             drugs_to_check = format_drug_list(drug_list)
+            for drug in drugs_to_check:
+                _render_drug_name_hint(drug)
         else:
             drugs_to_check = []
+        
+        pairwise_mode = st.checkbox(
+            "🧩 Check each pair separately",
+            value=True,
+            help="Splits the list into drug pairs checked in parallel. Pairs you've already checked are reused, so adding one medication only checks the new pairs."
+        )
+    
+    # Start the pair check in the background while the user reviews the form
+    if pairwise_mode and len(drugs_to_check) == 2:
+        get_prefetcher().speculate_drug_pair(*drugs_to_check, st.session_state.get('perplexity_api_key'))
     
     # Enhanced check button
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -74,83 +94,102 @@ def drug_interaction_checker():
                 </div>
                 """, unsafe_allow_html=True)
     
+    # Brand names and synonyms of one drug count once ("Tylenol" + "acetaminophen" is one medication)
+    distinct_drugs = canonicalize_drug_list(drugs_to_check)
+    
     # Process interaction check
-    if check_button and drugs_to_check and len(drugs_to_check) >= 2 and st.session_state.get('perplexity_api_key'):
+    if check_button and len(distinct_drugs) >= 2 and st.session_state.get('perplexity_api_key'):
         api_service = PerplexityService(st.session_state.perplexity_api_key)
         
         with show_loading_message("💊 Analyzing drug interactions in medical databases..."):
-            result = api_service.query_drug_interactions(drugs_to_check)
+            if pairwise_mode:
+                stream = None
+                result = api_service.query_drug_interactions_pairwise(drugs_to_check)
+                started = result is not None
+            else:
+                stream = api_service.query_drug_interactions(drugs_to_check, stream=True)
+                started = stream.start()
+        
+        if started:
+            # Enhanced results display
+            st.markdown(f"""
+            <div class="drug-warning fade-in">
+                <h2>⚠️ Drug Interaction Analysis</h2>
+                <p><strong>Medications analyzed:</strong> {', '.join([drug.title() for drug in drugs_to_check])}</p>
+                <p><strong>Analysis date:</strong> {st.session_state.get('current_date', 'Today')}</p>
+            </div>
+            """, unsafe_allow_html=True)
             
-            if result and 'choices' in result:
-                content = result['choices'][0]['message']['content']
-                
-                # Enhanced results display
-                st.markdown(f"""
-                <div class="drug-warning fade-in">
-                    <h2>⚠️ Drug Interaction Analysis</h2>
-                    <p><strong>Medications analyzed:</strong> {', '.join([drug.title() for drug in drugs_to_check])}</p>
-                    <p><strong>Analysis date:</strong> {st.session_state.get('current_date', 'Today')}</p>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Display content
-                st.markdown("---")
-                st.markdown(content)
-                
-                # Enhanced safety warnings
-                st.markdown("""
-                <div class="emergency-card">
-                    <h3>🚨 Important Safety Information</h3>
-                    <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 1rem; margin-top: 1rem;">
-                        <div>
-                            <h4>⚠️ Before Making Changes:</h4>
-                            <ul>
-                                <li>Consult your doctor or pharmacist</li>
-                                <li>Never stop medications abruptly</li>
-                                <li>Discuss all supplements and OTC drugs</li>
-                                <li>Consider timing of medication doses</li>
-                            </ul>
-                        </div>
-                        <div>
-                            <h4>🚨 Seek Immediate Help If:</h4>
-                            <ul>
-                                <li>Severe allergic reactions occur</li>
-                                <li>Unusual bleeding or bruising</li>
-                                <li>Severe nausea or vomiting</li>
-                                <li>Difficulty breathing or swallowing</li>
-                            </ul>
-                        </div>
+            # Display content (pairwise reports arrive whole, single checks stream in)
+            st.markdown("---")
+            if stream is None:
+                report = parse_response("drug_interactions", result)
+                _render_severity_summary(report)
+                if result.get("offline_pairs"):
+                    st.caption(f"📚 {result['offline_pairs']} of {len(report.entries)} pairs answered instantly from the offline interaction table")
+                st.markdown(to_markdown(report))
+            else:
+                st.write_stream(stream)
+                _render_severity_summary(parse_response("drug_interactions", stream.result))
+            
+            # Enhanced safety warnings
+            st.markdown("""
+            <div class="emergency-card">
+                <h3>🚨 Important Safety Information</h3>
+                <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 1rem; margin-top: 1rem;">
+                    <div>
+                        <h4>⚠️ Before Making Changes:</h4>
+                        <ul>
+                            <li>Consult your doctor or pharmacist</li>
+                            <li>Never stop medications abruptly</li>
+                            <li>Discuss all supplements and OTC drugs</li>
+                            <li>Consider timing of medication doses</li>
+                        </ul>
+                    </div>
+                    <div>
+                        <h4>🚨 Seek Immediate Help If:</h4>
+                        <ul>
+                            <li>Severe allergic reactions occur</li>
+                            <li>Unusual bleeding or bruising</li>
+                            <li>Severe nausea or vomiting</li>
+                            <li>Difficulty breathing or swallowing</li>
+                        </ul>
                     </div>
                 </div>
-                """, unsafe_allow_html=True)
-                
-                # Additional resources
-                st.markdown("### 📞 **Professional Resources**")
-                col1, col2, col3 = st.columns(3)
-                
-                with col1:
-                    st.info("""
-                    **👨‍⚕️ Healthcare Providers**
-                    - Your prescribing doctor
-                    - Clinical pharmacist
-                    - Specialist consultants
-                    """)
-                
-                with col2:
-                    st.info("""
-                    **📞 Emergency Contacts**
-                    - Emergency: 911
-                    - Poison Control: 1-800-222-1222
-                    - Pharmacy consultation line
-                    """)
-                
-                with col3:
-                    st.info("""
-                    **🔍 Additional Tools**
-                    - Drug interaction databases
-                    - Medication management apps
-                    - Pharmacy consultation services
-                    """)
+            </div>
+            """, unsafe_allow_html=True)
+            
+            # Additional resources
+            st.markdown("### 📞 **Professional Resources**")
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                st.info("""
+                **👨‍⚕️ Healthcare Providers**
+                - Your prescribing doctor
+                - Clinical pharmacist
+                - Specialist consultants
+                """)
+            
+            with col2:
+                st.info("""
+                **📞 Emergency Contacts**
+                - Emergency: 911
+                - Poison Control: 1-800-222-1222
+                - Pharmacy consultation line
+                """)
+            
+            with col3:
+                st.info("""
+                **🔍 Additional Tools**
+                - Drug interaction databases
+                - Medication management apps
+                - Pharmacy consultation services
+                """)
+
+    elif check_button and len(drugs_to_check) >= 2 and len(distinct_drugs) == 1:
+        st.warning(f"📝 {', '.join(drugs_to_check)} are all the same medication ({distinct_drugs[0]}). "
+                   "Please enter at least two different medications to check for interactions.")
     
     elif check_button and len(drugs_to_check) < 2:
         st.warning("📝 Please enter at least two medications to check for interactions.")
@@ -197,17 +236,40 @@ def drug_interaction_checker():
         # Common interaction examples
         st.markdown("### 📚 **Common Interaction Examples**")
         
-        examples = [
-            {"drugs": "Warfarin + Aspirin", "risk": "🔴 High", "effect": "Increased bleeding risk"},
-            {"drugs": "ACE Inhibitors + NSAIDs", "risk": "🟡 Moderate", "effect": "Reduced kidney function"},
-            {"drugs": "Statins + Grapefruit", "risk": "🟡 Moderate", "effect": "Increased statin levels"},
-            {"drugs": "Calcium + Iron", "risk": "🟢 Minor", "effect": "Reduced iron absorption"}
-        ]
-        
-        for example in examples:
+        for example in EXAMPLE_DRUG_COMBINATIONS:
             st.markdown(f"""
             <div style="background: #f8f9fa; border-left: 4px solid #dee2e6; padding: 1rem; margin: 0.5rem 0; border-radius: 5px;">
-                <strong>{example['drugs']}</strong> - {example['risk']} Risk<br>
+                <strong>{' + '.join(example['drugs'])}</strong> - {example['risk']} Risk<br>
                 <small>{example['effect']}</small>
             </div>
-            """, unsafe_allow_html=True)
\ No newline at end of file
+            """, unsafe_allow_html=True)
+
+def _render_drug_name_hint(drug):
+    """Show how a typed medication name will be resolved, or autocomplete suggestions"""
+    if not drug or not drug.strip():
+        return
+    drug_index = get_drug_index()
+    generic = drug_index.lookup(drug)
+    if generic and generic != normalize_term(drug):
+        st.caption(f"➡️ **{drug.strip()}** will be checked as **{generic}**")
+    elif generic is None:
+        suggestions = drug_index.suggest(drug, limit=5)
+        if suggestions:
+            names = ", ".join(
+                name if name == generic_name else f"{name} ({generic_name})"
+                for name, generic_name in suggestions
+            )
+            st.caption(f"💡 Did you mean: {names}")
+        else:
+            st.caption(f"❔ **{drug.strip()}** isn't in the local drug list; it will be checked as typed")
+
+def _render_severity_summary(report):
+    """One line counting the parsed interactions by severity"""
+    if not report or not report.entries:
+        return
+    counts = {}
+    for entry in report.entries:
+        counts[entry.severity] = counts.get(entry.severity, 0) + 1
+    st.markdown(" · ".join(
+        f"{SEVERITY_ICONS.get(severity, '❔')} **{count} {severity}**" for severity, count in counts.items()
+    ))
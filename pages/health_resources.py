@@ -1,9 +1,11 @@
 # pages/health_resources.py
 """Enhanced Health Resources page functionality"""
 
+import numpy as np
 import streamlit as st
 from config import HEALTH_RESOURCES, EMERGENCY_CONTACTS
 from utils import calculate_bmi
+import health_calculators as calc
 
 def health_resources():
     """Enhanced Health Resources page"""
@@ -170,7 +172,7 @@ def _render_enhanced_health_calculators():
     
     calc_type = st.selectbox(
         "Choose a calculator:",
-        ["📊 BMI Calculator", "❤️ Heart Rate Zones", "💧 Hydration Calculator", "🍎 Calorie Needs"],
+        ["📊 BMI Calculator", "❤️ Heart Rate Zones", "💧 Hydration Calculator", "🍎 Calorie Needs", "📋 Roster Screening"],
         help="Select a health calculator to use"
     )
     
@@ -182,6 +184,8 @@ def _render_enhanced_health_calculators():
         _render_hydration_calculator()
     elif calc_type == "🍎 Calorie Needs":
         _render_calorie_calculator()
+    elif calc_type == "📋 Roster Screening":
+        _render_roster_screening()
 
 def _render_enhanced_bmi_calculator():
     """Render enhanced BMI calculator"""
@@ -243,7 +247,7 @@ def _render_enhanced_heart_rate_calculator():
     
     with col2:
         if st.button("Calculate Heart Rate Zones", type="primary", use_container_width=True):
-            max_hr = 220 - age
+            max_hr = int(calc.max_heart_rate(age))
             
             st.markdown(f"""
             <div class="metric-card">
@@ -255,18 +259,7 @@ def _render_enhanced_heart_rate_calculator():
     if 'max_hr' in locals():
         st.markdown("#### 🎯 **Training Zones**")
         
-        zones = [
-            {"name": "Zone 1: Active Recovery", "range": (50, 60), "color": "#4caf50", "description": "Light activity, warm-up"},
-            {"name": "Zone 2: Base Endurance", "range": (60, 70), "color": "#2196f3", "description": "Aerobic base building"},
-            {"name": "Zone 3: Aerobic", "range": (70, 80), "color": "#ff9800", "description": "Moderate intensity"},
-            {"name": "Zone 4: Threshold", "range": (80, 90), "color": "#f44336", "description": "Hard intensity"},
-            {"name": "Zone 5: Neuromuscular", "range": (90, 95), "color": "#9c27b0", "description": "Maximum effort"}
-        ]
-        
-        for zone in zones:
-            lower = int(max_hr * zone['range'][0] / 100)
-            upper = int(max_hr * zone['range'][1] / 100)
-            
+        for zone, (lower, upper) in zip(calc.HEART_RATE_ZONES, calc.heart_rate_zones(max_hr)):
             st.markdown(f"""
             <div style="border-left: 4px solid {zone['color']}; padding: 1rem; margin: 0.5rem 0; background: #f8f9fa; border-radius: 5px;">
                 <strong>{zone['name']}</strong><br>
@@ -289,15 +282,11 @@ def _render_hydration_calculator():
     
     with col2:
         if st.button("Calculate Water Needs", type="primary", use_container_width=True):
-            # Basic calculation: weight in lbs / 2 = ounces of water
-            base_water = weight_lbs / 2
-            
-            # Adjust for activity level
-            multipliers = {"Sedentary": 1.0, "Lightly Active": 1.2, "Moderately Active": 1.4, "Very Active": 1.6}
-            total_water = base_water * multipliers[activity_level]
+            # Weight in lbs / 2 = ounces of water, adjusted for activity level
+            total_water = float(calc.water_needs_oz(weight_lbs, activity_level))
             
             cups = total_water / 8  # 8 oz per cup
-            liters = total_water * 0.0295735  # Convert oz to liters
+            liters = total_water * calc.OZ_TO_LITERS
             
             st.markdown(f"""
             <div class="metric-card">
@@ -332,26 +321,9 @@ def _render_calorie_calculator():
         ])
         
         if st.button("Calculate Calorie Needs", type="primary", use_container_width=True):
-            # Convert to metric
-            weight_kg = weight_lbs * 0.453592
-            height_cm = height_in * 2.54
-            
-            # Mifflin-St Jeor Equation
-            if gender == "Male":
-                bmr = 10 * weight_kg + 6.25 * height_cm - 5 * age + 5
-            else:
-                bmr = 10 * weight_kg + 6.25 * height_cm - 5 * age - 161
-            
-            # Activity multipliers
-            activity_multipliers = {
-                "Sedentary (little/no exercise)": 1.2,
-                "Light (light exercise 1-3 days/week)": 1.375,
-                "Moderate (moderate exercise 3-5 days/week)": 1.55,
-                "Active (hard exercise 6-7 days/week)": 1.725,
-                "Very Active (very hard exercise, physical job)": 1.9
-            }
-            
-            total_calories = bmr * activity_multipliers[activity]
+            # Mifflin-St Jeor Equation, scaled by activity level
+            bmr = float(calc.bmr_mifflin_st_jeor(gender, age, weight_lbs, height_in))
+            total_calories = float(calc.daily_calories(bmr, activity))
             
             st.markdown(f"""
             <div class="metric-card">
@@ -376,4 +348,39 @@ def _render_calorie_calculator():
                 </div>
                 """, unsafe_allow_html=True)
             
-            st.caption("⚠️ Consult with a healthcare provider or registered dietitian for personalized nutrition advice.")
\ No newline at end of file
+            st.caption("⚠️ Consult with a healthcare provider or registered dietitian for personalized nutrition advice.")
+
+def _render_roster_screening():
+    """Render bulk screening of a patient roster CSV"""
+    st.markdown("#### 📋 **Roster Screening**")
+    st.markdown("Upload a CSV of patients to compute BMI, heart rate, hydration and calorie figures for everyone at once.")
+    st.caption(
+        f"Required columns: {', '.join(calc.ROSTER_COLUMNS)}. Optional: id, activity "
+        f"({', '.join(calc.ACTIVITY_LEVELS)}; defaults to sedentary)."
+    )
+    
+    roster_file = st.file_uploader("Roster CSV:", type=["csv"])
+    if roster_file is None:
+        return
+    
+    try:
+        results = calc.screen_roster(calc.read_roster_csv(roster_file))
+    except ValueError as e:
+        st.error(f"Could not screen roster: {str(e)}")
+        return
+    
+    # Headcount per BMI band
+    categories, counts = np.unique(results["bmi_category"], return_counts=True)
+    cols = st.columns(len(calc.BMI_CATEGORIES))
+    for col, category in zip(cols, calc.BMI_CATEGORIES):
+        with col:
+            st.metric(category, int(counts[categories == category].sum()))
+    
+    st.dataframe(results, use_container_width=True)
+    st.download_button(
+        "⬇️ Download results (CSV)",
+        calc.roster_to_csv(results),
+        file_name="roster_screening.csv",
+        mime="text/csv"
+    )
+    st.caption("⚠️ Screening figures are estimates. Consult healthcare providers for clinical assessment.")
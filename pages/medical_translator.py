@@ -4,6 +4,11 @@
 import streamlit as st
 from api_service import PerplexityService
 from utils import show_loading_message
+from config import DOC_CHUNK_TOKENS, COMMON_MEDICAL_TERMS
+from prompt_builder import estimate_tokens
+from prefetch import get_prefetcher
+from response_parser import parse_response, answer_text
+from glossary import get_glossary
 
 def medical_translator():
     """Enhanced Medical Translator page"""
@@ -41,64 +46,120 @@ def _render_enhanced_term_lookup_tab():
     with col2:
         translate_button = st.button("🔍 Translate", type="primary", key="translate_term", use_container_width=True)
     
-    # Common terms quick access
+    typed_term = medical_term  # the buttons below may replace medical_term for this run
+    
+    # Warm the answer for any quick pick the typed prefix is heading towards
+    if medical_term:
+        get_prefetcher().speculate_term(medical_term, st.session_state.get('perplexity_api_key'))
+    
+    # Autocomplete from the local glossary while the typed term isn't one it knows
+    glossary = get_glossary()
+    suggestions = glossary.suggest(medical_term) if medical_term and glossary.lookup(medical_term) is None else []
+    if suggestions:
+        st.markdown("**🔤 Did you mean:**")
+        
+        cols = st.columns(len(suggestions))
+        for i, (name, entry) in enumerate(suggestions):
+            with cols[i]:
+                if st.button(name, key=f"suggest_term_{i}", use_container_width=True):
+                    medical_term = entry.term
+                    translate_button = True
+    
+    # Common terms quick access (answers are prefetched in the background)
     st.markdown("**💡 Quick Examples:**")
-    common_terms = ["Myocardial Infarction", "Pneumonia", "Hypertension", "Diabetes Mellitus", "Osteoarthritis"]
     
-    cols = st.columns(len(common_terms))
-    for i, term in enumerate(common_terms):
+    cols = st.columns(len(COMMON_MEDICAL_TERMS))
+    for i, term in enumerate(COMMON_MEDICAL_TERMS):
         with cols[i]:
             if st.button(term, key=f"quick_term_{i}", use_container_width=True):
                 st.session_state.selected_term = term
                 medical_term = term
+                translate_button = True
+    
+    # Glossary terms are defined instantly and offline, as soon as they're entered; the API
+    # is only asked for unknown terms or when the user wants the full explanation
+    entry = glossary.lookup(medical_term) if medical_term else None
+    # The card is kept as (typed input, term to query, glossary term) and dropped as soon as the
+    # input changes; the full explanation asks about the term as entered, not the glossary headword
+    if translate_button and medical_term or entry is not None:
+        st.session_state.glossary_term = (typed_term, medical_term, entry.term) if entry else None
+    elif st.session_state.get('glossary_term') and st.session_state.glossary_term[0] != typed_term:
+        st.session_state.glossary_term = None
+    explain = bool(translate_button and medical_term and entry is None)
+    
+    glossary_card = st.session_state.get('glossary_term')
+    if glossary_card and _render_glossary_entry(glossary.lookup(glossary_card[2])):
+        medical_term, explain = glossary_card[1], True
     
     # Process translation
-    if translate_button and medical_term and st.session_state.get('perplexity_api_key'):
+    if explain and medical_term and st.session_state.get('perplexity_api_key'):
         api_service = PerplexityService(st.session_state.perplexity_api_key)
         
         with show_loading_message("🔍 Looking up medical term and preparing patient-friendly explanation..."):
-            result = api_service.query_medical_translation(medical_term)
+            stream = api_service.query_medical_translation(medical_term, stream=True)
+            started = stream.start()
+        
+        if started:
+            # Enhanced results display
+            st.markdown(f"""
+            <div class="info-card fade-in">
+                <h2>📖 Translation for: {medical_term.title()}</h2>
+                <p style="color: #6c757d; margin: 0;">Patient-friendly explanation from trusted medical sources</p>
+            </div>
+            """, unsafe_allow_html=True)
             
-            if result and 'choices' in result:
-                content = result['choices'][0]['message']['content']
-                
-                # Enhanced results display
-                st.markdown(f"""
-                <div class="info-card fade-in">
-                    <h2>📖 Translation for: {medical_term.title()}</h2>
-                    <p style="color: #6c757d; margin: 0;">Patient-friendly explanation from trusted medical sources</p>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                st.markdown("---")
-                st.markdown(content)
-                
-                # Additional helpful information
-                st.markdown("### 🔗 **Additional Resources**")
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.info("""
-                    **📚 Learn More:**
-                    - Ask your healthcare provider
-                    - Request printed materials
-                    - Join patient education classes
-                    """)
-                
-                with col2:
-                    st.info("""
-                    **💬 Questions to Ask:**
-                    - What does this mean for me?
-                    - What are my treatment options?
-                    - What should I expect?
-                    """)
-    
-    elif translate_button and medical_term and not st.session_state.get('perplexity_api_key'):
+            st.markdown("---")
+            st.write_stream(stream)
+            
+            # Key fields parsed out of the answer, for a quick recap
+            term = parse_response("medical_translation", stream.result)
+            if term and (term.lay_term or term.pronunciation):
+                recap = [f"**Also called:** {term.lay_term}" if term.lay_term else "",
+                         f"**Say it:** {term.pronunciation}" if term.pronunciation else ""]
+                st.info("  \n".join(line for line in recap if line))
+            
+            # Additional helpful information
+            st.markdown("### 🔗 **Additional Resources**")
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.info("""
+                **📚 Learn More:**
+                - Ask your healthcare provider
+                - Request printed materials
+                - Join patient education classes
+                """)
+            
+            with col2:
+                st.info("""
+                **💬 Questions to Ask:**
+                - What does this mean for me?
+                - What are my treatment options?
+                - What should I expect?
+                """)
+
+    elif explain and medical_term and not st.session_state.get('perplexity_api_key'):
         st.error("🔑 Please configure your Perplexity API key in the sidebar first.")
     
     elif translate_button and not medical_term:
         st.warning("📝 Please enter a medical term to translate.")
 
+def _render_glossary_entry(entry):
+    """Show a glossary definition; returns True when the full explanation is requested"""
+    st.markdown(f"""
+    <div class="info-card fade-in">
+        <h2>📖 {entry.term.title()}</h2>
+        <p><strong>In plain words:</strong> {entry.lay_term}</p>
+        <p style="margin: 0;">{entry.definition}</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    return st.button(
+        "📚 Full explanation",
+        key="explain_term",
+        help="Causes, symptoms, treatment and sources from trusted medical references"
+    )
+
 def _render_enhanced_document_translation_tab():
     """Render the enhanced document translation tab"""
     st.markdown("### 📄 **Medical Document Translation**")
@@ -134,66 +195,74 @@ Enter your medical report, diagnosis, lab results, or any complex medical text..
         api_service = PerplexityService(st.session_state.perplexity_api_key)
         
         with show_loading_message("📄 Translating medical document into patient-friendly language..."):
-            result = api_service.query_document_translation(medical_text)
+            if estimate_tokens(medical_text) > DOC_CHUNK_TOKENS:
+                # Long reports are translated section by section in parallel
+                stream = None
+                result = api_service.query_document_translation_chunked(medical_text)
+                started = result is not None
+            else:
+                stream = api_service.query_document_translation(medical_text, stream=True)
+                started = stream.start()
+        
+        if started:
+            # Enhanced results display with before/after comparison
+            st.markdown("### 📋 **Translation Results**")
             
-            if result and 'choices' in result:
-                content = result['choices'][0]['message']['content']
-                
-                # Enhanced results display with before/after comparison
-                st.markdown("### 📋 **Translation Results**")
-                
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.markdown("""
-                    <div style="background: #fff3e0; border: 2px solid #ff9800; border-radius: 12px; padding: 1rem;">
-                        <h4 style="color: #e65100; margin-top: 0;">📄 Original Medical Text</h4>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    with st.expander("View Original Text", expanded=False):
-                        st.text(medical_text)
-                
-                with col2:
-                    st.markdown("""
-                    <div style="background: #e8f5e8; border: 2px solid #4caf50; border-radius: 12px; padding: 1rem;">
-                        <h4 style="color: #2e7d32; margin-top: 0;">✨ Patient-Friendly Translation</h4>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                # Display translated content
-                st.markdown("---")
-                st.markdown(content)
-                
-                # Additional guidance
-                st.markdown("### 💡 **Next Steps**")
-                
-                col1, col2, col3 = st.columns(3)
-                
-                with col1:
-                    st.info("""
-                    **📞 Discuss with Your Doctor:**
-                    - Ask about anything unclear
-                    - Request additional explanations
-                    - Discuss treatment options
-                    """)
-                
-                with col2:
-                    st.info("""
-                    **📝 Keep Records:**
-                    - Save both versions
-                    - Share with family if needed
-                    - Bring to appointments
-                    """)
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.markdown("""
+                <div style="background: #fff3e0; border: 2px solid #ff9800; border-radius: 12px; padding: 1rem;">
+                    <h4 style="color: #e65100; margin-top: 0;">📄 Original Medical Text</h4>
+                </div>
+                """, unsafe_allow_html=True)
                 
-                with col3:
-                    st.info("""
-                    **🔍 Research Further:**
-                    - Use trusted medical websites
-                    - Join patient support groups
-                    - Seek second opinions if needed
-                    """)
-    
+                with st.expander("View Original Text", expanded=False):
+                    st.text(medical_text)
+            
+            with col2:
+                st.markdown("""
+                <div style="background: #e8f5e8; border: 2px solid #4caf50; border-radius: 12px; padding: 1rem;">
+                    <h4 style="color: #2e7d32; margin-top: 0;">✨ Patient-Friendly Translation</h4>
+                </div>
+                """, unsafe_allow_html=True)
+            
+            # Display translated content (chunked translations arrive whole, short ones stream in)
+            st.markdown("---")
+            if stream is None:
+                st.markdown(answer_text(result))
+            else:
+                st.write_stream(stream)
+            
+            # Additional guidance
+            st.markdown("### 💡 **Next Steps**")
+            
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                st.info("""
+                **📞 Discuss with Your Doctor:**
+                - Ask about anything unclear
+                - Request additional explanations
+                - Discuss treatment options
+                """)
+            
+            with col2:
+                st.info("""
+                **📝 Keep Records:**
+                - Save both versions
+                - Share with family if needed
+                - Bring to appointments
+                """)
+            
+            with col3:
+                st.info("""
+                **🔍 Research Further:**
+                - Use trusted medical websites
+                - Join patient support groups
+                - Seek second opinions if needed
+                """)
+
     elif translate_doc_button and medical_text and not st.session_state.get('perplexity_api_key'):
         st.error("🔑 Please configure your Perplexity API key in the sidebar first.")
     
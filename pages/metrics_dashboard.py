@@ -0,0 +1,70 @@
+# pages/metrics_dashboard.py
+"""Metrics admin page functionality"""
+
+import streamlit as st
+from metrics import get_metrics
+
+# Histogram -> heading for the latency tables
+LATENCY_TABLES = {
+    "perplexity_query_seconds": "⏱️ Query latency (end to end)",
+    "perplexity_ttfb_seconds": "📨 Time to first byte (API)",
+    "perplexity_connect_seconds": "🔌 Connection setup (TCP + TLS)",
+    "page_render_seconds": "🖥️ Page render time"
+}
+
+def _total(values, name, **match):
+    """Sum a counter over every label set that matches the given labels"""
+    return sum(
+        value for (metric, labels), value in values.items()
+        if metric == name and all(dict(labels).get(key) == wanted for key, wanted in match.items())
+    )
+
+def _latency_rows(histograms, name):
+    """One table row per label set with the count and p50/p95/p99 in milliseconds"""
+    rows = []
+    for (metric, labels), histogram in sorted(histograms.items()):
+        if metric != name:
+            continue
+        row = dict(labels)
+        row["count"] = histogram.count
+        for q in (0.5, 0.95, 0.99):
+            row[f"p{int(q * 100)} (ms)"] = round(histogram.quantile(q) * 1000, 1)
+        rows.append(row)
+    return rows
+
+def metrics_dashboard():
+    """Metrics admin page"""
+    st.markdown("""
+    <div class="fade-in">
+        <h1>📈 Metrics</h1>
+        <p style="font-size: 1.1rem; color: #6c757d; margin-bottom: 2rem;">
+            Latency, cache and API usage for this server process since it started.
+        </p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    registry = get_metrics()
+    prometheus_text = registry.render_prometheus()
+    values, histograms = registry.collect()
+    
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        st.metric("Queries", int(_total(values, "perplexity_queries_total")))
+    with col2:
+        st.metric("Cache hit ratio", f"{values.get(('response_cache_hit_ratio', ()), 0):.0%}")
+    with col3:
+        st.metric("Errors", int(_total(values, "perplexity_query_errors_total")))
+    with col4:
+        st.metric("Retries", int(_total(values, "perplexity_retries_total")))
+    with col5:
+        st.metric("API tokens", f"{int(_total(values, 'perplexity_tokens_total')):,}")
+    
+    for name, heading in LATENCY_TABLES.items():
+        rows = _latency_rows(histograms, name)
+        if rows:
+            st.markdown(f"#### {heading}")
+            st.table(rows)
+    
+    with st.expander("Prometheus text format"):
+        st.code(prometheus_text, language="text")
+    st.download_button("⬇️ Download metrics", prometheus_text, file_name="dr_home_metrics.prom", mime="text/plain")
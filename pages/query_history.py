@@ -0,0 +1,119 @@
+# pages/query_history.py
+"""Query History page functionality"""
+
+import sqlite3
+import time
+from datetime import datetime
+import streamlit as st
+from history_store import get_history_store, summarize_inputs
+from response_parser import answer_text
+from utils import display_sources, get_user_id, forget_user_id
+
+# Query kind -> (icon, label) shown in the history list
+KIND_LABELS = {
+    "symptom": ("🔍", "Symptom"),
+    "drug_interactions": ("💊", "Drug Interactions"),
+    "medical_translation": ("🏥", "Medical Term"),
+    "document_translation": ("📄", "Document")
+}
+
+def query_history():
+    """Query History page"""
+    st.markdown("""
+    <div class="fade-in">
+        <h1>🕘 Query History</h1>
+        <p style="font-size: 1.1rem; color: #6c757d; margin-bottom: 2rem;">
+            Search and reopen your past answers instantly, without asking again.
+        </p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    try:
+        store = get_history_store()
+    except (sqlite3.Error, OSError) as e:
+        st.error(f"Query history is unavailable: {e}")
+        return
+    user_id = get_user_id()
+    
+    col1, col2 = st.columns([5, 1])
+    with col1:
+        st.warning("🔒 Your history is linked to this browser by a cookie, not to an account. "
+                   "Anyone using this browser can read it; on a shared computer, use **Forget me** when you're done.")
+    with col2:
+        if st.button("🚪 Forget me", help="Delete your saved answers and start a new, empty history",
+                     use_container_width=True):
+            store.clear(user_id)
+            st.session_state.history_entry = None
+            forget_user_id()
+            st.rerun()
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        search_text = st.text_input(
+            "Search your history:",
+            placeholder="e.g., headache, warfarin, hypertension...",
+            help="Matches your questions and the text of past answers"
+        )
+    with col2:
+        kind = st.selectbox(
+            "Type:",
+            [None] + list(KIND_LABELS),
+            format_func=lambda value: "All types" if value is None else " ".join(KIND_LABELS[value])
+        )
+    
+    started = time.perf_counter()
+    entries = store.search(user_id, search_text, kind=kind)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    
+    if not entries:
+        st.info("📭 No saved answers yet. Your questions and answers appear here after you ask them." if not search_text
+                else "🔎 Nothing in your history matches that search.")
+        return
+    
+    # The opened answer comes from the local store, so reopening never calls the API
+    if st.session_state.get("history_entry"):
+        _render_history_entry(store, user_id, st.session_state.history_entry)
+        st.markdown("---")
+    
+    st.caption(f"{len(entries)} of {store.count(user_id)} saved answers • searched in {elapsed_ms:.1f} ms")
+    
+    for entry in entries:
+        icon, label = KIND_LABELS.get(entry["kind"], ("📝", entry["kind"]))
+        asked = datetime.fromtimestamp(entry["created_at"]).strftime("%b %d, %Y %H:%M")
+        col1, col2 = st.columns([5, 1])
+        with col1:
+            st.markdown(f"{icon} **{summarize_inputs(entry['kind'], entry['inputs'])}** · {label} · {asked}")
+            if entry["snippet"]:
+                st.caption(entry["snippet"])
+        with col2:
+            st.button("Open", key=f"history_open_{entry['id']}", use_container_width=True,
+                      on_click=_open_history_entry, args=(entry["id"],))
+    
+    st.markdown("---")
+    if st.button("🗑️ Clear my history"):
+        store.clear(user_id)
+        st.session_state.history_entry = None
+        st.rerun()
+
+def _open_history_entry(entry_id):
+    """Button callback: select an entry before the page reruns"""
+    st.session_state.history_entry = entry_id
+
+def _render_history_entry(store, user_id, entry_id):
+    """Show a saved answer straight from the history store"""
+    entry = store.get(user_id, entry_id)
+    if entry is None:
+        return
+    
+    icon, label = KIND_LABELS.get(entry["kind"], ("📝", entry["kind"]))
+    st.markdown(f"""
+    <div class="info-card fade-in">
+        <h2>{icon} {summarize_inputs(entry['kind'], entry['inputs'])}</h2>
+        <p style="color: #6c757d; margin: 0;">{label} • saved {datetime.fromtimestamp(entry['created_at']).strftime("%b %d, %Y %H:%M")}</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    response = entry["response"]
+    if response.get('choices'):
+        st.markdown(answer_text(response))
+    display_sources(response)
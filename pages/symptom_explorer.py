@@ -4,6 +4,8 @@
 import streamlit as st
 from api_service import PerplexityService
 from utils import show_loading_message, display_sources
+from config import SESSION_RESULTS_MAX
+from response_parser import parse_response, to_markdown
 
 def symptom_explorer():
     """Enhanced Symptom Explorer page"""
@@ -16,113 +18,70 @@ def symptom_explorer():
     </div>
     """, unsafe_allow_html=True)
     
-    # Enhanced symptom input section
-    st.markdown("### 📝 **Enter Your Symptom**")
-    
-    col1, col2 = st.columns([4, 1])
-    with col1:
-        symptom = st.text_input(
-            "",
-            placeholder="e.g., headache, chest pain, fatigue, dizziness...",
-            help="Describe your symptom in simple terms"
-        )
-    with col2:
-        search_button = st.button("🔍 Explore", type="primary", use_container_width=True)
-    
-    # Enhanced advanced options
-    with st.expander("⚙️ **Advanced Search Options**", expanded=False):
-        col1, col2, col3 = st.columns(3)
+    _render_symptom_search()
+
+@st.fragment
+def _render_symptom_search():
+    """Search form and results, rerun on their own so searches don't redraw the rest of the app"""
+    # Inputs live in a form, so typing and changing options don't trigger reruns at all
+    with st.form("symptom_search", border=False):
+        # Enhanced symptom input section
+        st.markdown("### 📝 **Enter Your Symptom**")
         
+        col1, col2 = st.columns([4, 1])
         with col1:
-            age_group = st.selectbox(
-                "👥 Age Group:",
-                ["All ages", "Children (0-12)", "Teenagers (13-17)", "Adults (18-64)", "Elderly (65+)"],
-                help="Filter information by age group"
+            symptom = st.text_input(
+                "",
+                placeholder="e.g., headache, chest pain, fatigue, dizziness...",
+                help="Describe your symptom in simple terms"
             )
-        
         with col2:
-            severity = st.selectbox(
-                "📊 Severity Level:",
-                ["All levels", "Mild", "Moderate", "Severe"],
-                help="Specify the intensity of the symptom"
-            )
+            search_button = st.form_submit_button("🔍 Explore", type="primary", use_container_width=True)
         
-        with col3:
-            duration = st.selectbox(
-                "⏱️ Duration:",
-                ["Any duration", "Acute (< 1 week)", "Subacute (1-4 weeks)", "Chronic (> 4 weeks)"],
-                help="How long have you experienced this symptom?"
-            )
+        # Enhanced advanced options
+        with st.expander("⚙️ **Advanced Search Options**", expanded=False):
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                age_group = st.selectbox(
+                    "👥 Age Group:",
+                    ["All ages", "Children (0-12)", "Teenagers (13-17)", "Adults (18-64)", "Elderly (65+)"],
+                    help="Filter information by age group"
+                )
+            
+            with col2:
+                severity = st.selectbox(
+                    "📊 Severity Level:",
+                    ["All levels", "Mild", "Moderate", "Severe"],
+                    help="Specify the intensity of the symptom"
+                )
+            
+            with col3:
+                duration = st.selectbox(
+                    "⏱️ Duration:",
+                    ["Any duration", "Acute (< 1 week)", "Subacute (1-4 weeks)", "Chronic (> 4 weeks)"],
+                    help="How long have you experienced this symptom?"
+                )
+    
+    results = st.session_state.setdefault('symptom_results', {})
     
     # Process search
     if search_button and symptom and st.session_state.get('perplexity_api_key'):
-        api_service = PerplexityService(st.session_state.perplexity_api_key)
-        
-        with show_loading_message("🔍 Searching medical databases for comprehensive information..."):
-            result = api_service.query_symptom(symptom, age_group, severity, duration)
+        query = _symptom_query_key(symptom, age_group, severity, duration)
+        if query not in results:
+            api_service = PerplexityService(st.session_state.perplexity_api_key)
             
-            if result and 'choices' in result:
-                content = result['choices'][0]['message']['content']
-                
-                # Enhanced results display
-                st.markdown(f"""
-                <div class="symptom-card fade-in">
-                    <h2>📋 Medical Information: {symptom.title()}</h2>
-                    <div style="display: flex; gap: 1rem; margin-top: 1rem; flex-wrap: wrap;">
-                        <span style="background: #e3f2fd; padding: 0.5rem 1rem; border-radius: 20px; font-size: 0.9rem;">
-                            👥 {age_group}
-                        </span>
-                        <span style="background: #fff3e0; padding: 0.5rem 1rem; border-radius: 20px; font-size: 0.9rem;">
-                            📊 {severity}
-                        </span>
-                        <span style="background: #f3e5f5; padding: 0.5rem 1rem; border-radius: 20px; font-size: 0.9rem;">
-                            ⏱️ {duration}
-                        </span>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Display content in organized sections
-                st.markdown("---")
-                st.markdown(content)
-                
-                # Enhanced emergency warning
-                st.markdown("""
-                <div class="emergency-card">
-                    <h3>🚨 When to Seek Emergency Care</h3>
-                    <p><strong>Call emergency services immediately if you experience:</strong></p>
-                    <ul>
-                        <li>🫀 Severe chest pain or difficulty breathing</li>
-                        <li>🧠 Sudden severe headache or confusion</li>
-                        <li>🩸 Signs of severe bleeding or trauma</li>
-                        <li>🤒 High fever with severe symptoms</li>
-                        <li>⚡ Loss of consciousness or severe weakness</li>
-                    </ul>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Display sources
-                display_sources(result)
-                
-                # Additional resources
-                st.markdown("### 🔗 **Additional Resources**")
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.info("""
-                    **📞 Need immediate help?**
-                    - Emergency: 911 (US) / 112 (EU)
-                    - Poison Control: 1-800-222-1222
-                    - Crisis Line: 988
-                    """)
-                
-                with col2:
-                    st.info("""
-                    **🏥 Next Steps:**
-                    - Consult your healthcare provider
-                    - Keep a symptom diary
-                    - Note any triggers or patterns
-                    """)
+            with show_loading_message("🔍 Searching medical databases for comprehensive information..."):
+                stream = api_service.query_symptom(symptom, age_group, severity, duration, stream=True)
+                started = stream.start()
+            
+            if started:
+                _render_symptom_result(symptom, age_group, severity, duration, stream)
+                if stream.result:
+                    _remember_result(results, query, parse_response("symptom", stream.result))
+                    st.session_state.symptom_query = query
+                return
+        st.session_state.symptom_query = query
     
     elif search_button and symptom and not st.session_state.get('perplexity_api_key'):
         st.error("🔑 Please configure your Perplexity API key in the sidebar first.")
@@ -130,8 +89,13 @@ def symptom_explorer():
     elif search_button and not symptom:
         st.warning("📝 Please enter a symptom to explore.")
     
+    # Redraw the last answer from session state instead of querying again
+    query = st.session_state.get('symptom_query')
+    if query in results:
+        _render_symptom_result(*query, results[query])
+    
     # Show helpful tips when no search is active
-    if not search_button:
+    else:
         st.markdown("### 💡 **How to Use Symptom Explorer**")
         
         col1, col2 = st.columns(2)
@@ -164,4 +128,85 @@ def symptom_explorer():
                 <h4>🏥 Professional Care</h4>
                 <p>This tool provides educational information only. Always consult healthcare professionals.</p>
             </div>
-            """, unsafe_allow_html=True)
\ No newline at end of file
+            """, unsafe_allow_html=True)
+
+def _symptom_query_key(symptom, age_group, severity, duration):
+    """Session-state key for a search, so the same question isn't asked twice"""
+    return (" ".join(symptom.split()), age_group, severity, duration)
+
+def _remember_result(results, query, report):
+    """Keep a parsed search result in session state, dropping the oldest beyond the limit"""
+    results[query] = report
+    while len(results) > SESSION_RESULTS_MAX:
+        del results[next(iter(results))]
+
+def _render_symptom_result(symptom, age_group, severity, duration, answer):
+    """Render a symptom answer from a live ResponseStream or a stored SymptomReport"""
+    # Enhanced results display
+    st.markdown(f"""
+    <div class="symptom-card fade-in">
+        <h2>📋 Medical Information: {symptom.title()}</h2>
+        <div style="display: flex; gap: 1rem; margin-top: 1rem; flex-wrap: wrap;">
+            <span style="background: #e3f2fd; padding: 0.5rem 1rem; border-radius: 20px; font-size: 0.9rem;">
+                👥 {age_group}
+            </span>
+            <span style="background: #fff3e0; padding: 0.5rem 1rem; border-radius: 20px; font-size: 0.9rem;">
+                📊 {severity}
+            </span>
+            <span style="background: #f3e5f5; padding: 0.5rem 1rem; border-radius: 20px; font-size: 0.9rem;">
+                ⏱️ {duration}
+            </span>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Display content in organized sections, rendering tokens as they arrive
+    st.markdown("---")
+    if isinstance(answer, tuple):
+        report = answer
+        st.markdown(to_markdown(report))
+    else:
+        st.write_stream(answer)
+        report = parse_response("symptom", answer.result)
+    
+    # Red flags named in this answer, pulled out of the text so they can't be missed
+    if report and report.red_flags:
+        st.warning("**⚠️ Red flags for this symptom:**\n" + "\n".join(f"- {flag}" for flag in report.red_flags))
+    
+    # Enhanced emergency warning
+    st.markdown("""
+    <div class="emergency-card">
+        <h3>🚨 When to Seek Emergency Care</h3>
+        <p><strong>Call emergency services immediately if you experience:</strong></p>
+        <ul>
+            <li>🫀 Severe chest pain or difficulty breathing</li>
+            <li>🧠 Sudden severe headache or confusion</li>
+            <li>🩸 Signs of severe bleeding or trauma</li>
+            <li>🤒 High fever with severe symptoms</li>
+            <li>⚡ Loss of consciousness or severe weakness</li>
+        </ul>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Display sources
+    display_sources(report)
+    
+    # Additional resources
+    st.markdown("### 🔗 **Additional Resources**")
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.info("""
+        **📞 Need immediate help?**
+        - Emergency: 911 (US) / 112 (EU)
+        - Poison Control: 1-800-222-1222
+        - Crisis Line: 988
+        """)
+    
+    with col2:
+        st.info("""
+        **🏥 Next Steps:**
+        - Consult your healthcare provider
+        - Keep a symptom diary
+        - Note any triggers or patterns
+        """)
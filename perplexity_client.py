@@ -0,0 +1,839 @@
+# perplexity_client.py
+"""Streamlit-free Perplexity API client core, usable from pages, workers and batch jobs"""
+
+import asyncio
+import itertools
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from config import (
+    PERPLEXITY_API_URL, PERPLEXITY_MODEL,
+    HTTP_POOL_SIZE, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, ASYNC_MAX_CONCURRENCY,
+    RATE_LIMIT_MAX_WAIT, RETRY_MAX_ATTEMPTS, RETRY_STATUS_CODES
+)
+from cache import get_response_cache, make_cache_key
+from semantic_cache import get_semantic_cache
+from drug_index import get_drug_index
+from interaction_kb import get_interaction_kb, interaction_answer
+from document_pipeline import split_document, merge_chunk_results
+from singleflight import get_single_flight, get_shared_leases
+from metrics import get_metrics
+from prompt_builder import build_messages, get_output_budgets
+from rate_limit import (
+    PRIORITY_INTERACTIVE, get_rate_limiter, backoff_delay, parse_retry_after
+)
+
+class _TimedHTTPConnection(HTTPConnection):
+    """HTTP connection that records how long each new connection takes to open"""
+    
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        get_metrics().observe("perplexity_connect_seconds", time.perf_counter() - started, scheme="http")
+        get_metrics().inc("perplexity_connections_opened_total", scheme="http")
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    """HTTPS connection that records how long each new connection (TCP + TLS) takes to open"""
+    
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        get_metrics().observe("perplexity_connect_seconds", time.perf_counter() - started, scheme="https")
+        get_metrics().inc("perplexity_connections_opened_total", scheme="https")
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    """Pooled adapter whose connections report their connect time to the metrics registry"""
+    
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool, "https": _TimedHTTPSConnectionPool
+        }
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+def get_http_session():
+    """Return the process-wide pooled keep-alive session for API calls"""
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                session = requests.Session()
+                adapter = _TimedHTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _http_session = session
+    return _http_session
+
+logger = logging.getLogger(__name__)
+
+class PerplexityAPIError(Exception):
+    """A failed Perplexity API call, with the HTTP status when one was received"""
+    
+    def __init__(self, message, status_code=None, retryable=False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+    
+    @classmethod
+    def from_exception(cls, exc):
+        """Wrap a requests exception"""
+        response = getattr(exc, 'response', None)
+        status_code = response.status_code if response is not None else None
+        retryable = (
+            isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+            or status_code in RETRY_STATUS_CODES
+        )
+        return cls(str(exc), status_code=status_code, retryable=retryable)
+    
+    @classmethod
+    def from_shared_state_error(cls, exc):
+        """Wrap a sqlite3 error from the shared cache, leases or rate limiter (e.g. a lock timeout)"""
+        return cls(f"Shared state unavailable: {exc}", retryable=True)
+
+SEVERITY_LEVELS = ["Major", "Moderate", "Minor", "None", "Unknown"]
+SEVERITY_ICONS = {"Major": "🔴", "Moderate": "🟡", "Minor": "🟢", "None": "⚪", "Unknown": "❔"}
+_SEVERITY_LINE_RE = re.compile(r"^[\s*_#>-]*severity[\s*_]*:[\s*_]*(major|moderate|minor|none)\b", re.IGNORECASE | re.MULTILINE)
+
+def normalize_drug_name(drug):
+    """Resolve a drug name to its canonical generic name (brands and synonyms; unknown names as typed)"""
+    return get_drug_index().canonicalize(drug)
+
+def canonicalize_drug_list(drugs):
+    """Canonicalize a drug list, dropping blanks and duplicates while keeping order"""
+    return list(dict.fromkeys(normalize_drug_name(drug) for drug in drugs if drug.strip()))
+
+def drug_pair_key(drug_a, drug_b):
+    """Return an order-independent, case-normalized key for a pair of drugs"""
+    return tuple(sorted((normalize_drug_name(drug_a), normalize_drug_name(drug_b))))
+
+def drug_pairs(drugs):
+    """Return the canonical unordered pairs of distinct drugs in a list"""
+    names = {normalize_drug_name(drug) for drug in drugs if drug.strip()}
+    return sorted(drug_pair_key(drug_a, drug_b) for drug_a, drug_b in itertools.combinations(names, 2))
+
+def parse_interaction_severity(content):
+    """Extract the severity rating from a pairwise interaction answer"""
+    match = _SEVERITY_LINE_RE.search(content)
+    return match.group(1).capitalize() if match else "Unknown"
+
+def known_pair_results(pairs):
+    """Offline answers for pairs in the bundled interaction table, None where the API must be asked"""
+    results = [
+        None if record is None else {
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": interaction_answer(record)}}],
+            "citations": [],
+            "source": "kb"
+        }
+        for record in get_interaction_kb().lookup_pairs(pairs)
+    ]
+    hits = sum(result is not None for result in results)
+    get_metrics().inc("interaction_kb_pairs_total", hits, result="hit")
+    get_metrics().inc("interaction_kb_pairs_total", len(results) - hits, result="miss")
+    return results
+
+def merge_pair_results(pairs, results):
+    """Merge per-pair responses into one response dict sorted by severity"""
+    entries = []
+    citations = []
+    for (drug_a, drug_b), result in zip(pairs, results):
+        if isinstance(result, dict) and result.get('choices'):
+            content = result['choices'][0]['message']['content']
+            severity = parse_interaction_severity(content)
+            content = _SEVERITY_LINE_RE.sub("", content, count=1).strip()
+            for citation in result.get('citations', []):
+                if citation not in citations:
+                    citations.append(citation)
+        else:
+            severity = "Unknown"
+            content = "_Interaction information could not be retrieved for this pair._"
+        entries.append({"drugs": [drug_a, drug_b], "severity": severity, "content": content})
+    
+    errors = [result for result in results if isinstance(result, Exception)]
+    if results and len(errors) == len(results):
+        raise errors[0]
+    
+    entries.sort(key=lambda entry: SEVERITY_LEVELS.index(entry['severity']))
+    sections = [
+        f"### {SEVERITY_ICONS[entry['severity']]} {entry['drugs'][0].title()} + "
+        f"{entry['drugs'][1].title()} — {entry['severity']}\n\n{entry['content']}"
+        for entry in entries
+    ]
+    return {
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": "\n\n---\n\n".join(sections)}
+        }],
+        "citations": citations,
+        "pairs": entries,
+        "errors": [str(error) for error in errors],
+        "offline_pairs": sum(isinstance(result, dict) and result.get("source") == "kb" for result in results)
+    }
+
+def single_medication_result(drugs):
+    """Report for a list that names fewer than two distinct medications, e.g. a brand and its generic"""
+    names = canonicalize_drug_list(drugs)
+    if names:
+        content = (f"All of these refer to the same medication, **{names[0]}**, "
+                   "so there is no drug pair to check. Enter at least two different medications.")
+    else:
+        content = "No medications were entered. Enter at least two different medications."
+    return {
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}],
+        "citations": [],
+        "pairs": [],
+        "errors": [],
+        "offline_pairs": 0
+    }
+
+def payload_cache_key(data):
+    """Response-cache key for a request body, leaving out max_tokens
+    
+    max_tokens only caps the answer length, and the adaptive per-kind budget moves between steps
+    and differs between processes; keying on it would split the cache for the same question.
+    """
+    return make_cache_key({key: value for key, value in data.items() if key != "max_tokens"})
+
+class ResponseStream:
+    """Iterable of streamed answer text
+    
+    Once consumed, `result` holds the full response; if the request fails, iteration stops,
+    `error` holds the PerplexityAPIError and `on_error` (if set) is called with it.
+    """
+    
+    def __init__(self, generator, on_error=None):
+        self._generator = generator
+        self._first_chunk = None
+        self._started = False
+        self.on_error = on_error
+        self.result = None
+        self.error = None
+    
+    def _fail(self, error):
+        """Record a failed request"""
+        self.error = error
+        if self.on_error:
+            self.on_error(error)
+    
+    def start(self):
+        """Block until the first text arrives; return False if the request failed"""
+        if not self._started:
+            self._started = True
+            try:
+                self._first_chunk = next(self._generator)
+            except StopIteration as stop:
+                self.result = stop.value
+            except PerplexityAPIError as e:
+                self._fail(e)
+        return self._first_chunk is not None or self.result is not None
+    
+    def __iter__(self):
+        if not self.start() or self._first_chunk is None:
+            return
+        first_chunk, self._first_chunk = self._first_chunk, None
+        yield first_chunk
+        try:
+            self.result = yield from self._generator
+        except PerplexityAPIError as e:
+            self._fail(e)
+
+# Query kind -> prompt builder method, for callers that dispatch on kind (CLI, prefetch)
+QUERY_KINDS = {
+    "symptom": "_symptom_prompt",
+    "drug_interactions": "_drug_interactions_prompt",
+    "drug_pair": "_drug_pair_prompt",
+    "medical_translation": "_medical_translation_prompt",
+    "document_translation": "_document_translation_prompt",
+    "document_chunk": "_document_chunk_prompt"
+}
+
+class PerplexityClient:
+    """Perplexity API client core: cached, coalesced, rate-limited, no UI dependencies
+    
+    Failures raise PerplexityAPIError. `on_event`, if given, is called with a dict for every
+    finished query ({"event": "query_complete" | "query_failed", "kind", "elapsed", "inputs", ...});
+    completed queries also carry "source" and "result". `inputs` is the user-facing query
+    (e.g. {"symptom": ...}) and is None for internal sub-queries such as drug pairs.
+    """
+    
+    def __init__(self, api_key, priority=PRIORITY_INTERACTIVE, on_event=None):
+        self.api_key = api_key
+        self.priority = priority
+        self.on_event = on_event
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+    
+    def _build_payload(self, prompt, sources_filter="", temperature=0.2, max_tokens=None, kind="query"):
+        """Build the chat completion request body for a prompt (max_tokens=None picks the kind's budget)"""
+        messages = build_messages(prompt, sources_filter)
+        if max_tokens is None:
+            max_tokens = get_output_budgets().budget(kind, messages)
+        
+        return {
+            "model": PERPLEXITY_MODEL,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+    
+    def _emit(self, event, kind, started, **fields):
+        """Report a finished query to the metrics registry and the telemetry hook"""
+        payload = {"event": event, "kind": kind, "elapsed": time.perf_counter() - started, **fields}
+        get_metrics().record_query_event(payload)
+        result = fields.get("result")
+        if fields.get("source") == "api" and result and result.get("usage"):
+            finish_reason = (result.get("choices") or [{}])[0].get("finish_reason")
+            get_output_budgets().observe(kind, result["usage"], finish_reason)
+        if self.on_event:
+            self.on_event(payload)
+    
+    def query(self, prompt, sources_filter="", temperature=0.2, max_tokens=None, kind="query", inputs=None):
+        """Query Perplexity API with medical source filtering; raises PerplexityAPIError"""
+        data = self._build_payload(prompt, sources_filter, temperature, max_tokens, kind)
+        started = time.perf_counter()
+        
+        try:
+            result, source = self._fetch(data, kind, inputs)
+        except PerplexityAPIError as e:
+            self._emit("query_failed", kind, started, error=e, stream=False, inputs=inputs)
+            raise
+        
+        self._emit("query_complete", kind, started, source=source, stream=False, inputs=inputs, result=result)
+        return result
+    
+    def _cached(self, cache_key, kind, inputs):
+        """Return (response, source) from the cache, falling back to a near-duplicate earlier query"""
+        cache = get_response_cache()
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached, "cache"
+        semantic = get_semantic_cache()
+        match = semantic.find(kind, inputs) if semantic is not None else None
+        if match is not None:
+            cached = cache.get(match[0])
+            if cached is not None:
+                return cached, "semantic"
+        return None, None
+    
+    def _store(self, cache_key, result, kind, inputs):
+        """Cache an API answer and index its query for near-duplicate lookups
+        
+        Answers cut off by max_tokens are not cached: budgets aren't part of the cache key, so a
+        later request with a larger budget would be served the truncated answer.
+        """
+        if (result.get("choices") or [{}])[0].get("finish_reason") == "length":
+            return
+        get_response_cache().set(cache_key, result)
+        semantic = get_semantic_cache()
+        if semantic is not None:
+            semantic.add(kind, inputs, cache_key)
+    
+    def _fetch(self, data, kind="query", inputs=None):
+        """Return (response, source) for a payload from the cache, an identical in-flight call or the API"""
+        cache_key = payload_cache_key(data)
+        cached, source = self._cached(cache_key, kind, inputs)
+        if cached is not None:
+            return cached, source
+        
+        # Identical payloads already in flight share that call instead of hitting the API again
+        single_flight = get_single_flight()
+        flight, is_leader = single_flight.begin(cache_key)
+        if not is_leader:
+            return flight.wait(), "coalesced"
+        
+        result = self._lead(cache_key, flight)
+        if result is not None:
+            return result, "coalesced"
+        
+        try:
+            try:
+                response = self._send(data, kind=kind)
+                try:
+                    result = response.json()
+                except ValueError as e:
+                    raise PerplexityAPIError(f"Invalid JSON in API response: {e}") from e
+                self._store(cache_key, result, kind, inputs)
+            finally:
+                self._release(cache_key)
+        except Exception as e:
+            single_flight.end(cache_key, flight, error=e)
+            raise
+        
+        single_flight.end(cache_key, flight, result=result)
+        return result, "api"
+    
+    def _lead(self, cache_key, flight):
+        """As this process's leader, wait out any other app process already fetching the payload
+        
+        Returns that process's answer (completing the local flight with it), or None once this
+        process holds the host-wide lease and should call the API itself.
+        """
+        leases = get_shared_leases()
+        if leases is None:
+            return None
+        cache = get_response_cache()
+        try:
+            result = leases.claim(cache_key, lambda: cache.get(cache_key) if cache_key in cache else None)
+        except sqlite3.Error as e:
+            error = PerplexityAPIError.from_shared_state_error(e)
+            get_single_flight().end(cache_key, flight, error=error)
+            raise error from e
+        if result is not None:
+            get_single_flight().end(cache_key, flight, result=result)
+        return result
+    
+    def _release(self, cache_key):
+        """Let other app processes fetch the payload again, once the answer is cached or the call failed"""
+        leases = get_shared_leases()
+        if leases is not None:
+            try:
+                leases.release(cache_key)
+            except sqlite3.Error as e:
+                # Waiters still find the cached answer; otherwise the lease lapses after its TTL
+                logger.warning("Could not release shared lease: %s", e)
+    
+    def _send(self, data, stream=False, kind="query"):
+        """POST a payload under the shared rate limit; raises PerplexityAPIError"""
+        try:
+            return self._send_with_retries(data, stream, kind)
+        except requests.exceptions.RequestException as e:
+            raise PerplexityAPIError.from_exception(e) from e
+        except sqlite3.Error as e:
+            raise PerplexityAPIError.from_shared_state_error(e) from e
+    
+    def _send_with_retries(self, data, stream, kind):
+        """POST a payload, retrying 429/5xx responses and connection failures with backoff"""
+        limiter = get_rate_limiter()
+        for attempt in range(RETRY_MAX_ATTEMPTS + 1):
+            if not limiter.acquire(self.priority, timeout=RATE_LIMIT_MAX_WAIT):
+                raise requests.exceptions.RetryError("Timed out waiting for the API rate limit")
+            try:
+                response = get_http_session().post(
+                    PERPLEXITY_API_URL,
+                    headers=self.headers,
+                    json=data,
+                    stream=stream,
+                    timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt == RETRY_MAX_ATTEMPTS:
+                    raise
+                reason = "timeout" if isinstance(e, requests.exceptions.Timeout) else "connection"
+                get_metrics().inc("perplexity_retries_total", kind=kind, reason=reason)
+                time.sleep(backoff_delay(attempt))
+                continue
+            
+            # requests measures elapsed from sending the request until the headers are parsed
+            get_metrics().observe("perplexity_ttfb_seconds", response.elapsed.total_seconds(), kind=kind)
+            if response.status_code in RETRY_STATUS_CODES and attempt < RETRY_MAX_ATTEMPTS:
+                get_metrics().inc("perplexity_retries_total", kind=kind, reason=str(response.status_code))
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                delay = retry_after if retry_after is not None else backoff_delay(attempt)
+                if response.status_code == 429:
+                    # Everyone sharing the limiter backs off, not just this caller
+                    limiter.pause(delay)
+                response.close()
+                time.sleep(delay)
+                continue
+            
+            response.raise_for_status()
+            return response
+    
+    def stream_query(self, prompt, sources_filter="", temperature=0.2, max_tokens=None, kind="query", inputs=None):
+        """Query Perplexity API, returning a ResponseStream of answer text chunks"""
+        data = self._build_payload(prompt, sources_filter, temperature, max_tokens, kind)
+        return ResponseStream(self._stream_payload(data, kind, inputs))
+    
+    def _stream_payload(self, data, kind, inputs=None):
+        """Yield answer text as it arrives over SSE and return the assembled response"""
+        started = time.perf_counter()
+        # Streamed and blocking calls share cache entries, so key on the non-stream payload
+        cache_key = payload_cache_key(data)
+        cached, source = self._cached(cache_key, kind, inputs)
+        if cached is not None:
+            if cached.get('choices'):
+                yield cached['choices'][0]['message']['content']
+            self._emit("query_complete", kind, started, source=source, stream=True, inputs=inputs, result=cached)
+            return cached
+        
+        flight, is_leader = get_single_flight().begin(cache_key)
+        source = "api" if is_leader else "coalesced"
+        try:
+            shared = self._lead(cache_key, flight) if is_leader else None
+            if shared is not None:
+                source = "coalesced"
+                result = yield from self._follow_flight(flight)
+            elif is_leader:
+                try:
+                    result = yield from self._stream_upstream(data, cache_key, flight, kind, inputs)
+                finally:
+                    self._release(cache_key)
+            else:
+                result = yield from self._follow_flight(flight)
+        except PerplexityAPIError as e:
+            self._emit("query_failed", kind, started, error=e, stream=True, inputs=inputs)
+            raise
+        
+        self._emit("query_complete", kind, started, source=source, stream=True, inputs=inputs, result=result)
+        return result
+    
+    def _stream_upstream(self, data, cache_key, flight, kind="query", inputs=None):
+        """Stream a payload from the API, publishing each chunk to coalesced waiters"""
+        single_flight = get_single_flight()
+        parts = []
+        last_event = {}
+        try:
+            with self._send({**data, "stream": True}, stream=True, kind=kind) as response:
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    event_data = line[len("data:"):].strip()
+                    if event_data == "[DONE]":
+                        break
+                    event = json.loads(event_data)
+                    last_event = event
+                    choices = event.get('choices') or [{}]
+                    delta = choices[0].get('delta', {}).get('content')
+                    if delta:
+                        parts.append(delta)
+                        flight.publish(delta)
+                        yield delta
+        except PerplexityAPIError as e:
+            single_flight.end(cache_key, flight, error=e)
+            raise
+        except requests.exceptions.RequestException as e:
+            error = PerplexityAPIError.from_exception(e)
+            single_flight.end(cache_key, flight, error=error)
+            raise error from e
+        except ValueError as e:
+            error = PerplexityAPIError(f"Malformed stream event: {e}")
+            single_flight.end(cache_key, flight, error=error)
+            raise error from e
+        except BaseException:
+            # The consumer abandoned the stream (e.g. a script rerun); release any waiters
+            single_flight.end(
+                cache_key, flight,
+                error=PerplexityAPIError("Shared streaming request was interrupted", retryable=True)
+            )
+            raise
+        
+        result = {key: value for key, value in last_event.items() if key != 'choices'}
+        finish_reason = (last_event.get('choices') or [{}])[0].get('finish_reason')
+        result['choices'] = [{
+            "index": 0,
+            "message": {"role": "assistant", "content": "".join(parts)},
+            "finish_reason": finish_reason
+        }]
+        self._store(cache_key, result, kind, inputs)
+        single_flight.end(cache_key, flight, result=result)
+        return result
+    
+    def _follow_flight(self, flight):
+        """Replay an identical in-flight request's chunks instead of calling the API again"""
+        yield from flight.iter_chunks()
+        result = flight.wait()
+        # A blocking leader publishes no chunks, so hand over its answer in one piece
+        if not flight.chunks and result and result.get('choices'):
+            yield result['choices'][0]['message']['content']
+        return result
+    
+    def _run(self, prompt, stream, kind, inputs=None):
+        """Dispatch a prompt to the blocking or streaming query path"""
+        if stream:
+            return self.stream_query(prompt, kind=kind, inputs=inputs)
+        return self.query(prompt, kind=kind, inputs=inputs)
+    
+    def prompt_for(self, kind, **inputs):
+        """Build the prompt a query_* method would send, by query kind (see QUERY_KINDS)"""
+        if kind not in QUERY_KINDS:
+            raise ValueError(f"Unknown query kind: {kind}")
+        if kind == "drug_interactions":
+            inputs = {**inputs, "drugs": canonicalize_drug_list(inputs["drugs"])}
+        return getattr(self, QUERY_KINDS[kind])(**inputs)
+    
+    def is_cached(self, prompt, sources_filter="", temperature=0.2, max_tokens=None, kind="query"):
+        """Check whether a prompt's response is already in the response cache"""
+        data = self._build_payload(prompt, sources_filter, temperature, max_tokens, kind)
+        return payload_cache_key(data) in get_response_cache()
+    
+    def _async_client(self):
+        """Return an async client sharing this client's settings"""
+        return AsyncPerplexityClient(self.api_key, priority=self.priority, on_event=self.on_event)
+    
+    def query_symptom(self, symptom, age_group="All ages", severity="All levels", duration="Any duration", stream=False):
+        """Query for symptom information"""
+        inputs = {"symptom": symptom, "age_group": age_group, "severity": severity, "duration": duration}
+        return self._run(self._symptom_prompt(**inputs), stream, "symptom", inputs)
+    
+    def query_drug_interactions(self, drugs, stream=False):
+        """Query for drug interaction information"""
+        inputs = {"drugs": canonicalize_drug_list(drugs)}
+        return self._run(self._drug_interactions_prompt(**inputs), stream, "drug_interactions", inputs)
+    
+    def query_drug_interactions_pairwise(self, drugs):
+        """Check every unordered drug pair and merge into one severity-sorted report
+        
+        Pairs in the offline interaction table are answered locally; only the rest are
+        sent to the API, concurrently. A fully known regimen makes no API calls at all.
+        """
+        pairs = drug_pairs(drugs)
+        if not pairs:
+            return single_medication_result(drugs)
+        results = known_pair_results(pairs)
+        if not all(results):
+            results = asyncio.run(self._async_client()._fill_pair_results(pairs, results))
+        return merge_pair_results(pairs, results)
+    
+    def query_medical_translation(self, medical_term, stream=False):
+        """Query for medical term translation"""
+        inputs = {"medical_term": medical_term}
+        return self._run(self._medical_translation_prompt(**inputs), stream, "medical_translation", inputs)
+    
+    def query_document_translation(self, medical_text, stream=False):
+        """Query for medical document translation"""
+        inputs = {"medical_text": medical_text}
+        return self._run(self._document_translation_prompt(**inputs), stream, "document_translation", inputs)
+    
+    def query_document_translation_chunked(self, medical_text):
+        """Translate a long document section by section in parallel and reassemble it in order"""
+        return asyncio.run(self._async_client().query_document_translation_chunked(medical_text))
+    
+    def _symptom_prompt(self, symptom, age_group="All ages", severity="All levels", duration="Any duration"):
+        """Build the symptom information prompt"""
+        prompt = f"""
+        Provide comprehensive information about the symptom: {symptom}
+        
+        Please include:
+        1. Medical definition and description
+        2. Common causes (most frequent reasons)
+        3. Serious causes that require immediate medical attention
+        4. When to seek emergency care
+        5. Typical diagnostic approaches
+        6. General management principles
+        7. Red flags and warning signs
+        
+        Consider: Age group: {age_group}, Severity: {severity}, Duration: {duration}
+        
+        Format the response clearly with headers and bullet points.
+        """
+        return prompt
+    
+    def _drug_interactions_prompt(self, drugs):
+        """Build the drug interaction prompt"""
+        drugs_list = ', '.join(drugs)
+        prompt = f"""
+        Check for drug interactions between these medications: {drugs_list}
+        
+        Please provide:
+        1. Major interactions (clinically significant)
+        2. Moderate interactions (monitor closely)
+        3. Minor interactions (minimal clinical significance)
+        4. Mechanism of interaction
+        5. Clinical management recommendations
+        6. Monitoring parameters
+        7. Alternative medications if interactions are severe
+        
+        Include severity ratings and clinical significance.
+        """
+        return prompt
+    
+    def _drug_pair_prompt(self, drug_a, drug_b):
+        """Build the single-pair drug interaction prompt used by pairwise checks"""
+        prompt = f"""
+        Check for a drug interaction between these two medications: {drug_a} and {drug_b}
+        
+        Start your answer with exactly one line of the form "Severity: Major",
+        "Severity: Moderate", "Severity: Minor" or "Severity: None".
+        
+        Then provide:
+        1. Mechanism of interaction
+        2. Clinical effects
+        3. Clinical management recommendations
+        4. Monitoring parameters
+        
+        Keep the answer concise.
+        """
+        return prompt
+    
+    def _document_chunk_prompt(self, chunk):
+        """Build the prompt for one section of a chunked document translation"""
+        prompt = f"""
+        Translate this section of a longer medical document into simple, patient-friendly language:
+        
+        {chunk}
+        
+        Please:
+        1. Replace medical jargon with simple terms, giving the original term in parentheses the first time it appears
+        2. Explain what each finding means
+        3. Highlight important information
+        4. Maintain accuracy while improving readability
+        
+        Translate only this section and keep its headings. Do not add an introduction, summary or closing disclaimer; the sections will be joined together.
+        """
+        return prompt
+    
+    def _medical_translation_prompt(self, medical_term):
+        """Build the medical term translation prompt"""
+        prompt = f"""
+        Explain the medical term: {medical_term}
+        
+        Please provide:
+        1. Simple, easy-to-understand definition
+        2. Common name or lay term
+        3. Pronunciation guide
+        4. What causes this condition
+        5. Common symptoms
+        6. How it's diagnosed
+        7. Treatment options
+        8. Prognosis and outlook
+        9. Related terms
+        
+        Use simple language that a patient would understand.
+        """
+        return prompt
+    
+    def _document_translation_prompt(self, medical_text):
+        """Build the medical document translation prompt"""
+        prompt = f"""
+        Translate this medical text into simple, patient-friendly language:
+        
+        {medical_text}
+        
+        Please:
+        1. Replace medical jargon with simple terms
+        2. Explain what each finding means
+        3. Highlight important information
+        4. Maintain accuracy while improving readability
+        5. Add context where helpful
+        
+        Keep the same structure but make it understandable for patients.
+        """
+        return prompt
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    """Return the shared worker pool that runs blocking HTTP calls for async queries"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=HTTP_POOL_SIZE, thread_name_prefix="perplexity"
+                )
+    return _executor
+
+class AsyncPerplexityClient:
+    """asyncio front-end to PerplexityClient with bounded concurrent fan-out"""
+    
+    def __init__(self, api_key, max_concurrency=ASYNC_MAX_CONCURRENCY, priority=PRIORITY_INTERACTIVE, on_event=None):
+        self._client = PerplexityClient(api_key, priority=priority, on_event=on_event)
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+        self._loop = None
+    
+    def _get_semaphore(self):
+        """Return a semaphore bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
+    
+    async def query(self, prompt, sources_filter="", temperature=0.2, max_tokens=None, kind="query", inputs=None):
+        """Query Perplexity API without blocking the event loop; raises PerplexityAPIError"""
+        data = self._client._build_payload(prompt, sources_filter, temperature, max_tokens, kind)
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        
+        async with self._get_semaphore():
+            try:
+                result, source = await loop.run_in_executor(_get_executor(), self._client._fetch, data, kind, inputs)
+            except PerplexityAPIError as e:
+                self._client._emit("query_failed", kind, started, error=e, stream=False, inputs=inputs)
+                raise
+        
+        # Events fire on the event loop thread, never on the worker pool
+        self._client._emit("query_complete", kind, started, source=source, stream=False, inputs=inputs, result=result)
+        return result
+    
+    async def query_many(self, prompts, return_exceptions=False, **kwargs):
+        """Run many prompts concurrently and return their results in input order"""
+        return await asyncio.gather(
+            *(self.query(prompt, **kwargs) for prompt in prompts),
+            return_exceptions=return_exceptions
+        )
+    
+    async def query_symptom(self, symptom, age_group="All ages", severity="All levels", duration="Any duration"):
+        """Query for symptom information"""
+        inputs = {"symptom": symptom, "age_group": age_group, "severity": severity, "duration": duration}
+        return await self.query(self._client._symptom_prompt(**inputs), kind="symptom", inputs=inputs)
+    
+    async def query_drug_interactions(self, drugs):
+        """Query for drug interaction information"""
+        inputs = {"drugs": canonicalize_drug_list(drugs)}
+        return await self.query(self._client._drug_interactions_prompt(**inputs), kind="drug_interactions", inputs=inputs)
+    
+    async def query_drug_interactions_pairwise(self, drugs):
+        """Check every unordered drug pair (unknown ones concurrently) and merge into one severity-sorted report"""
+        pairs = drug_pairs(drugs)
+        if not pairs:
+            return single_medication_result(drugs)
+        return merge_pair_results(pairs, await self._fill_pair_results(pairs, known_pair_results(pairs)))
+    
+    async def _fill_pair_results(self, pairs, results):
+        """Query the API for the pairs the offline table had no answer for"""
+        missing = [index for index, result in enumerate(results) if result is None]
+        fetched = await self.query_many(
+            [self._client._drug_pair_prompt(*pairs[index]) for index in missing],
+            return_exceptions=True,
+            kind="drug_pair"
+        )
+        results = list(results)
+        for index, result in zip(missing, fetched):
+            results[index] = result
+        return results
+    
+    async def query_document_translation_chunked(self, medical_text):
+        """Translate a long document section by section in parallel and reassemble it in order"""
+        chunks = split_document(medical_text)
+        results = await self.query_many(
+            [self._client._document_chunk_prompt(chunk) for chunk in chunks],
+            return_exceptions=True,
+            kind="document_chunk"
+        )
+        return merge_chunk_results(results)
+    
+    async def query_medical_translation(self, medical_term):
+        """Query for medical term translation"""
+        inputs = {"medical_term": medical_term}
+        return await self.query(self._client._medical_translation_prompt(**inputs), kind="medical_translation", inputs=inputs)
+    
+    async def query_document_translation(self, medical_text):
+        """Query for medical document translation"""
+        inputs = {"medical_text": medical_text}
+        return await self.query(self._client._document_translation_prompt(**inputs), kind="document_translation", inputs=inputs)
+
+def run_concurrently(*coroutines):
+    """Run coroutines concurrently from synchronous code (pages, scripts), preserving order"""
+    async def _gather():
+        return await asyncio.gather(*coroutines)
+    return asyncio.run(_gather())
@@ -0,0 +1,138 @@
+# prefetch.py
+"""Background cache warming for quick-pick terms and example drug combinations"""
+
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import (
+    COMMON_MEDICAL_TERMS, EXAMPLE_DRUG_COMBINATIONS,
+    PREFETCH_REFRESH_INTERVAL, PREFETCH_WORKERS, PREFETCH_MIN_PREFIX, PREFETCH_MIN_SPARE_TOKENS
+)
+from perplexity_client import PerplexityClient, PerplexityAPIError, drug_pair_key
+from interaction_kb import get_interaction_kb
+from rate_limit import PRIORITY_BACKGROUND, get_rate_limiter
+
+def warm_up_queries():
+    """Return the (kind, inputs) queries behind the quick picks on the pages"""
+    queries = [("medical_translation", {"medical_term": term}) for term in COMMON_MEDICAL_TERMS]
+    for combination in EXAMPLE_DRUG_COMBINATIONS:
+        drug_a, drug_b = drug_pair_key(*combination["drugs"])
+        # Pairs in the offline interaction table never reach the API, so there is nothing to warm
+        if get_interaction_kb().lookup(drug_a, drug_b) is None:
+            queries.append(("drug_pair", {"drug_a": drug_a, "drug_b": drug_b}))
+    return queries
+
+class Prefetcher:
+    """Warms the shared response cache off the request path, at background rate-limit priority
+
+    Scheduled warm-ups only ever spend the server's PERPLEXITY_API_KEY; speculative prefetches
+    spend the key of the session whose typing triggered them.
+    """
+
+    def __init__(self, max_workers=PREFETCH_WORKERS, refresh_interval=PREFETCH_REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._timer = None
+        self.warmed = 0
+        self.failed = 0
+
+    def start(self):
+        """Warm the quick picks now and on a schedule with the server's key; safe to call on every rerun"""
+        if not os.environ.get("PERPLEXITY_API_KEY"):
+            return
+        with self._lock:
+            if self._timer is not None:
+                return
+            # Claim the schedule before warming so concurrent first calls start only one chain
+            self._timer = self._schedule()
+        self._warm_all()
+
+    def _schedule(self):
+        """Start the timer for the next refresh"""
+        timer = threading.Timer(self.refresh_interval, self._refresh)
+        timer.daemon = True
+        timer.start()
+        return timer
+
+    def _refresh(self):
+        """Re-warm every quick-pick query and schedule the next refresh"""
+        with self._lock:
+            self._timer = self._schedule()
+        self._warm_all()
+
+    def _warm_all(self):
+        """Queue every quick-pick query under the server's key"""
+        api_key = os.environ.get("PERPLEXITY_API_KEY")
+        if api_key:
+            for kind, inputs in warm_up_queries():
+                self.submit(kind, inputs, api_key)
+
+    def submit(self, kind, inputs, api_key, speculative=False):
+        """Queue a query unless it is cached, already queued, or (if speculative) tokens are short"""
+        if not api_key:
+            return False
+        if speculative:
+            try:
+                spare = get_rate_limiter().stats()["tokens"]
+            except sqlite3.Error:
+                return False  # shared limiter busy: not the time for optional traffic
+            if spare < PREFETCH_MIN_SPARE_TOKENS:
+                return False
+        client = PerplexityClient(api_key, priority=PRIORITY_BACKGROUND)
+        prompt = client.prompt_for(kind, **inputs)
+        if client.is_cached(prompt, kind=kind):
+            return False
+        with self._lock:
+            if prompt in self._pending:
+                return False
+            self._pending.add(prompt)
+        self._executor.submit(self._warm, client, kind, prompt)
+        return True
+
+    def _warm(self, client, kind, prompt):
+        """Run one warm-up query; failures are counted and otherwise ignored"""
+        try:
+            client.query(prompt, kind=kind)
+            self.warmed += 1
+        except PerplexityAPIError:
+            self.failed += 1
+        finally:
+            with self._lock:
+                self._pending.discard(prompt)
+
+    def speculate_term(self, typed, api_key):
+        """Prefetch, with the typing session's key, the quick-pick terms a typed prefix could complete to"""
+        typed = typed.strip().lower()
+        if len(typed) < PREFETCH_MIN_PREFIX:
+            return
+        for term in COMMON_MEDICAL_TERMS:
+            if term.lower().startswith(typed):
+                self.submit("medical_translation", {"medical_term": term}, api_key, speculative=True)
+
+    def speculate_drug_pair(self, drug_a, drug_b, api_key):
+        """Prefetch a pair check, with the session's key, while the user is still filling in the form"""
+        if not drug_a.strip() or not drug_b.strip():
+            return
+        drug_a, drug_b = drug_pair_key(drug_a, drug_b)
+        if drug_a != drug_b and get_interaction_kb().lookup(drug_a, drug_b) is None:
+            self.submit("drug_pair", {"drug_a": drug_a, "drug_b": drug_b}, api_key, speculative=True)
+
+    def stats(self):
+        """Return warm-up counters and the number of queued queries"""
+        with self._lock:
+            return {"warmed": self.warmed, "failed": self.failed, "pending": len(self._pending)}
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+def get_prefetcher():
+    """Return the process-wide prefetcher"""
+    global _prefetcher
+    if _prefetcher is None:
+        with _prefetcher_lock:
+            if _prefetcher is None:
+                _prefetcher = Prefetcher()
+    return _prefetcher
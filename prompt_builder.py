@@ -0,0 +1,120 @@
+# prompt_builder.py
+"""Compact chat messages and adaptive per-kind output token budgets"""
+
+import bisect
+import math
+import textwrap
+import threading
+from collections import deque
+from config import (
+    TRUSTED_MEDICAL_SOURCES, OUTPUT_BUDGET_DEFAULTS, OUTPUT_BUDGET_STEPS, OUTPUT_BUDGET_HEADROOM,
+    OUTPUT_BUDGET_PERCENTILE, OUTPUT_BUDGET_MIN_SAMPLES, OUTPUT_BUDGET_WINDOW, OUTPUT_BUDGET_SCALED_KINDS
+)
+
+def estimate_tokens(text):
+    """Cheap local token estimate (~4 characters per token for English text)"""
+    return max(1, (len(text) + 3) // 4)
+
+def build_system_prompt(sources=TRUSTED_MEDICAL_SOURCES):
+    """The instructions shared by every request, kept in one identical system message"""
+    sources_text = "\n".join(f"- {source}" for source in sources)
+    return (
+        "You are a medical information assistant that provides accurate, evidence-based health "
+        "information from trusted sources. Always include disclaimers about consulting healthcare "
+        "professionals and cite your sources.\n\n"
+        f"Use information from trusted medical sources only, including:\n{sources_text}\n\n"
+        "Always include source citations and emphasize that this is for educational purposes only."
+    )
+
+SYSTEM_PROMPT = build_system_prompt()
+
+def build_messages(prompt, sources_filter=""):
+    """Chat messages for a prompt: the shared system message, then the de-indented request"""
+    content = textwrap.dedent(prompt).strip()
+    if sources_filter:
+        content = f"{content}\n\n{sources_filter.strip()}"
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": content}
+    ]
+
+def messages_tokens(messages):
+    """Estimated prompt tokens for a list of chat messages"""
+    return sum(estimate_tokens(message["content"]) for message in messages)
+
+def step_up(tokens):
+    """Round a budget up to the next OUTPUT_BUDGET_STEPS value (the last step is the cap)
+
+    Snapping to a few steps keeps a kind's budget from changing with every new sample while the
+    observed distribution drifts.
+    """
+    index = bisect.bisect_left(OUTPUT_BUDGET_STEPS, tokens)
+    return OUTPUT_BUDGET_STEPS[min(index, len(OUTPUT_BUDGET_STEPS) - 1)]
+
+class OutputBudgets:
+    """Per-kind max_tokens chosen from the completion lengths the API has actually returned
+
+    For most kinds the budget is a high percentile of recent completion_tokens plus headroom.
+    For kinds whose answer scales with the input (OUTPUT_BUDGET_SCALED_KINDS) the same is done
+    with the completion/prompt token ratio, applied to the size of each new prompt. Until
+    OUTPUT_BUDGET_MIN_SAMPLES answers are seen, OUTPUT_BUDGET_DEFAULTS apply.
+    """
+
+    def __init__(self, defaults=OUTPUT_BUDGET_DEFAULTS, window=OUTPUT_BUDGET_WINDOW):
+        self.defaults = defaults
+        self._samples = {}
+        self._window = window
+        self._lock = threading.Lock()
+
+    def observe(self, kind, usage, finish_reason=None):
+        """Record the usage of an API answer; answers cut off by the budget count as longer"""
+        completion = usage.get("completion_tokens")
+        if not completion:
+            return
+        if finish_reason == "length":
+            completion = math.ceil(completion * 1.5)
+        if kind in OUTPUT_BUDGET_SCALED_KINDS:
+            if not usage.get("prompt_tokens"):
+                return
+            sample = completion / usage["prompt_tokens"]
+        else:
+            sample = completion
+        with self._lock:
+            self._samples.setdefault(kind, deque(maxlen=self._window)).append(sample)
+
+    def _percentile(self, kind):
+        """The OUTPUT_BUDGET_PERCENTILE of a kind's samples, or None before enough are seen"""
+        with self._lock:
+            samples = sorted(self._samples.get(kind, ()))
+        if len(samples) < OUTPUT_BUDGET_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, len(samples) * OUTPUT_BUDGET_PERCENTILE // 100)]
+
+    def budget(self, kind, messages):
+        """max_tokens for a request of this kind"""
+        default = self.defaults.get(kind, self.defaults["query"])
+        observed = self._percentile(kind)
+        if kind in OUTPUT_BUDGET_SCALED_KINDS:
+            ratio = observed if observed is not None else default
+            return step_up(math.ceil(ratio * OUTPUT_BUDGET_HEADROOM * messages_tokens(messages)))
+        if observed is None:
+            return default
+        return step_up(math.ceil(observed * OUTPUT_BUDGET_HEADROOM))
+
+    def stats(self):
+        """Return sample counts and the current percentile per kind"""
+        with self._lock:
+            kinds = list(self._samples)
+        return {kind: {"samples": len(self._samples[kind]), "percentile": self._percentile(kind)} for kind in kinds}
+
+_output_budgets = None
+_output_budgets_lock = threading.Lock()
+
+def get_output_budgets():
+    """Return the process-wide output budget tracker"""
+    global _output_budgets
+    if _output_budgets is None:
+        with _output_budgets_lock:
+            if _output_budgets is None:
+                _output_budgets = OutputBudgets()
+    return _output_budgets
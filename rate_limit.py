@@ -0,0 +1,205 @@
+# rate_limit.py
+"""Client-side rate limiting and retry backoff for the Perplexity API"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from config import (
+    RATE_LIMIT_REQUESTS_PER_MINUTE, RATE_LIMIT_BURST,
+    RETRY_BASE_DELAY, RETRY_MAX_DELAY, SHARED_STATE_DB_PATH
+)
+from shared_state import connect, immediate
+
+# Lower numbers are served first when requests are queued for tokens
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+class TokenBucket:
+    """Thread-safe token bucket where queued interactive requests go ahead of background ones"""
+
+    def __init__(self, rate_per_second, capacity):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiting = {}
+        self._cond = threading.Condition()
+
+    def _refill(self, now):
+        """Add tokens accrued since the last update"""
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _outranked(self, priority):
+        """Check whether a more urgent request is already waiting"""
+        return any(count for level, count in self._waiting.items() if level < priority)
+
+    def _take(self, priority):
+        """Take a token if one is free; otherwise return how long to wait before trying again"""
+        now = time.monotonic()
+        self._refill(now)
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._tokens < 1:
+            return (1 - self._tokens) / self.rate
+        if self._outranked(priority):
+            return 0.05  # re-check once the higher-priority waiter is served
+        self._tokens -= 1
+        return None
+
+    def acquire(self, priority=PRIORITY_INTERACTIVE, timeout=None):
+        """Take one token, waiting up to timeout seconds; return False if none became available"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._waiting[priority] = self._waiting.get(priority, 0) + 1
+            try:
+                while True:
+                    delay = self._take(priority)
+                    if delay is None:
+                        return True
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return False
+                        delay = min(delay, remaining)
+                    self._cond.wait(delay)
+            finally:
+                self._waiting[priority] -= 1
+                self._cond.notify_all()
+
+    def set_rate(self, requests_per_minute, burst=None):
+        """Change the refill rate (and optionally the burst capacity) at runtime"""
+        with self._cond:
+            self._refill(time.monotonic())
+            self.rate = requests_per_minute / 60.0
+            if burst is not None:
+                self.capacity = burst
+                self._tokens = min(self._tokens, burst)
+            self._cond.notify_all()
+
+    def pause(self, seconds):
+        """Stop handing out tokens for a while, e.g. after the upstream answers 429"""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def stats(self):
+        """Return the current token level and queued waiters per priority"""
+        with self._cond:
+            self._refill(time.monotonic())
+            return {
+                "tokens": self._tokens,
+                "waiting": dict(self._waiting),
+                "paused_for": max(0.0, self._paused_until - time.monotonic())
+            }
+
+class SharedTokenBucket(TokenBucket):
+    """Token bucket whose tokens and 429 pause live in a SQLite file shared by every app process on the host
+
+    Rate and burst stay per-process settings, so processes sharing a bucket should agree on them.
+    Priority ordering applies between the waiters of one process; across processes a refilled
+    token goes to whichever asks first.
+    """
+
+    def __init__(self, rate_per_second, capacity, db_path, name="perplexity"):
+        super().__init__(rate_per_second, capacity)
+        self.name = name
+        self._db = connect(db_path)
+        with immediate(self._db):
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS token_buckets (name TEXT PRIMARY KEY, "
+                "tokens REAL NOT NULL, updated_at REAL NOT NULL, paused_until REAL NOT NULL)"
+            )
+            self._db.execute(
+                "INSERT OR IGNORE INTO token_buckets VALUES (?, ?, ?, 0)", (name, float(capacity), time.time())
+            )
+
+    def _load(self):
+        """Return (tokens after refill, paused_until, now) from the shared row; wall-clock time"""
+        tokens, updated_at, paused_until = self._db.execute(
+            "SELECT tokens, updated_at, paused_until FROM token_buckets WHERE name = ?", (self.name,)
+        ).fetchone()
+        now = time.time()
+        return min(self.capacity, tokens + max(0.0, now - updated_at) * self.rate), paused_until, now
+
+    def _save(self, tokens, now):
+        """Write the refilled token level back to the shared row"""
+        self._db.execute(
+            "UPDATE token_buckets SET tokens = ?, updated_at = ? WHERE name = ?", (tokens, now, self.name)
+        )
+
+    def _take(self, priority):
+        """Take a token from the shared row under its write lock, or return how long to wait"""
+        with immediate(self._db):
+            tokens, paused_until, now = self._load()
+            if now < paused_until:
+                return paused_until - now
+            if tokens < 1:
+                return (1 - tokens) / self.rate
+            if self._outranked(priority):
+                return 0.05
+            self._save(tokens - 1, now)
+        return None
+
+    def set_rate(self, requests_per_minute, burst=None):
+        """Change this process's refill rate and burst, clamping the shared token level"""
+        with self._cond, immediate(self._db):
+            tokens, _, now = self._load()
+            self.rate = requests_per_minute / 60.0
+            if burst is not None:
+                self.capacity = burst
+                tokens = min(tokens, burst)
+            self._save(tokens, now)
+            self._cond.notify_all()
+
+    def pause(self, seconds):
+        """Pause every process sharing the bucket, e.g. after the upstream answers 429"""
+        with self._cond:
+            self._db.execute(
+                "UPDATE token_buckets SET paused_until = MAX(paused_until, ?) WHERE name = ?",
+                (time.time() + seconds, self.name)
+            )
+
+    def stats(self):
+        """Return the shared token level, this process's waiters and the shared pause"""
+        with self._cond:
+            tokens, paused_until, now = self._load()
+            return {
+                "tokens": tokens,
+                "waiting": dict(self._waiting),
+                "paused_for": max(0.0, paused_until - now)
+            }
+
+def backoff_delay(attempt, base=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY):
+    """Full-jitter exponential backoff delay for a zero-based retry attempt"""
+    return random.uniform(0, min(max_delay, base * (2 ** attempt)))
+
+def parse_retry_after(value, max_delay=RETRY_MAX_DELAY):
+    """Parse a Retry-After header (seconds or HTTP date) into a capped delay, or None"""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), max_delay)
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    """Return the token bucket shared by every session (and every app process, with shared state configured)"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                rate = RATE_LIMIT_REQUESTS_PER_MINUTE / 60.0
+                if SHARED_STATE_DB_PATH:
+                    _rate_limiter = SharedTokenBucket(rate, RATE_LIMIT_BURST, SHARED_STATE_DB_PATH)
+                else:
+                    _rate_limiter = TokenBucket(rate, RATE_LIMIT_BURST)
+    return _rate_limiter
@@ -0,0 +1,243 @@
+# response_parser.py
+"""Parse API answers once into compact typed records that pages render and store"""
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+from perplexity_client import SEVERITY_ICONS
+
+# Records are namedtuples: no per-instance __dict__, immutable and cheap to keep in session state
+Section = namedtuple("Section", ["title", "body"])
+SymptomReport = namedtuple("SymptomReport", ["sections", "red_flags", "emergency_signs", "citations"])
+InteractionEntry = namedtuple("InteractionEntry", ["drugs", "severity", "mechanism", "management", "monitoring", "text"])
+InteractionReport = namedtuple("InteractionReport", ["entries", "sections", "citations"])
+TermExplanation = namedtuple("TermExplanation", ["definition", "lay_term", "pronunciation", "sections", "citations"])
+Translation = namedtuple("Translation", ["sections", "citations"])
+
+# Serialization tag -> record type, and the fields that hold nested records
+_RECORD_TAGS = {"S": SymptomReport, "I": InteractionReport, "T": TermExplanation, "D": Translation}
+_TAGS_BY_TYPE = {record_type: tag for tag, record_type in _RECORD_TAGS.items()}
+_NESTED_FIELDS = {"sections": Section, "entries": InteractionEntry}
+
+SEVERITY_KEYWORDS = ("major", "moderate", "minor")
+
+# Field -> the headings that title it: the prompt's own wording first, then its common short forms.
+# Titles must match one exactly (after normalizing), so "Immediate actions" is not "When to seek immediate care".
+HEADINGS = {
+    "red_flags": ("red flags and warning signs", "red flags", "warning signs"),
+    "emergency": ("when to seek emergency care", "when to seek immediate care",
+                  "when to seek emergency medical care", "emergency signs"),
+    "definition": ("simple easy to understand definition", "simple definition", "definition"),
+    "lay_term": ("common name or lay term", "common name", "lay term"),
+    "pronunciation": ("pronunciation guide", "pronunciation"),
+    "mechanism": ("mechanism of interaction", "mechanism"),
+    "management": ("clinical management recommendations", "clinical management", "management"),
+    "monitoring": ("monitoring parameters", "monitoring")
+}
+
+_HEADING_RE = re.compile(r"^\s{0,3}#{1,6}\s+(?P<title>.+?)\s*#*\s*$")
+_BOLD_HEADING_RE = re.compile(r"^\s*(?:\d+[.)]\s+)?\*\*(?P<title>[^*\n]+?)\*\*\s*:?\s*(?P<rest>.*)$")
+_BULLET_RE = re.compile(r"^\s*(?:[-*•+]|\d+[.)])\s+(?P<item>.+)$")
+_TITLE_NUMBER_RE = re.compile(r"^\d+[.)]\s*")
+_BOLD_RE = re.compile(r"\*\*([^*]+)\*\*")
+_DRUG_SPLIT_RE = re.compile(r"\s*(?:\+|/|&|\band\b|\bwith\b)\s*", re.IGNORECASE)
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+
+def answer_text(result):
+    """The answer markdown of a response dict ("" when there is none)"""
+    if not result or not result.get('choices'):
+        return ""
+    return result['choices'][0]['message']['content']
+
+def _citation_urls(result):
+    """Citations as a tuple of URL strings (older responses used {title, url} dicts)"""
+    return tuple(
+        citation if isinstance(citation, str) else citation.get('url', '')
+        for citation in (result or {}).get('citations', [])
+    )
+
+def _clean_title(title):
+    """'**1. Common Causes:**' -> 'Common Causes'"""
+    title = _BOLD_RE.sub(r"\1", title).strip().rstrip(":").strip()
+    return _TITLE_NUMBER_RE.sub("", title)
+
+def split_sections(text):
+    """Split markdown into (title, body) sections at headings and whole-line bold titles"""
+    sections = []
+    title, lines = "", []
+    for line in text.splitlines():
+        match = _HEADING_RE.match(line) or _BOLD_HEADING_RE.match(line)
+        # "**Label**: text" on one line is content (often a list item), not a heading
+        if match and not match.groupdict().get("rest"):
+            body = "\n".join(lines).strip()
+            if title or body:
+                sections.append(Section(title, body))
+            title, lines = _clean_title(match.group("title")), []
+        else:
+            lines.append(line)
+    body = "\n".join(lines).strip()
+    if title or body:
+        sections.append(Section(title, body))
+    return tuple(sections)
+
+def _heading_key(title):
+    """'🚨 When to Seek Emergency Care!' -> 'when to seek emergency care'"""
+    return _NON_WORD_RE.sub(" ", title.lower().replace("&", " and ")).strip()
+
+def _find_section(sections, field):
+    """The first section titled by one of a field's HEADINGS"""
+    headings = HEADINGS[field]
+    for section in sections:
+        if _heading_key(section.title) in headings:
+            return section
+    return None
+
+def _items(section):
+    """Bullet items of a section (or its non-empty lines when it has no bullets)"""
+    if section is None:
+        return ()
+    lines = [line.strip() for line in section.body.splitlines() if line.strip()]
+    bullets = [match.group("item").strip() for match in map(_BULLET_RE.match, lines) if match]
+    return tuple(bullets or lines)
+
+def _first_paragraph(section):
+    """The first paragraph of a section's body, without a leading bullet"""
+    if section is None or not section.body:
+        return ""
+    paragraph = section.body.split("\n\n")[0].strip()
+    match = _BULLET_RE.match(paragraph)
+    return match.group("item").strip() if match and "\n" not in paragraph else paragraph
+
+def _field(sections, field):
+    """A labelled value: the section titled by one of the field's HEADINGS, else an inline '**Label**: value' line"""
+    section = _find_section(sections, field)
+    if section is not None:
+        return _first_paragraph(section)
+    for section in sections:
+        for line in section.body.splitlines():
+            match = _BOLD_HEADING_RE.match(_BULLET_RE.sub(r"\g<item>", line))
+            if match and match.group("rest") and _heading_key(_clean_title(match.group("title"))) in HEADINGS[field]:
+                return match.group("rest").strip()
+    return ""
+
+def parse_symptom(text, citations=()):
+    """Symptom answer -> SymptomReport with its red flags and emergency signs pulled out"""
+    sections = split_sections(text)
+    return SymptomReport(
+        sections,
+        _items(_find_section(sections, "red_flags")),
+        _items(_find_section(sections, "emergency")),
+        tuple(citations)
+    )
+
+def _entry_drugs(item):
+    """'**Warfarin + Aspirin**: ...' -> ('Warfarin', 'Aspirin')"""
+    match = _BOLD_RE.search(item)
+    if not match:
+        return ()
+    names = [name.strip() for name in _DRUG_SPLIT_RE.split(match.group(1)) if name.strip()]
+    return tuple(names) if len(names) >= 2 else ()
+
+def _pair_entry(drugs, severity, content):
+    """InteractionEntry for one pairwise answer, with its labelled subsections"""
+    sections = split_sections(content)
+    return InteractionEntry(
+        tuple(drugs), severity,
+        _field(sections, "mechanism"),
+        _field(sections, "management"),
+        _field(sections, "monitoring"),
+        content
+    )
+
+def parse_interactions(text, citations=(), pairs=None):
+    """Interaction answer -> InteractionReport
+
+    Pairwise results (`pairs` from merge_pair_results) give one entry per drug pair; a single
+    combined answer gives one entry per bullet under its Major/Moderate/Minor sections.
+    """
+    if pairs is not None:
+        entries = tuple(_pair_entry(pair["drugs"], pair["severity"], pair["content"]) for pair in pairs)
+        return InteractionReport(entries, (), tuple(citations))
+    sections = split_sections(text)
+    entries = []
+    for section in sections:
+        title = section.title.lower()
+        severity = next((keyword.capitalize() for keyword in SEVERITY_KEYWORDS if keyword in title), None)
+        if severity is None:
+            continue
+        for item in _items(section):
+            entries.append(InteractionEntry(_entry_drugs(item), severity, "", "", "", item))
+    return InteractionReport(tuple(entries), sections, tuple(citations))
+
+def parse_term(text, citations=()):
+    """Term explanation -> TermExplanation with definition, lay term and pronunciation fields"""
+    sections = split_sections(text)
+    return TermExplanation(
+        _field(sections, "definition"),
+        _field(sections, "lay_term"),
+        _field(sections, "pronunciation"),
+        sections,
+        tuple(citations)
+    )
+
+# Query kind -> parser for a plain answer text
+_PARSERS = {
+    "symptom": parse_symptom,
+    "drug_interactions": parse_interactions,
+    "drug_pair": parse_interactions,
+    "medical_translation": parse_term
+}
+
+@lru_cache(maxsize=256)
+def _parse_text(kind, text, citations):
+    """Parse one distinct answer once per process"""
+    parser = _PARSERS.get(kind)
+    if parser is None:
+        return Translation(split_sections(text), citations)
+    return parser(text, citations)
+
+def parse_response(kind, result):
+    """Parse a response dict of a query kind into its record (None for a missing result)"""
+    if not result:
+        return None
+    if kind == "drug_interactions" and "pairs" in result:
+        return parse_interactions(answer_text(result), _citation_urls(result), result["pairs"])
+    return _parse_text(kind, answer_text(result), _citation_urls(result))
+
+def to_markdown(record):
+    """Render a record back to markdown, section by section"""
+    parts = []
+    if isinstance(record, InteractionReport) and not record.sections:
+        for entry in record.entries:
+            drugs = " + ".join(drug.title() for drug in entry.drugs)
+            parts.append(f"### {SEVERITY_ICONS.get(entry.severity, '❔')} {drugs} — {entry.severity}\n\n{entry.text}")
+        return "\n\n---\n\n".join(parts)
+    for section in record.sections:
+        parts.append(f"#### {section.title}\n\n{section.body}" if section.title else section.body)
+    return "\n\n".join(parts)
+
+def _encode(value):
+    """Records and tuples -> nested lists (field names are implied by the record type)"""
+    if isinstance(value, tuple):
+        return [_encode(item) for item in value]
+    return value
+
+def _decode(record_type, values):
+    """Rebuild a record from its nested-list form"""
+    fields = []
+    for field, value in zip(record_type._fields, values):
+        nested = _NESTED_FIELDS.get(field)
+        if nested is not None:
+            value = tuple(_decode(nested, item) for item in value)
+        elif isinstance(value, list):
+            value = tuple(value)
+        fields.append(value)
+    return record_type(*fields)
+
+def to_compact(record):
+    """JSON-ready compact form: [type tag, field values...] without field names"""
+    return [_TAGS_BY_TYPE[type(record)], *_encode(tuple(record))]
+
+def from_compact(data):
+    """Inverse of to_compact"""
+    return _decode(_RECORD_TAGS[data[0]], data[1:])
@@ -0,0 +1,255 @@
+# semantic_cache.py
+"""Near-duplicate query matching for the response cache, using hashed n-gram vectors"""
+
+import re
+import threading
+import zlib
+from functools import lru_cache
+import numpy as np
+from config import (
+    SEMANTIC_CACHE_ENABLED, SEMANTIC_CACHE_KINDS, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_DIM,
+    SEMANTIC_CACHE_MAX_ENTRIES, SEMANTIC_IVF_MIN_ENTRIES, SEMANTIC_IVF_PROBES
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Words that don't change what is being asked about, and informal intensity words folded together
+STOPWORDS = frozenset("a an and the my i im i'm me of in on at to with have having has feel feeling is are am".split())
+TOKEN_SYNONYMS = {"bad": "severe", "terrible": "severe", "awful": "severe", "intense": "severe", "extreme": "severe"}
+_FILLER_WORDS = frozenset({"really", "very", "so", "quite", "pretty"})
+# "headache no vomiting" must never be served the answer for "headache vomiting"
+NEGATIONS = frozenset({"no", "not", "without", "denies", "deny", "denied", "never"})
+_SCOPE_ENDS = frozenset({",", ";", ".", "but", "with"})   # a negation covers words up to these
+_CLAUSE_TOKEN_RE = re.compile(r"[a-z0-9]+|[,;.]")
+# Words that change the medical question while barely moving the vector ("left arm" / "right arm",
+# "one leg" / "both legs", "dry cough" / "wet cough"): queries only match when these are identical
+QUALIFIERS = frozenset(
+    "left right bilateral unilateral upper lower "                   # side and position
+    "one single both two three multiple several all "                # how many
+    "dry wet productive sharp dull burning throbbing constant intermittent "
+    "sudden gradual acute chronic mild moderate severe high low".split()
+)
+
+WORD_WEIGHT = 1.0
+TRIGRAM_WEIGHT = 0.35   # character trigrams catch plurals, typos and "stomachache" / "stomach ache"
+
+def _stem(token):
+    """Crude suffix folding: 'pains' -> 'pain', 'dizziness' / 'dizzy' -> 'dizzi'"""
+    if len(token) > 6 and token.endswith("ness"):
+        token = token[:-4]
+    elif len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        token = token[:-1]
+    if len(token) > 3 and token.endswith("y"):
+        token = token[:-1] + "i"
+    return token
+
+def query_tokens(text):
+    """Lower-cased, stemmed content words of a query, synonyms folded, in sorted order"""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        token = TOKEN_SYNONYMS.get(token, token)
+        if token not in STOPWORDS and token not in _FILLER_WORDS:
+            tokens.append(_stem(token))
+    return sorted(tokens)
+
+def negated_terms(text):
+    """Stemmed words in the scope of a negation: 'no nausea or vomiting, fever' -> ('nausea', 'vomiting')"""
+    negated = set()
+    in_scope = False
+    for token in _CLAUSE_TOKEN_RE.findall(text.lower()):
+        if token in NEGATIONS:
+            in_scope = True
+        elif token in _SCOPE_ENDS:
+            in_scope = False
+        elif in_scope and token not in STOPWORDS and token not in _FILLER_WORDS and token != "or":
+            negated.add(_stem(TOKEN_SYNONYMS.get(token, token)))
+    return tuple(sorted(negated))
+
+def qualifier_terms(text):
+    """Side, count and character words of a query: 'sudden pain in left arm' -> ('left', 'sudden')"""
+    return tuple(sorted({
+        token for token in (TOKEN_SYNONYMS.get(token, token) for token in _TOKEN_RE.findall(text.lower()))
+        if token in QUALIFIERS
+    }))
+
+def _bucket(feature, dim):
+    """Stable (index, sign) for a feature in a `dim`-wide hashed vector"""
+    code = zlib.crc32(feature.encode("utf-8"))
+    return code % dim, 1.0 if code & 0x80000000 else -1.0
+
+@lru_cache(maxsize=4096)
+def embed(text, dim=SEMANTIC_CACHE_DIM):
+    """Unit-length hashed bag of words and character trigrams (word order doesn't matter)"""
+    vector = np.zeros(dim, dtype=np.float32)
+    for token in query_tokens(text):
+        index, sign = _bucket("w:" + token, dim)
+        vector[index] += sign * WORD_WEIGHT
+        padded = f" {token} "
+        for i in range(len(padded) - 2):
+            index, sign = _bucket("c:" + padded[i:i + 3], dim)
+            vector[index] += sign * TRIGRAM_WEIGHT
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    vector.flags.writeable = False
+    return vector
+
+class VectorIndex:
+    """Cosine nearest-neighbour search over unit vectors
+
+    Exact (one matrix-vector product) while small; beyond `ivf_min` entries the vectors are
+    clustered with k-means and a search only scans the `probes` closest clusters (IVF).
+    """
+
+    def __init__(self, dim=SEMANTIC_CACHE_DIM, max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+                 ivf_min=SEMANTIC_IVF_MIN_ENTRIES, probes=SEMANTIC_IVF_PROBES):
+        self.dim = dim
+        self.max_entries = max_entries
+        self.ivf_min = ivf_min
+        self.probes = probes
+        self._vectors = np.zeros((16, dim), dtype=np.float32)
+        self._values = []
+        self._centroids = None
+        self._lists = None
+        self._trained_size = 0
+
+    def __len__(self):
+        return len(self._values)
+
+    def add(self, vector, value):
+        """Add a vector, dropping the oldest half of the index when it is full"""
+        if len(self._values) >= self.max_entries:
+            keep = len(self._values) // 2
+            self._vectors[:keep] = self._vectors[len(self._values) - keep:len(self._values)]
+            self._values = self._values[-keep:]
+            self._centroids = None
+            self._trained_size = 0
+        size = len(self._values)
+        if size == len(self._vectors):
+            self._vectors = np.concatenate([self._vectors, np.zeros_like(self._vectors)])
+        self._vectors[size] = vector
+        self._values.append(value)
+        if self._centroids is not None:
+            self._lists[int(np.argmax(self._centroids @ vector))].append(size)
+        if size + 1 >= self.ivf_min and size + 1 >= 2 * self._trained_size:
+            self._train()
+
+    def search(self, vector):
+        """Return (similarity, value) of the closest vector, or None when the index is empty"""
+        size = len(self._values)
+        if not size:
+            return None
+        if self._centroids is None:
+            candidates = None
+            scores = self._vectors[:size] @ vector
+        else:
+            nearest = np.argsort(self._centroids @ vector)[-self.probes:]
+            candidates = np.fromiter((i for cluster in nearest for i in self._lists[cluster]), dtype=np.intp)
+            if not len(candidates):
+                return None
+            scores = self._vectors[candidates] @ vector
+        best = int(np.argmax(scores))
+        position = best if candidates is None else int(candidates[best])
+        return float(scores[best]), self._values[position]
+
+    def _train(self, iterations=8, seed=0):
+        """Cluster the vectors (spherical k-means, ~sqrt(n) clusters) and rebuild the inverted lists"""
+        size = len(self._values)
+        vectors = self._vectors[:size]
+        clusters = max(1, int(np.sqrt(size)))
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(size, clusters, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(vectors @ centroids.T, axis=1)
+            for cluster in range(clusters):
+                members = vectors[assignment == cluster]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    centroids[cluster] = centroid / (np.linalg.norm(centroid) or 1.0)
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        self._lists = [np.flatnonzero(assignment == cluster).tolist() for cluster in range(clusters)]
+        self._centroids = centroids
+        self._trained_size = size
+
+class SemanticCache:
+    """Maps a query to the response-cache key of an earlier query that asked the same thing
+
+    Only the free-text field of a kind is compared by similarity; the other inputs (e.g. age
+    group, severity and duration filters), the negated words and the QUALIFIERS of the text
+    must match exactly, so each combination gets its own index.
+    """
+
+    def __init__(self, kinds=SEMANTIC_CACHE_KINDS, threshold=SEMANTIC_CACHE_THRESHOLD, index_factory=VectorIndex):
+        self.kinds = kinds
+        self.threshold = threshold
+        self._index_factory = index_factory
+        self._indexes = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _split(self, kind, inputs):
+        """(index key, free text) for a query, or None for kinds and inputs this cache doesn't handle"""
+        field = self.kinds.get(kind)
+        if field is None or not inputs or not isinstance(inputs.get(field), str):
+            return None
+        filters = tuple(sorted((name, str(value)) for name, value in inputs.items() if name != field))
+        # Queries are only compared with others that negate the same words and use the same qualifiers
+        text = inputs[field]
+        return (kind, filters, negated_terms(text), qualifier_terms(text)), text
+
+    def find(self, kind, inputs):
+        """Return (cache key, similarity) of the closest earlier query above the threshold, or None"""
+        split = self._split(kind, inputs)
+        if split is None:
+            return None
+        index_key, text = split
+        vector = embed(text)
+        with self._lock:
+            index = self._indexes.get(index_key)
+            match = index.search(vector) if index is not None and vector.any() else None
+            if match is None or match[0] < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+        similarity, cache_key = match
+        return cache_key, similarity
+
+    def add(self, kind, inputs, cache_key):
+        """Remember which response-cache entry answers a query"""
+        split = self._split(kind, inputs)
+        if split is None:
+            return
+        index_key, text = split
+        vector = embed(text)
+        if not vector.any():
+            return
+        with self._lock:
+            index = self._indexes.get(index_key)
+            if index is None:
+                index = self._indexes[index_key] = self._index_factory()
+            index.add(vector, cache_key)
+
+    def stats(self):
+        """Return hit/miss counters and the number of remembered queries"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": sum(len(index) for index in self._indexes.values()),
+                "indexes": len(self._indexes)
+            }
+
+_semantic_cache = None
+_semantic_cache_lock = threading.Lock()
+
+def get_semantic_cache():
+    """Return the process-wide semantic cache, or None when it is disabled"""
+    global _semantic_cache
+    if not SEMANTIC_CACHE_ENABLED:
+        return None
+    if _semantic_cache is None:
+        with _semantic_cache_lock:
+            if _semantic_cache is None:
+                _semantic_cache = SemanticCache()
+    return _semantic_cache
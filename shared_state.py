@@ -0,0 +1,24 @@
+# shared_state.py
+"""SQLite connections that several app processes on one host can read and write concurrently"""
+
+import sqlite3
+from contextlib import contextmanager
+from config import SHARED_STATE_BUSY_TIMEOUT
+
+def connect(db_path, busy_timeout=SHARED_STATE_BUSY_TIMEOUT):
+    """Open an autocommit connection in WAL mode that waits, rather than fails, on another writer's lock"""
+    db = sqlite3.connect(db_path, timeout=busy_timeout, check_same_thread=False, isolation_level=None)
+    db.execute("PRAGMA journal_mode=WAL")    # readers never block the writer, nor the writer readers
+    db.execute("PRAGMA synchronous=NORMAL")  # cache state, not records: skip the fsync on every commit
+    return db
+
+@contextmanager
+def immediate(db):
+    """Run a read-modify-write as one transaction that holds the write lock from the start"""
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        yield db
+    except BaseException:
+        db.execute("ROLLBACK")
+        raise
+    db.execute("COMMIT")
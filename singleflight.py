@@ -0,0 +1,188 @@
+# singleflight.py
+"""Request coalescing so concurrent identical queries share one upstream call"""
+
+import os
+import threading
+import time
+from config import SHARED_STATE_DB_PATH, SHARED_LEASE_TTL, SHARED_POLL_INTERVAL
+from shared_state import connect, immediate
+
+class Flight:
+    """One in-flight upstream call whose chunks and result are shared with every waiter"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.chunks = []
+        self.done = False
+        self.result = None
+        self.error = None
+
+    def publish(self, chunk):
+        """Make a streamed chunk visible to waiters"""
+        with self._cond:
+            self.chunks.append(chunk)
+            self._cond.notify_all()
+
+    def finish(self, result=None, error=None):
+        """Complete the flight with a result or an exception"""
+        with self._cond:
+            self.result = result
+            self.error = error
+            self.done = True
+            self._cond.notify_all()
+
+    def wait(self):
+        """Block until the flight completes; return its result or raise its error"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.done)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def iter_chunks(self):
+        """Yield chunks as the leader publishes them, until the flight completes"""
+        position = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self.done or len(self.chunks) > position)
+                new_chunks = self.chunks[position:]
+                done = self.done
+            for chunk in new_chunks:
+                yield chunk
+            position += len(new_chunks)
+            if done and position >= len(self.chunks):
+                return
+
+class SingleFlight:
+    """Tracks in-flight calls by key; the first caller leads and later callers wait on it"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def begin(self, key):
+        """Return (flight, is_leader) for key"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return flight, False
+            flight = Flight()
+            self._flights[key] = flight
+            self.leaders += 1
+            return flight, True
+
+    def end(self, key, flight, result=None, error=None):
+        """Retire the flight for key and wake its waiters"""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.finish(result=result, error=error)
+
+    def stats(self):
+        """Return leader/coalesced counters and the current number of flights"""
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._flights)
+            }
+
+def _process_alive(pid):
+    """Check whether a process on this host still exists"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # alive, just owned by another user
+    return True
+
+class SharedLeases:
+    """Host-wide single-flight: at most one app process calls the API for a key at a time
+
+    The in-process SingleFlight still coalesces callers within a process; only its leader takes
+    a lease here. A lease lapses after `ttl` seconds or as soon as its owner process has exited.
+    """
+
+    def __init__(self, db_path, ttl=SHARED_LEASE_TTL, poll_interval=SHARED_POLL_INTERVAL):
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._db = connect(db_path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS flight_leases ("
+            "key TEXT PRIMARY KEY, pid INTEGER NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self.acquired = 0
+        self.coalesced = 0
+
+    def acquire(self, key):
+        """Take the lease for key unless a live process holds it; return whether it was taken"""
+        now = time.time()
+        with self._lock, immediate(self._db):
+            row = self._db.execute("SELECT pid, expires_at FROM flight_leases WHERE key = ?", (key,)).fetchone()
+            if row and row[0] != self._pid and row[1] > now and _process_alive(row[0]):
+                return False
+            self._db.execute(
+                "INSERT OR REPLACE INTO flight_leases (key, pid, expires_at) VALUES (?, ?, ?)",
+                (key, self._pid, now + self.ttl)
+            )
+            self.acquired += 1
+            return True
+
+    def release(self, key):
+        """Give up this process's lease for key, if it still holds it"""
+        with self._lock:
+            self._db.execute("DELETE FROM flight_leases WHERE key = ? AND pid = ?", (key, self._pid))
+
+    def claim(self, key, lookup):
+        """Wait out any other process fetching key; return its answer, or None once this process holds the lease
+
+        `lookup` returns the stored answer for key or None. A leader that fails releases its
+        lease without an answer, and the next process in line takes over.
+        """
+        while True:
+            value = lookup()
+            if value is None and self.acquire(key):
+                # The previous leader may have stored its answer just before releasing
+                value = lookup()
+                if value is None:
+                    return None
+                self.release(key)
+            if value is not None:
+                with self._lock:
+                    self.coalesced += 1
+                return value
+            time.sleep(self.poll_interval)
+
+    def stats(self):
+        """Return lease counters and the number of leases held host-wide"""
+        with self._lock:
+            held = self._db.execute(
+                "SELECT COUNT(*) FROM flight_leases WHERE expires_at > ?", (time.time(),)
+            ).fetchone()[0]
+            return {"acquired": self.acquired, "coalesced": self.coalesced, "held": held}
+
+_single_flight = SingleFlight()
+
+def get_single_flight():
+    """Return the process-wide single-flight registry for API calls"""
+    return _single_flight
+
+_shared_leases = None
+_shared_leases_lock = threading.Lock()
+
+def get_shared_leases():
+    """Return the host-wide lease table, or None when no shared-state file is configured"""
+    global _shared_leases
+    if not SHARED_STATE_DB_PATH:
+        return None
+    if _shared_leases is None:
+        with _shared_leases_lock:
+            if _shared_leases is None:
+                _shared_leases = SharedLeases(SHARED_STATE_DB_PATH)
+    return _shared_leases
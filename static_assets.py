@@ -0,0 +1,66 @@
+# static_assets.py
+"""Minified, content-hashed CSS and HTML fragments, built once per process"""
+
+import hashlib
+import os
+import re
+from collections import namedtuple
+from functools import lru_cache
+from config import STATIC_DIR, STATIC_CSS_SERVING
+from styles import get_custom_css
+
+CSSBundle = namedtuple("CSSBundle", ["css", "hash", "filename"])
+
+_CSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+_STYLE_TAG_RE = re.compile(r"</?style[^>]*>", re.I)
+_WHITESPACE_RE = re.compile(r"\s+")
+_CSS_PUNCTUATION_RE = re.compile(r"\s*([{};,>])\s*")
+_CSS_PROPERTY_COLON_RE = re.compile(r"([{;]\s*[-\w]+)\s*:\s*")
+_CSS_STRING_RE = re.compile(r"""('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")""")
+
+def _minify_css_code(css):
+    """Minify CSS text that contains no string literals"""
+    css = _WHITESPACE_RE.sub(" ", css)
+    css = _CSS_PUNCTUATION_RE.sub(r"\1", css)
+    return _CSS_PROPERTY_COLON_RE.sub(r"\1:", css).replace(";}", "}")
+
+def minify_css(css):
+    """Strip comments and insignificant whitespace from a stylesheet, leaving strings intact"""
+    css = _CSS_COMMENT_RE.sub("", _STYLE_TAG_RE.sub("", css))
+    # Odd-numbered parts of the split are the quoted strings (e.g. inline SVG data URLs)
+    parts = _CSS_STRING_RE.split(css)
+    return "".join(part if i % 2 else _minify_css_code(part) for i, part in enumerate(parts)).strip()
+
+def minify_html(html):
+    """Collapse the indentation of a static HTML fragment onto one line"""
+    return _WHITESPACE_RE.sub(" ", html).strip()
+
+@lru_cache(maxsize=None)
+def css_bundle():
+    """Return the minified app stylesheet with its content hash and versioned filename"""
+    css = minify_css(get_custom_css())
+    digest = hashlib.sha256(css.encode("utf-8")).hexdigest()[:12]
+    return CSSBundle(css, digest, f"dr_home.{digest}.css")
+
+@lru_cache(maxsize=None)
+def css_tag():
+    """Return the markup that applies the app stylesheet
+
+    With static serving enabled (server.enableStaticServing) the CSS is written once to a
+    content-hashed file and referenced by a tiny <link>, so reruns stop resending it and
+    browsers can cache it; otherwise the minified CSS is inlined.
+    """
+    bundle = css_bundle()
+    if not STATIC_CSS_SERVING:
+        return f"<style>{bundle.css}</style>"
+    path = os.path.join(STATIC_DIR, bundle.filename)
+    if not os.path.exists(path):
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(bundle.css)
+    return f'<link rel="stylesheet" href="app/static/{bundle.filename}">'
+
+@lru_cache(maxsize=256)
+def html_fragment(html):
+    """Return the compact form of a static HTML fragment, minifying each distinct one once"""
+    return minify_html(html)
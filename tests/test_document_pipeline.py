@@ -0,0 +1,20 @@
+# tests/test_document_pipeline.py
+"""Token-budgeted document splitting"""
+
+import pytest
+from document_pipeline import split_document
+from prompt_builder import estimate_tokens
+
+LAB_TABLE = "\n".join(f"WBC {i} 4.5 10^9/L ref 4.0-11.0 flag none" for i in range(400))
+UNPUNCTUATED = " ".join(f"word{i}" for i in range(5000))
+
+@pytest.mark.parametrize("text", [LAB_TABLE, UNPUNCTUATED, "x" * 10000])
+def test_split_document_enforces_budget_without_blank_lines_or_punctuation(text):
+    chunks = split_document(text, max_tokens=600)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 600 for chunk in chunks)
+    assert "".join(chunks).replace("\n", "").replace(" ", "") == text.replace("\n", "").replace(" ", "")
+
+def test_split_document_keeps_short_paragraphs_together():
+    text = "Findings:\nNormal heart size.\n\nImpression: No acute disease."
+    assert split_document(text, max_tokens=600) == ["Findings:\nNormal heart size.\n\nImpression: No acute disease."]
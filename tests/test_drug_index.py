@@ -0,0 +1,29 @@
+# tests/test_drug_index.py
+"""Drug-name resolution: exact names only, near misses as suggestions"""
+
+import pytest
+from drug_index import get_drug_index
+from perplexity_client import drug_pairs
+
+LOOK_ALIKES = [
+    ("fosinopril", "lisinopril"),
+    ("pitavastatin", "pravastatin"),
+    ("fluvastatin", "lovastatin"),
+    ("famciclovir", "acyclovir"),
+    ("ganciclovir", "acyclovir")
+]
+
+@pytest.mark.parametrize("typed, look_alike", LOOK_ALIKES)
+def test_look_alike_drugs_are_not_resolved_to_each_other(typed, look_alike):
+    index = get_drug_index()
+    assert index.lookup(typed) is None
+    assert index.canonicalize(typed) == typed
+    assert look_alike in [generic for _, generic in index.suggest(typed)]
+
+def test_pair_check_keeps_the_drug_the_user_entered():
+    assert drug_pairs(["fluvastatin", "clarithromycin"]) == [("clarithromycin", "fluvastatin")]
+
+def test_brands_and_synonyms_still_resolve():
+    index = get_drug_index()
+    assert index.canonicalize("Coumadin") == "warfarin"
+    assert index.canonicalize("warfarin") == "warfarin"
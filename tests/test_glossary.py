@@ -0,0 +1,16 @@
+# tests/test_glossary.py
+"""Glossary lookup: exact terms and aliases only, near misses as suggestions"""
+
+import pytest
+from glossary import get_glossary
+
+@pytest.mark.parametrize("typed, look_alike", [("dysphasia", "dysphagia"), ("hypoxemia", "hypoxia")])
+def test_look_alike_terms_are_suggested_not_defined(typed, look_alike):
+    glossary = get_glossary()
+    assert glossary.lookup(typed) is None
+    assert look_alike in [entry.term for _, entry in glossary.suggest(typed)]
+
+def test_terms_and_aliases_are_defined():
+    glossary = get_glossary()
+    assert glossary.lookup("heart attack").term == "myocardial infarction"
+    assert glossary.lookup("HTN").term == "hypertension"
@@ -0,0 +1,20 @@
+# tests/test_health_calculators.py
+"""Roster CSV parsing"""
+
+import io
+import pytest
+import health_calculators as calc
+
+def test_read_roster_csv():
+    roster = calc.read_roster_csv(io.StringIO("age,sex,height_in,weight_lbs\n40,M,70,180\n"))
+    assert roster["age"].tolist() == [40.0]
+    assert roster["sex"].tolist() == ["M"]
+
+@pytest.mark.parametrize("text", ["", "age,sex,height_in,weight_lbs\n"])
+def test_read_roster_csv_rejects_empty_file(text):
+    with pytest.raises(ValueError):
+        calc.read_roster_csv(io.StringIO(text))
+
+def test_read_roster_csv_rejects_ragged_row():
+    with pytest.raises(ValueError, match="row 3"):
+        calc.read_roster_csv(io.StringIO("age,sex,height_in,weight_lbs\n40,M,70,180\n41,F,64\n"))
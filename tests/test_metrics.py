@@ -0,0 +1,22 @@
+# tests/test_metrics.py
+"""Prometheus rendering of the metrics registry"""
+
+from metrics import MetricsRegistry
+from perplexity_client import PerplexityAPIError
+
+def test_render_with_http_and_missing_error_statuses():
+    registry = MetricsRegistry()
+    registry.record_query_event({"event": "query_failed", "kind": "symptom",
+                                 "error": PerplexityAPIError("rate limited", status_code=429)})
+    registry.record_query_event({"event": "query_failed", "kind": "symptom", "error": PerplexityAPIError("timed out")})
+    text = registry.render_prometheus()
+    assert 'perplexity_query_errors_total{kind="symptom",status="429"} 1' in text
+    assert 'perplexity_query_errors_total{kind="symptom",status="none"} 1' in text
+
+def test_mixed_label_value_types_share_a_series_and_render():
+    registry = MetricsRegistry()
+    registry.inc("perplexity_retries_total", kind="symptom", reason=503)
+    registry.inc("perplexity_retries_total", kind="symptom", reason="503")
+    registry.inc("perplexity_retries_total", kind="symptom", reason="timeout")
+    text = registry.render_prometheus()
+    assert 'perplexity_retries_total{kind="symptom",reason="503"} 2' in text
@@ -0,0 +1,16 @@
+# tests/test_perplexity_client.py
+"""Response caching rules of the Perplexity client"""
+
+from cache import get_response_cache
+from perplexity_client import PerplexityClient
+
+def _answer(finish_reason):
+    return {"choices": [{"index": 0, "finish_reason": finish_reason,
+                         "message": {"role": "assistant", "content": "answer"}}]}
+
+def test_answers_cut_off_by_the_budget_are_not_cached():
+    client = PerplexityClient("test")
+    client._store("test-truncated", _answer("length"), "query", None)
+    client._store("test-complete", _answer("stop"), "query", None)
+    assert get_response_cache().get("test-truncated") is None
+    assert get_response_cache().get("test-complete") == _answer("stop")
@@ -0,0 +1,34 @@
+# tests/test_response_parser.py
+"""Answer parsing into typed records"""
+
+from response_parser import from_compact, parse_symptom, parse_term, to_compact
+
+SYMPTOM_ANSWER = """## Immediate actions
+- Sit down and rest
+- Loosen tight clothing
+
+## When to seek immediate care
+- Chest pain spreading to the arm or jaw
+- Fainting
+
+## Red Flags & Warning Signs
+- Pain lasting more than 15 minutes
+"""
+
+def test_emergency_signs_come_from_the_exact_heading_not_a_keyword_match():
+    report = parse_symptom(SYMPTOM_ANSWER)
+    assert report.emergency_signs == ("Chest pain spreading to the arm or jaw", "Fainting")
+    assert report.red_flags == ("Pain lasting more than 15 minutes",)
+
+def test_immediate_actions_alone_are_not_emergency_signs():
+    report = parse_symptom("## Immediate actions\n- Sit down and rest\n")
+    assert report.emergency_signs == ()
+
+def test_term_fields_from_sections_and_inline_labels():
+    term = parse_term("## 1. Simple Definition\nA heart attack.\n\n- **Common name**: heart attack\n"
+                      "- **Pronunciation guide**: my-oh-KAR-dee-al\n- **Mechanism notes**: not a field\n")
+    assert (term.definition, term.lay_term, term.pronunciation) == ("A heart attack.", "heart attack", "my-oh-KAR-dee-al")
+
+def test_compact_form_round_trips():
+    report = parse_symptom(SYMPTOM_ANSWER, ("https://example.org",))
+    assert from_compact(to_compact(report)) == report
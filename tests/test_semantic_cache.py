@@ -0,0 +1,24 @@
+# tests/test_semantic_cache.py
+"""Near-duplicate matching must not cross negations or side/count/character qualifiers"""
+
+import pytest
+from semantic_cache import SemanticCache
+
+MUST_MISS = [
+    ("pain in lower right abdomen", "pain in lower left abdomen"),
+    ("chest pain radiating to left arm", "chest pain radiating to right arm"),
+    ("dry cough", "wet cough"),
+    ("pain in one leg", "pain in both legs"),
+    ("headache vomiting", "headache no vomiting")
+]
+
+@pytest.mark.parametrize("answered, query", MUST_MISS + [pair[::-1] for pair in MUST_MISS])
+def test_distinct_symptoms_are_not_served_each_other(answered, query):
+    cache = SemanticCache()
+    cache.add("symptom", {"symptom": answered}, "answer")
+    assert cache.find("symptom", {"symptom": query}) is None
+
+def test_paraphrase_with_the_same_qualifiers_hits():
+    cache = SemanticCache()
+    cache.add("symptom", {"symptom": "pain in lower right abdomen"}, "answer")
+    assert cache.find("symptom", {"symptom": "lower right abdomen pain"})[0] == "answer"
@@ -0,0 +1,105 @@
+# text_index.py
+"""Compact in-memory lookup structures for bundled name/term lists"""
+
+import re
+from bisect import bisect_left
+from collections import defaultdict
+
+_NON_WORD_RE = re.compile(r"[^\w\s/'.-]+")
+
+def normalize_term(text):
+    """Lower-case text, drop symbols like ® and ™, and collapse whitespace"""
+    return " ".join(_NON_WORD_RE.sub(" ", text.lower()).split())
+
+def _trigrams(text):
+    """Return the set of padded character trigrams for text"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def edit_distance(a, b, max_distance):
+    """Levenshtein distance, returning max_distance + 1 once the bound is exceeded"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            ))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+class PrefixIndex:
+    """Sorted-array index mapping normalized keys to values with exact and prefix lookup"""
+
+    def __init__(self, pairs):
+        pairs = sorted({normalize_term(key): value for key, value in pairs}.items())
+        self.keys = [key for key, _ in pairs]
+        self.values = [value for _, value in pairs]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def get(self, key, default=None):
+        """Return the value for an exact (normalized) key"""
+        key = normalize_term(key)
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.values[i]
+        return default
+
+    def prefix(self, prefix, limit=10):
+        """Return up to limit (key, value) pairs whose key starts with prefix"""
+        prefix = normalize_term(prefix)
+        if not prefix:
+            return []
+        matches = []
+        i = bisect_left(self.keys, prefix)
+        while i < len(self.keys) and self.keys[i].startswith(prefix) and len(matches) < limit:
+            matches.append((self.keys[i], self.values[i]))
+            i += 1
+        return matches
+
+class TrigramIndex:
+    """Trigram posting lists over a key list for typo-tolerant lookup"""
+
+    def __init__(self, keys):
+        self.keys = list(keys)
+        self._key_trigrams = [_trigrams(key) for key in self.keys]
+        postings = defaultdict(list)
+        for key_id, grams in enumerate(self._key_trigrams):
+            for gram in grams:
+                postings[gram].append(key_id)
+        self._postings = dict(postings)
+
+    def search(self, text, min_similarity=0.4, max_distance=2):
+        """Return the closest key as (key, similarity), or None if nothing is close enough"""
+        matches = self.nearest(text, limit=1, min_similarity=min_similarity, max_distance=max_distance)
+        return matches[0] if matches else None
+
+    def nearest(self, text, limit=5, min_similarity=0.4, max_distance=2):
+        """Return up to limit close keys as (key, similarity), most similar first"""
+        text = normalize_term(text)
+        grams = _trigrams(text)
+        shared = defaultdict(int)
+        for gram in grams:
+            for key_id in self._postings.get(gram, ()):
+                shared[key_id] += 1
+
+        candidates = []
+        for key_id, count in shared.items():
+            similarity = count / (len(grams) + len(self._key_trigrams[key_id]) - count)
+            if similarity >= min_similarity:
+                candidates.append((similarity, key_id))
+        matches = []
+        for similarity, key_id in sorted(candidates, key=lambda candidate: (-candidate[0], self.keys[candidate[1]])):
+            if edit_distance(text, self.keys[key_id], max_distance) <= max_distance:
+                matches.append((self.keys[key_id], similarity))
+                if len(matches) == limit:
+                    break
+        return matches
@@ -1,12 +1,18 @@
 # utils.py
 """Enhanced utility functions for Dr. Home application"""
 
+import json
+import re
+import uuid
 import streamlit as st
+import streamlit.components.v1 as components
 from contextlib import contextmanager
+from config import HISTORY_COOKIE_NAME, HISTORY_COOKIE_MAX_AGE
+from static_assets import html_fragment
 
 def show_disclaimer():
     """Display enhanced medical disclaimer"""
-    st.markdown("""
+    st.markdown(html_fragment("""
     <div class="warning-box fade-in">
         <h4>⚠️ IMPORTANT MEDICAL DISCLAIMER</h4>
         <p><strong>This platform is for educational purposes only and does not replace professional medical advice.</strong></p>
@@ -17,16 +23,56 @@ def show_disclaimer():
             <li>💊 Drug interactions shown are for reference only - consult your pharmacist or doctor</li>
         </ul>
     </div>
-    """, unsafe_allow_html=True)
+    """), unsafe_allow_html=True)
+
+_USER_ID_RE = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+
+def _set_user_id_cookie(user_id):
+    """Store the history id in a first-party cookie (Streamlit can read cookies but not set them)"""
+    cookie = f"{HISTORY_COOKIE_NAME}={user_id}; max-age={HISTORY_COOKIE_MAX_AGE}; path=/; SameSite=Strict"
+    script = f"<script>window.parent.document.cookie = {json.dumps(cookie)};</script>"
+    if hasattr(st, "iframe"):
+        st.iframe(script, height=1)
+    else:  # Streamlit releases before st.iframe
+        components.html(script, height=0)
+
+def _user_id_cookie():
+    """The history id from the browser's cookie, or None (also outside a real browser session, e.g. in tests)"""
+    value = st.context.cookies.get(HISTORY_COOKIE_NAME)
+    return value if isinstance(value, str) else None
+
+def get_user_id():
+    """Return the visitor's history id, kept in a browser cookie so it survives reloads
+
+    The id is never put in the URL, where a shared link or screenshot would expose the history.
+    """
+    if "uid" in st.query_params:
+        del st.query_params["uid"]  # ids used to live in ?uid=; don't leave them in the address bar
+    cookie = _user_id_cookie()
+    user_id = st.session_state.get("user_id") or cookie
+    if not user_id or not _USER_ID_RE.match(user_id):
+        user_id = uuid.uuid4().hex
+    if cookie != user_id and st.session_state.get("user_id_cookie") != user_id:
+        _set_user_id_cookie(user_id)
+        st.session_state.user_id_cookie = user_id
+    st.session_state.user_id = user_id
+    return user_id
+
+def forget_user_id():
+    """Replace the visitor's history id with a fresh one, detaching this browser from the old history"""
+    user_id = uuid.uuid4().hex
+    st.session_state.user_id = user_id
+    st.session_state.user_id_cookie = None
+    return user_id
 
 def setup_api_key():
     """Setup Perplexity API key in enhanced sidebar"""
-    st.sidebar.markdown("""
+    st.sidebar.markdown(html_fragment("""
     <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
                 padding: 1rem; border-radius: 12px; margin-bottom: 1rem; color: white; text-align: center;">
         <h3 style="margin: 0; color: white;">🔑 API Configuration</h3>
     </div>
-    """, unsafe_allow_html=True)
+    """), unsafe_allow_html=True)
     
     # Check if API key is already stored in session state
     if 'perplexity_api_key' not in st.session_state:
@@ -51,17 +97,17 @@ def setup_api_key():
 
 def show_api_key_warning():
     """Show enhanced warning when API key is not configured"""
-    st.markdown("""
+    st.markdown(html_fragment("""
     <div class="info-card fade-in">
         <h3>🔐 API Key Required</h3>
         <p>Please configure your Perplexity API key in the sidebar to unlock all Dr. Home features.</p>
     </div>
-    """, unsafe_allow_html=True)
+    """), unsafe_allow_html=True)
     
     col1, col2 = st.columns(2)
     
     with col1:
-        st.markdown("""
+        st.markdown(html_fragment("""
         <div class="feature-card">
             <span class="feature-icon">🚀</span>
             <div class="feature-title">Quick Setup</div>
@@ -69,10 +115,10 @@ def show_api_key_warning():
                 Get started in just 3 simple steps with your free Perplexity API key.
             </div>
         </div>
-        """, unsafe_allow_html=True)
+        """), unsafe_allow_html=True)
     
     with col2:
-        st.markdown("""
+        st.markdown(html_fragment("""
         <div class="feature-card">
             <span class="feature-icon">🔒</span>
             <div class="feature-title">Secure & Private</div>
@@ -80,7 +126,7 @@ def show_api_key_warning():
                 Your API key is stored securely and never shared with third parties.
             </div>
         </div>
-        """, unsafe_allow_html=True)
+        """), unsafe_allow_html=True)
     
     st.info("""
     **📋 Setup Instructions:**
@@ -93,12 +139,12 @@ def show_api_key_warning():
 def show_session_stats():
     """Display enhanced session statistics in sidebar"""
     st.sidebar.markdown("---")
-    st.sidebar.markdown("""
+    st.sidebar.markdown(html_fragment("""
     <div style="background: linear-gradient(135deg, #e3f2fd 0%, #bbdefb 100%); 
                 padding: 1rem; border-radius: 12px; text-align: center;">
         <h4 style="margin: 0; color: #1565c0;">📊 Session Stats</h4>
     </div>
-    """, unsafe_allow_html=True)
+    """), unsafe_allow_html=True)
     
     if 'queries_made' not in st.session_state:
         st.session_state.queries_made = 0
@@ -112,28 +158,12 @@ def show_session_stats():
 
 def calculate_bmi(height_ft, height_in, weight):
     """Calculate BMI and return result with enhanced category"""
-    height_total_inches = (height_ft * 12) + height_in
-    bmi = (weight * 703) / (height_total_inches ** 2)
-    
-    # Determine category with enhanced styling
-    if bmi < 18.5:
-        category = "Underweight"
-        color = "info"
-        emoji = "📉"
-    elif 18.5 <= bmi < 25:
-        category = "Normal weight"
-        color = "success"
-        emoji = "✅"
-    elif 25 <= bmi < 30:
-        category = "Overweight"
-        color = "warning"
-        emoji = "⚠️"
-    else:
-        category = "Obese"
-        color = "error"
-        emoji = "🚨"
+    # Imported here so numpy is only loaded once a calculator is actually used
+    from health_calculators import bmi as compute_bmi, bmi_band, BMI_CATEGORIES, BMI_EMOJIS, BMI_ALERT_LEVELS
     
-    return bmi, f"{emoji} {category}", color
+    bmi = float(compute_bmi(height_ft * 12 + height_in, weight))
+    band = bmi_band(bmi)
+    return bmi, f"{BMI_EMOJIS[band]} {BMI_CATEGORIES[band]}", str(BMI_ALERT_LEVELS[band])
 
 def format_drug_list(drug_input):
     """Format drug input into a clean list"""
@@ -142,10 +172,14 @@ def format_drug_list(drug_input):
     return drug_input
 
 def display_sources(result):
-    """Display enhanced source citations if available"""
-    if result and 'citations' in result:
+    """Display enhanced source citations of a response dict or parsed record, if available"""
+    citations = result.get('citations') if isinstance(result, dict) else getattr(result, 'citations', None)
+    if citations:
         st.markdown("### 📚 **Trusted Sources**")
-        for i, citation in enumerate(result['citations'], 1):
+        for i, citation in enumerate(citations, 1):
+            # The API returns citations as bare URLs; older responses used {title, url} dicts
+            if isinstance(citation, str):
+                citation = {'url': citation}
             st.markdown(f"""
             <div class="source-citation slide-in">
                 <strong>📖 Source {i}: {citation.get('title', 'Medical Source')}</strong><br>
@@ -168,7 +202,7 @@ def create_feature_showcase():
     col1, col2 = st.columns(2)
     
     with col1:
-        st.markdown("""
+        st.markdown(html_fragment("""
         <div class="feature-card fade-in">
             <span class="feature-icon">🔍</span>
             <div class="feature-title">Symptom Explorer</div>
@@ -176,9 +210,9 @@ def create_feature_showcase():
                 Get comprehensive, evidence-based information about symptoms from trusted medical sources with advanced filtering options.
             </div>
         </div>
-        """, unsafe_allow_html=True)
+        """), unsafe_allow_html=True)
         
-        st.markdown("""
+        st.markdown(html_fragment("""
         <div class="feature-card fade-in">
             <span class="feature-icon">🏥</span>
             <div class="feature-title">Medical Translator</div>
@@ -186,10 +220,10 @@ def create_feature_showcase():
                 Transform complex medical terminology into clear, understandable language for patients and families.
             </div>
         </div>
-        """, unsafe_allow_html=True)
+        """), unsafe_allow_html=True)
     
     with col2:
-        st.markdown("""
+        st.markdown(html_fragment("""
         <div class="feature-card fade-in">
             <span class="feature-icon">💊</span>
             <div class="feature-title">Drug Interactions</div>
@@ -197,9 +231,9 @@ def create_feature_showcase():
                 Check potential medication interactions with detailed analysis and clinical recommendations from medical databases.
             </div>
         </div>
-        """, unsafe_allow_html=True)
+        """), unsafe_allow_html=True)
         
-        st.markdown("""
+        st.markdown(html_fragment("""
         <div class="feature-card fade-in">
             <span class="feature-icon">📚</span>
             <div class="feature-title">Health Resources</div>
@@ -207,44 +241,44 @@ def create_feature_showcase():
                 Access curated health tools, calculators, and links to trusted medical organizations and emergency contacts.
             </div>
         </div>
-        """, unsafe_allow_html=True)
+        """), unsafe_allow_html=True)
 
 def show_quick_stats():
     """Display quick statistics about the platform"""
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.markdown("""
+        st.markdown(html_fragment("""
         <div class="metric-container">
             <h3 style="color: #667eea; margin: 0;">🏥</h3>
             <h4 style="margin: 0.5rem 0;">Trusted Sources</h4>
             <p style="margin: 0; color: #6c757d;">NIH, WHO, CDC, Mayo Clinic</p>
         </div>
-        """, unsafe_allow_html=True)
+        """), unsafe_allow_html=True)
     
     with col2:
-        st.markdown("""
+        st.markdown(html_fragment("""
         <div class="metric-container">
             <h3 style="color: #28a745; margin: 0;">🔬</h3>
             <h4 style="margin: 0.5rem 0;">Evidence-Based</h4>
             <p style="margin: 0; color: #6c757d;">Peer-reviewed research</p>
         </div>
-        """, unsafe_allow_html=True)
+        """), unsafe_allow_html=True)
     
     with col3:
-        st.markdown("""
+        st.markdown(html_fragment("""
         <div class="metric-container">
             <h3 style="color: #ffc107; margin: 0;">⚡</h3>
             <h4 style="margin: 0.5rem 0;">Real-time</h4>
             <p style="margin: 0; color: #6c757d;">Latest medical information</p>
         </div>
-        """, unsafe_allow_html=True)
+        """), unsafe_allow_html=True)
     
     with col4:
-        st.markdown("""
+        st.markdown(html_fragment("""
         <div class="metric-container">
             <h3 style="color: #dc3545; margin: 0;">🔒</h3>
             <h4 style="margin: 0.5rem 0;">Secure</h4>
             <p style="margin: 0; color: #6c757d;">Privacy protected</p>
         </div>
-        """, unsafe_allow_html=True)
\ No newline at end of file
+        """), unsafe_allow_html=True)
\ No newline at end of file